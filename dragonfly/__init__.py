@@ -48,7 +48,7 @@ from .grammar.elements  import (ElementBase, Sequence, Alternative,
 from .grammar.context   import Context, AppContext, FuncContext
 from .grammar.list      import ListBase, List, DictList
 from .grammar.recobs    import (RecognitionObserver, RecognitionHistory,
-                                PlaybackHistory)
+                                PlaybackHistory, LatencyMetricsObserver)
 from .grammar.recobs_callbacks   import (CallbackRecognitionObserver,
                                          register_beginning_callback,
                                          register_recognition_callback,
@@ -20,6 +20,7 @@
 import argparse
 import ast
 import glob
+import json
 import logging
 import os
 import re
@@ -31,6 +32,7 @@ import six
 from dragonfly import get_engine, MimicFailure, EngineError
 from dragonfly.loader import CommandModule, CommandModuleDirectory
 from dragonfly.log import setup_log
+from dragonfly.profiler import SamplingProfiler
 
 LOG = logging.getLogger("command")
 
@@ -51,6 +53,24 @@ def _setup_logging(args):
             logging.getLogger(logger_name).setLevel(logging.WARNING)
 
 
+def _start_profiler(args):
+    # Start the sampling profiler if an output file was specified.
+    if not args.profile:
+        return None
+    profiler = SamplingProfiler(rate=args.profile_rate)
+    profiler.start()
+    return profiler
+
+
+def _stop_profiler(profiler, args):
+    # Stop the profiler and write the collected samples.
+    profiler.stop()
+    with open(args.profile, "w") as f:
+        profiler.write_collapsed(f)
+    LOG.info("Wrote %d profiler samples to %s", profiler.sample_count,
+             args.profile)
+
+
 def _init_engine(args):
     # Retrieve the engine option pairs from the arguments.
     options = {}
@@ -142,6 +162,23 @@ def _do_recognition(engine, args):
         pass
 
 
+def _wave_file_result_to_dict(result):
+    # Convert a wave file result to a JSON-serializable dictionary.  NaN
+    #  confidence values are written as null.
+    def convert(value):
+        return None if isinstance(value, float) and value != value else value
+
+    return {
+        "filename": result.filename,
+        "error": result.error,
+        "utterances": [
+            dict((field, convert(value))
+                 for field, value in zip(utterance._fields, utterance))
+            for utterance in result.utterances
+        ],
+    }
+
+
 #---------------------------------------------------------------------------
 # Main CLI functions.
 
@@ -257,10 +294,53 @@ def cli_cmd_load_directory(args):
     return return_code
 
 
+def cli_cmd_recognize_wave_files(args):
+    # Setup logging.
+    _setup_logging(args)
+
+    # Initialise the specified engine. Return early if there was an error or
+    # if the engine cannot recognize wave files in batches.
+    engine = _init_engine(args)
+    if engine is None:
+        return 1
+    if not hasattr(engine, "recognize_wave_files"):
+        LOG.error("Engine %r cannot recognize wave files", engine.name)
+        return 1
+
+    # Retrieve wave filenames from the arguments.
+    wave_files = []
+    for lst in args.wave_files:
+        wave_files.extend(lst)
+
+    # Connect to the engine, load command modules and write the results of
+    # recognizing each wave file as a line of JSON.
+    LOG.debug("Recognizing wave files with engine '%s'", args.engine)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        with engine.connection():
+            return_code = _load_cmd_modules(args)
+            results = engine.recognize_wave_files(wave_files,
+                                                  workers=args.workers,
+                                                  as_stream=args.as_stream)
+            for result in results:
+                if result.error:
+                    return_code = 1
+                output.write(json.dumps(_wave_file_result_to_dict(result))
+                             + "\n")
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    # Return the success of module loading and recognition.
+    return return_code
+
+
 _COMMAND_MAP = {
     "test": cli_cmd_test,
     "load": cli_cmd_load,
     "load-directory": cli_cmd_load_directory,
+    "recognize-wave-files": cli_cmd_recognize_wave_files,
 }
 
 
@@ -391,6 +471,17 @@ def make_arg_parser():
         "-q", "--quiet", default=False, action="store_true",
         help="Suppress loader-related informational messages."
     )
+    profile_argument = _build_argument(
+        "--profile", default=None, metavar="FILE",
+        help="Profile Dragonfly and command modules with the sampling "
+             "profiler and write collapsed stacks to FILE on exit. The "
+             "output can be used to generate flame graphs."
+    )
+    profile_rate_argument = _build_argument(
+        "--profile-rate", default=100, type=float, metavar="HZ",
+        help="Number of profiler samples to take per second (default: "
+             "100)."
+    )
 
     # Create the parser for the "test" command.
     parser_test = subparsers.add_parser(
@@ -412,7 +503,8 @@ def make_arg_parser():
         parser_test,
         cmd_module_files_argument, engine_argument, engine_options_argument,
         language_argument, no_input_argument, delay_argument,
-        log_level_argument, quiet_argument
+        log_level_argument, quiet_argument, profile_argument,
+        profile_rate_argument
     )
 
     # Define common arguments for the "load" and "load-directory" commands.
@@ -435,7 +527,8 @@ def make_arg_parser():
         parser_load,
         cmd_module_files_argument, engine_argument, engine_options_argument,
         language_argument, no_input_argument, no_recobs_messages_argument,
-        log_level_argument, quiet_argument
+        log_level_argument, quiet_argument, profile_argument,
+        profile_rate_argument
     )
 
     # Create the parser for the "load-directory" command.
@@ -458,7 +551,50 @@ def make_arg_parser():
         parser_load_directory,
         module_dirs_argument, recursive_argument, engine_argument,
         engine_options_argument, language_argument, no_input_argument,
-        no_recobs_messages_argument, log_level_argument, quiet_argument
+        no_recobs_messages_argument, log_level_argument, quiet_argument,
+        profile_argument, profile_rate_argument
+    )
+
+    # Create the parser for the "recognize-wave-files" command.
+    parser_recognize_wave_files = subparsers.add_parser(
+        "recognize-wave-files",
+        help="Load grammars from command module files and recognize wave "
+             "files in batches, using multiple worker processes. The "
+             "recognitions are written as one line of JSON per file and "
+             "are not processed."
+    )
+    engine_argument = _build_argument(
+        "-e", "--engine", default="kaldi",
+        help="Name of the engine to use for recognition (default: "
+             "kaldi)."
+    )
+    wave_files_argument = _build_argument(
+        "-w", "--wave-files", required=True, nargs="+",
+        type=_valid_filename_or_pattern, metavar="WAV",
+        help="Wave file(s) to recognize."
+    )
+    workers_argument = _build_argument(
+        "-j", "--workers", default=None, type=int,
+        help="Number of worker processes to use. By default, one per CPU "
+             "is used."
+    )
+    as_stream_argument = _build_argument(
+        "--as-stream", default=False, action="store_true",
+        help="Whether to split each wave file into utterances using voice "
+             "activity detection, instead of treating it as a single "
+             "utterance."
+    )
+    output_argument = _build_argument(
+        "--output", default=None, metavar="FILE",
+        help="File to write the results to. By default, results are "
+             "written to stdout."
+    )
+    _add_arguments(
+        parser_recognize_wave_files,
+        cmd_module_files_argument, wave_files_argument, engine_argument,
+        engine_options_argument, language_argument, workers_argument,
+        as_stream_argument, output_argument, log_level_argument, quiet_argument,
+        profile_argument, profile_rate_argument
     )
 
     # Return the argument parser.
@@ -476,8 +612,14 @@ def main():
 
     func = _COMMAND_MAP.get(args.command, not_implemented)
 
-    # Call the function and exit using the result.
-    return_code = func(args)
+    # Call the function and exit using the result.  Profile the call if
+    # requested.
+    profiler = _start_profiler(args)
+    try:
+        return_code = func(args)
+    finally:
+        if profiler:
+            _stop_profiler(profiler, args)
     exit(return_code)
 
 
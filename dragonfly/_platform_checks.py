@@ -69,6 +69,11 @@ def is_x11():
 #: Whether the value of the DISPLAY env. variable indicates an X11 session.
 IS_X11 = is_x11()
 
+#: Name of the X11 back-end to use for keyboard, window and monitor
+#: classes: ``"xdotool"`` (the default), ``"xlib"`` or ``"libxdo"``.  This
+#: is set using the *DRAGONFLY_X11_BACKEND* environment variable.
+X11_BACKEND = os.environ.get("DRAGONFLY_X11_BACKEND", "xdotool").lower()
+
 
 if __name__ == '__main__':
     # Test the _is_x11() function.
@@ -27,9 +27,13 @@ ActionBase base class
 from functools import reduce
 from locale import getpreferredencoding
 import logging
+import threading
 
 from six import PY2, integer_types, text_type
 
+from dragonfly.metrics import get_latency_metrics
+from dragonfly.windows.base_window import BaseWindow
+
 
 #---------------------------------------------------------------------------
 
@@ -94,6 +98,7 @@ class ActionBase(object):
 
     def execute(self, data=None):
         self._log_exec.debug("Executing action: %s (%s)", self, data)
+        get_latency_metrics().mark("action", first=True)
         try:
             if self._execute(data) is False:
                 raise ActionError(str(self))
@@ -109,6 +114,79 @@ class ActionBase(object):
     def _execute(self, data=None):
         """ Virtual method. """
 
+    def _can_batch_keyboard_events(self):
+        # Whether this action only sends keyboard events, which an
+        #  ActionSeries may send together with those of neighbouring
+        #  actions.
+        return False
+
+    def _can_share_window_snapshot(self):
+        # Whether this action only matches windows, so that an
+        #  ActionSeries may let it share a window snapshot with
+        #  neighbouring window-matching actions.
+        return False
+
+
+#---------------------------------------------------------------------------
+
+class KeyboardEventBatch(object):
+    """
+        Keyboard events of consecutive keyboard actions in an
+        :class:`ActionSeries`, which are sent to the keyboard class
+        together.
+
+        Keyboard actions add their events to the batch started in the
+        current thread, if there is one, instead of sending them.
+
+    """
+
+    _local = threading.local()
+
+    def __init__(self):
+        self._keyboard = None
+        self._events = []
+        self._previous = None
+
+    @classmethod
+    def get_current(cls):
+        """
+        Get the batch started in the current thread, or *None*.
+
+        :rtype: KeyboardEventBatch | None
+        """
+        return getattr(cls._local, "batch", None)
+
+    @classmethod
+    def start(cls):
+        """
+        Start a new batch in the current thread.
+
+        :rtype: KeyboardEventBatch
+        """
+        batch = cls()
+        batch._previous = cls.get_current()
+        cls._local.batch = batch
+        return batch
+
+    def finish(self):
+        """ Stop adding events to this batch and send them. """
+        self._local.batch = self._previous
+        self.flush()
+
+    def add(self, keyboard, events):
+        """ Add events to be sent using a keyboard object. """
+        if keyboard is not self._keyboard:
+            self.flush()
+            self._keyboard = keyboard
+        self._events.extend(events)
+
+    def flush(self):
+        """ Send the events added so far. """
+        events, self._events = self._events, []
+        if events:
+            self._keyboard.send_keyboard_events(events)
+            get_latency_metrics().mark("keyboard")
+
 
 #---------------------------------------------------------------------------
 
@@ -212,6 +290,10 @@ class ActionSeries(ActionBase):
     #: Whether to stop executing if an action in the series fails.
     stop_on_failures = True
 
+    #: Whether to send the keyboard events of consecutive keyboard actions
+    #: in the series, such as :class:`Key` and :class:`Text`, together.
+    batch_keyboard_events = True
+
     def __init__(self, *actions):
         ActionBase.__init__(self)
         self._actions = list(actions)
@@ -252,10 +334,35 @@ class ActionSeries(ActionBase):
     def _execute(self, data=None):
         # Use a flat list of the series actions for more sensible sequence
         # termination and logging if an error occurs during execution.
-        for action in self.flat_action_list():
-            if action.execute(data) is False and self.stop_on_failures:
-                return False
-        return True
+        # Collect the keyboard events of consecutive keyboard actions and
+        # send them together before executing any other action.
+        # Consecutive window-matching actions share one window snapshot.
+        batch = None
+        snapshot_scope = False
+        try:
+            for action in self.flat_action_list():
+                batchable = (self.batch_keyboard_events and
+                             action._can_batch_keyboard_events())
+                if batchable and batch is None:
+                    batch = KeyboardEventBatch.start()
+                elif not batchable and batch is not None:
+                    batch.finish()
+                    batch = None
+                shares_snapshot = action._can_share_window_snapshot()
+                if shares_snapshot and not snapshot_scope:
+                    BaseWindow.begin_snapshot_scope()
+                    snapshot_scope = True
+                elif not shares_snapshot and snapshot_scope:
+                    BaseWindow.end_snapshot_scope()
+                    snapshot_scope = False
+                if action.execute(data) is False and self.stop_on_failures:
+                    return False
+            return True
+        finally:
+            if batch is not None:
+                batch.finish()
+            if snapshot_scope:
+                BaseWindow.end_snapshot_scope()
 
     def execute(self, data=None):
         # Override execute() to discard the return value.
@@ -26,9 +26,11 @@
 
 import os
 
-from dragonfly.actions.action_base import DynStrActionBase
+from dragonfly.actions.action_base import (DynStrActionBase,
+                                           KeyboardEventBatch)
 from dragonfly.actions.keyboard    import Keyboard
 from dragonfly.actions.typeables   import typeables
+from dragonfly.metrics             import get_latency_metrics
 
 
 class BaseKeyboardAction(DynStrActionBase):
@@ -54,6 +56,19 @@ class BaseKeyboardAction(DynStrActionBase):
         if os.name == "nt": return self._keyboard.require_hardware_events()
         else: return False
 
+    def _can_batch_keyboard_events(self):
+        return True
+
+    def _send_keyboard_events(self, events):
+        # Add the events to the current batch of an ActionSeries, if there
+        #  is one.  Otherwise, send them now.
+        batch = KeyboardEventBatch.get_current()
+        if batch is not None:
+            batch.add(self._keyboard, events)
+        else:
+            self._keyboard.send_keyboard_events(events)
+            get_latency_metrics().mark("keyboard")
+
     def _get_typeable(self, key_symbol, use_hardware):
         # Use the Typeable object for the symbol, if it exists.
         typeable = typeables.get(key_symbol)
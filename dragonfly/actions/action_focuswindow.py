@@ -26,6 +26,7 @@ FocusWindow action
 
 from dragonfly.actions.action_base import ActionBase, ActionError
 from dragonfly.windows.window      import Window
+from dragonfly.windows.foreground  import get_foreground_watcher
 
 
 #---------------------------------------------------------------------------
@@ -76,6 +77,9 @@ class FocusWindow(ActionBase):
         if focus_only:  arguments.append("focus_only=%r" % focus_only)
         self._str = ", ".join(arguments)
 
+    def _can_share_window_snapshot(self):
+        return True
+
     def _execute(self, data=None):
         executable = self.executable
         title = self.title
@@ -98,5 +102,8 @@ class FocusWindow(ActionBase):
                 window.set_focus()
             else:
                 window.set_foreground()
+
+            # The foreground window has changed.
+            get_foreground_watcher().invalidate()
         else:
             raise ActionError("Failed to find window (%s)." % self._str)
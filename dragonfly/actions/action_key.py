@@ -513,7 +513,7 @@ class Key(BaseKeyboardAction):
             keyboard_events.extend(events_single)
 
         # Send keyboard events.
-        self._keyboard.send_keyboard_events(keyboard_events)
+        self._send_keyboard_events(keyboard_events)
         return True
 
     def _calc_events_single(self, event_data, use_hardware):
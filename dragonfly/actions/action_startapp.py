@@ -155,6 +155,7 @@ class StartApp(ActionBase):
             start = time.time()
             while time.time() - start < timeout:
                 found = False
+                Window.clear_window_snapshot()
                 for window in Window.get_matching_windows(exe):
                     if target is None or window.pid == target:
                         window.set_foreground()
@@ -185,6 +186,9 @@ class StartApp(ActionBase):
             # start the application as normal and get the process ID.
             pid = self._start_app_process().pid
 
+        # Windows read before the application was started are out of date.
+        Window.clear_window_snapshot()
+
         # If specified, focus the application after starting it.
         if self._focus_after_start:
             self._focus_window_after_starting(pid)
@@ -243,6 +247,9 @@ class BringApp(StartApp):
         self._focus_only = kwargs.pop("focus_only", False)
         StartApp.__init__(self, *args, **kwargs)
 
+    def _can_share_window_snapshot(self):
+        return True
+
     def _execute(self, data=None):
         self._log.debug("Bringing app: %r", self._args)
         target = self._args[0].lower()
@@ -49,6 +49,21 @@ Please see :ref:`RefUnicodeCharacterKeystrokesKey` for documentation on this
 subject.  Most of it applies to :class:`Text` action objects too.
 
 
+Bulk text typing (Text)
+............................................................................
+
+Keyboard classes may be able to type a whole string of text in one
+operation, which is much faster than sending key events for each
+character.  On X11, the xdotool keyboard class uses ``xdotool type`` and
+the libxdo keyboard class uses libxdo's *enter_text_window* function.  The
+:class:`Text` action types its text this way, if possible, unless hardware
+events are required (*use_hardware*).  The *pause* argument is passed on as
+the delay between characters.
+
+Bulk typing may be disabled by setting the :attr:`Text.bulk_typing` class
+attribute to ``False``.
+
+
 Using Natlink for keyboard input on Windows (Text)
 ............................................................................
 
@@ -68,10 +83,12 @@ Text class reference
 import locale
 import six
 
-from dragonfly.actions.action_base           import ActionError
+from dragonfly.actions.action_base           import (ActionError,
+                                                     KeyboardEventBatch)
 from dragonfly.actions.action_key            import Key
 from dragonfly.actions.action_base_keyboard  import BaseKeyboardAction
 from dragonfly.engines                       import get_engine
+from dragonfly.metrics                       import get_latency_metrics
 from dragonfly.windows.clipboard             import Clipboard
 
 #---------------------------------------------------------------------------
@@ -108,6 +125,18 @@ class Text(BaseKeyboardAction):
         "\t": "tab",
     }
 
+    #: Whether to type text in one operation if the keyboard class
+    #: supports it, instead of sending events for each character.  Key
+    #: events are always sent for each character if hardware events are
+    #: required.
+    bulk_typing = True
+
+    #: Maximum length of text typed using key events instead of in one
+    #: operation if this action is part of an :class:`ActionSeries`, so
+    #: that the events are sent together with those of neighbouring
+    #: keyboard actions.
+    batch_text_max_length = 64
+
     def __init__(self, spec=None, static=False, pause=None,
                  autofmt=False, use_hardware=False):
         if isinstance(spec, six.binary_type):
@@ -133,6 +162,11 @@ class Text(BaseKeyboardAction):
 
         return key_symbols
 
+    def _can_batch_keyboard_events(self):
+        # Autoformatting requires the clipboard contents after sending key
+        #  events, so they cannot be batched.
+        return not self._autofmt
+
     def _execute_events(self, events):
         """
         Send keyboard events.
@@ -171,8 +205,23 @@ class Text(BaseKeyboardAction):
             suffix = word[index + 4:]
             events = self._parse_spec(prefix + text + suffix)
 
-        # Calculate keyboard events.
+        # Type the text in one operation, if possible.  Short text in a
+        #  batch of keyboard events is typed using key events instead.
         use_hardware = self.require_hardware_events()
+        batch = KeyboardEventBatch.get_current()
+        if (self.bulk_typing and not use_hardware and
+                (batch is None or len(events) > self.batch_text_max_length)):
+            characters = dict((key_symbol, character) for character,
+                              key_symbol in self._specials.items())
+            text = u"".join(characters.get(key_symbol, key_symbol)
+                            for key_symbol in events)
+            if batch is not None:
+                batch.flush()
+            if self._keyboard.type_text(text, self._pause):
+                get_latency_metrics().mark("keyboard")
+                return True
+
+        # Otherwise, calculate keyboard events.
         keyboard_events = []
         for key_symbol in events:
             # Get a Typeable object for each key symbol, if possible.
@@ -188,7 +237,7 @@ class Text(BaseKeyboardAction):
             keyboard_events.extend(typeable.events(self._pause))
 
         # Send keyboard events.
-        self._keyboard.send_keyboard_events(keyboard_events)
+        self._send_keyboard_events(keyboard_events)
         return True
 
     def __str__(self):
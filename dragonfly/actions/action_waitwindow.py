@@ -25,10 +25,8 @@ WaitWindow action
 """
 
 
-import time
-
 from dragonfly.actions.action_base import ActionBase, ActionError
-from dragonfly.windows.window      import Window
+from dragonfly.windows.foreground  import get_foreground_watcher
 
 
 #---------------------------------------------------------------------------
@@ -86,19 +84,18 @@ class WaitWindow(ActionBase):
 
     def _execute(self, data=None):
         self._log.debug("Waiting for window context: %s", self)
-        start_time = time.time()
-        while 1:
-            foreground = Window.get_foreground()
-            mismatch = False
-            for match_name in self._match_functions:
-                match_func = getattr(self, match_name)
-                if not match_func(foreground):
-                    mismatch = True
-                    break
-            if not mismatch:
-                return
-            if time.time() - start_time > self._timeout:
-                raise ActionError("Timeout while waiting for window context: %s" % self)
+
+        # Wait for a matching foreground window change.
+        watcher = get_foreground_watcher()
+        if watcher.wait_for(self._match, self._timeout) is None:
+            raise ActionError("Timeout while waiting for window context: %s" % self)
+
+    def _match(self, foreground):
+        for match_name in self._match_functions:
+            match_func = getattr(self, match_name)
+            if not match_func(foreground):
+                return False
+        return True
 
     def _match_title(self, foreground):
         if self._title is None:
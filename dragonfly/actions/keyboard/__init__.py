@@ -24,7 +24,7 @@ This module initializes the keyboard interface for the current platform.
 
 import sys
 
-from dragonfly._platform_checks import IS_X11
+from dragonfly._platform_checks import IS_X11, X11_BACKEND
 
 # Import the keyboard classes for the current platform.
 if sys.platform == "win32":
@@ -50,12 +50,16 @@ elif IS_X11:
         XdoKeySymbols as KeySymbols
     )
 
-    # Import the keyboard for typing through xdotool.
-    from ._x11_xdotool import XdotoolKeyboard as Keyboard
-
-    # The libxdo implementation doesn't work with Python 3, so it is not
-    #  used.
-    # from ._x11_libxdo import LibxdoKeyboard as Keyboard
+    # Import the keyboard for the X11 back-end chosen using the
+    #  DRAGONFLY_X11_BACKEND environment variable.  The default is to type
+    #  through xdotool.
+    if X11_BACKEND == "xlib":
+        from ._x11_xlib import XlibKeyboard as Keyboard
+    elif X11_BACKEND == "libxdo":
+        # Note: the libxdo implementation doesn't work with Python 3.
+        from ._x11_libxdo import LibxdoKeyboard as Keyboard
+    else:
+        from ._x11_xdotool import XdotoolKeyboard as Keyboard
 
 else:
     # No keyboard implementation is available. Dragonfly can function
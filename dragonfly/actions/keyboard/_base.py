@@ -47,6 +47,22 @@ class BaseKeyboard(object):
                                   "detected correctly.  Please see the "
                                   "documentation.")
 
+    @classmethod
+    def type_text(cls, text, interval=0):
+        """
+        Type a string of text in one operation, if supported.
+
+        Keyboard classes which can type text faster than by sending
+        events for each character override this method.  Returns whether
+        the text was typed.  If it was not, the caller should send
+        keyboard events for each character instead.
+
+        :param text: text to type
+        :param interval: number of seconds to pause after each character
+        :rtype: bool
+        """
+        return False
+
     @classmethod
     def get_typeable(cls, char, is_text=False):
         """ Get a Typeable object. """
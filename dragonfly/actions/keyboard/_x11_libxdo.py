@@ -73,3 +73,17 @@ class LibxdoKeyboard(BaseX11Keyboard):
             # Sleep after the keyboard event if necessary.
             if timeout:
                 time.sleep(timeout)
+
+    @classmethod
+    def type_text(cls, text, interval=0):
+        """
+        Type a string of text using libxdo's *enter_text_window* function.
+        """
+        cls._log.debug("Keyboard.type_text %r", text)
+        try:
+            cls.libxdo.enter_text_window(0, text.encode("utf-8"),
+                                         int(interval * 1000000))
+        except Exception as e:
+            cls._log.exception("Failed to type text %r: %s", text, e)
+            return False
+        return True
@@ -22,6 +22,8 @@ import subprocess
 
 from dragonfly.actions.keyboard._x11_base import (BaseX11Keyboard,
                                                   KEY_TRANSLATION)
+from dragonfly.windows.x11_xdotool        import (get_xdotool_session,
+                                                  XdotoolSessionError)
 
 
 class XdotoolKeyboard(BaseX11Keyboard):
@@ -30,6 +32,10 @@ class XdotoolKeyboard(BaseX11Keyboard):
     # xdotool command
     xdotool = "xdotool"
 
+    # Whether to send keyboard events through a persistent xdotool session
+    #  instead of running xdotool each time.
+    use_session = True
+
     @classmethod
     def send_keyboard_events(cls, events):
         """
@@ -67,7 +73,20 @@ class XdotoolKeyboard(BaseX11Keyboard):
             if timeout:
                 arguments += ['sleep', '%.3f' % timeout]
 
-        # Press/release the keys using xdotool, catching any errors.
+        # Press/release the keys using the shared xdotool session, if
+        #  possible.  Don't send the events again if the session failed
+        #  after they were written to it, since some may have been sent.
+        if cls.use_session:
+            try:
+                output = get_xdotool_session(cls.xdotool).run(arguments)
+            except XdotoolSessionError as e:
+                cls._log.error("Failed to send keyboard events using the "
+                               "xdotool session: %s", e)
+                return
+            if output is not None:
+                return
+
+        # Otherwise, run xdotool, catching any errors.
         command = [cls.xdotool] + arguments
         readable_command = ' '.join(command)
         cls._log.debug(readable_command)
@@ -86,3 +105,44 @@ class XdotoolKeyboard(BaseX11Keyboard):
         except Exception as e:
             cls._log.exception("Failed to execute xdotool command '%s': "
                                "%s", readable_command, e)
+
+    @classmethod
+    def type_text(cls, text, interval=0):
+        """
+        Type a string of text using xdotool's *type* command.
+
+        The text is passed on standard input, so there is no limit on its
+        length.  It is never typed using the shared xdotool session, since
+        xdotool would expand ``$`` tokens in it.
+        """
+        cls._log.debug("Keyboard.type_text %r", text)
+        if not text:
+            return True
+        delay = "%d" % round(interval * 1000)
+
+        # Run xdotool with the text as input.
+        command = [cls.xdotool, "type", "--delay", delay, "--file", "-"]
+        readable_command = ' '.join(command)
+        cls._log.debug(readable_command)
+        kwargs = dict(stdin=subprocess.PIPE)
+        if os.name == 'posix':
+            kwargs.update(dict(preexec_fn=os.setsid))
+        try:
+            p = subprocess.Popen(command, **kwargs)
+        except Exception as e:
+            # Nothing was typed, so let the caller type each character.
+            cls._log.exception("Failed to execute xdotool command '%s': "
+                               "%s", readable_command, e)
+            return False
+        try:
+            p.communicate(text.encode("utf-8"))
+            if p.returncode > 0:
+                raise RuntimeError("xdotool command exited with non-zero "
+                                   "return code %d" % p.returncode)
+        except Exception as e:
+            cls._log.exception("Failed to execute xdotool command '%s': "
+                               "%s", readable_command, e)
+
+        # Don't fall back on typing each character, since some of the text
+        #  may have been typed.
+        return True
@@ -0,0 +1,165 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+This file implements an in-process X11 keyboard interface using the XTest
+extension through *python-xlib*.
+"""
+
+import logging
+import threading
+import time
+
+from Xlib import X, XK
+from Xlib.ext import xtest
+
+from dragonfly.actions.keyboard._x11_base import (BaseX11Keyboard,
+                                                  KEY_TRANSLATION)
+from dragonfly.windows.x11_xlib           import get_display
+
+
+def _string_to_keysym(key):
+    # Get the keysym for a key name, including 'U20AC'-style names, which
+    #  XK.string_to_keysym() doesn't handle.
+    keysym = XK.string_to_keysym(key)
+    if keysym or not (key.startswith("U") and len(key) > 1):
+        return keysym
+    try:
+        code_point = int(key[1:], 16)
+    except ValueError:
+        return X.NoSymbol
+
+    # Latin-1 characters have the same keysym values as code points.
+    if 0x20 <= code_point <= 0x7e or 0xa0 <= code_point <= 0xff:
+        return code_point
+    return 0x01000000 | code_point
+
+
+class XlibKeyboard(BaseX11Keyboard):
+    """Static class for typing keys with XTest through python-xlib."""
+
+    _log = logging.getLogger("keyboard")
+    _lock = threading.Lock()
+
+    # Keycodes temporarily bound to keysyms missing from the keyboard
+    #  mapping, stored as {keysym: keycode}.
+    _remapped = {}
+
+    @classmethod
+    def _get_spare_keycode(cls, display):
+        # Find the highest keycode with no keysyms bound to it.
+        min_keycode = display.display.info.min_keycode
+        max_keycode = display.display.info.max_keycode
+        mapping = display.get_keyboard_mapping(min_keycode,
+                                               max_keycode - min_keycode + 1)
+        used = set(cls._remapped.values())
+        for offset in range(len(mapping) - 1, -1, -1):
+            keycode = min_keycode + offset
+            if keycode not in used and not any(mapping[offset]):
+                return keycode, len(mapping[offset])
+        return None, 0
+
+    @classmethod
+    def _get_keycode(cls, display, key, down):
+        # Return the keycode for a key and whether Shift must be held.
+        keysym = _string_to_keysym(key)
+        if not keysym:
+            raise ValueError("Unknown key name: %r" % key)
+
+        # Use a keycode from the current keyboard mapping, if possible.
+        if keysym in cls._remapped:
+            return cls._remapped[keysym], False
+        for keycode, index in display.keysym_to_keycodes(keysym):
+            if index in (0, 1):
+                return keycode, index == 1
+
+        # Otherwise, temporarily bind the keysym to a spare keycode, as
+        #  xdotool does.  The binding is removed when the key is released.
+        if not down:
+            return None, False
+        keycode, width = cls._get_spare_keycode(display)
+        if keycode is None:
+            raise ValueError("No spare keycode for typing key: %r" % key)
+        display.change_keyboard_mapping(keycode, [(keysym,) * width])
+        display.sync()
+        cls._remapped[keysym] = keycode
+        return keycode, False
+
+    @classmethod
+    def _release_remapped(cls, display, key):
+        keysym = _string_to_keysym(key)
+        keycode = cls._remapped.pop(keysym, None)
+        if keycode is not None:
+            # Process the release before removing the temporary binding.
+            display.sync()
+            width = len(display.get_keyboard_mapping(keycode, 1)[0])
+            display.change_keyboard_mapping(keycode,
+                                            [(X.NoSymbol,) * width])
+
+    @classmethod
+    def send_keyboard_events(cls, events):
+        """
+        Send a sequence of keyboard events.
+
+        Positional arguments:
+        events -- a sequence of tuples of the form
+            (keycode, down, timeout), where
+                keycode (str): key symbol.
+                down (boolean): True means the key will be pressed down,
+                    False means the key will be released.
+                timeout (float): number of seconds to sleep after
+                    the keyboard event.
+
+        """
+        cls._log.debug("Keyboard.send_keyboard_events %r", events)
+
+        # Return early if there are no events (e.g. for Key("")).
+        if not events:
+            return
+
+        display = get_display()
+        shift_keycode = display.keysym_to_keycode(XK.XK_Shift_L)
+        with cls._lock:
+            for (key, down, timeout) in events:
+                key = KEY_TRANSLATION.get(key, key)
+
+                # Press/release the key, catching any errors.
+                try:
+                    keycode, shift = cls._get_keycode(display, key, down)
+                    if keycode is None:
+                        continue
+                    if shift and down:
+                        xtest.fake_input(display, X.KeyPress, shift_keycode)
+                    event_type = X.KeyPress if down else X.KeyRelease
+                    xtest.fake_input(display, event_type, keycode)
+                    if shift and down:
+                        xtest.fake_input(display, X.KeyRelease,
+                                         shift_keycode)
+                    if not down:
+                        cls._release_remapped(display, key)
+                except Exception as e:
+                    cls._log.exception("Failed to type key code %s: %s",
+                                       key, e)
+
+                # Sleep after the keyboard event if necessary.
+                if timeout:
+                    display.sync()
+                    time.sleep(timeout)
+            display.sync()
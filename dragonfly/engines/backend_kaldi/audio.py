@@ -23,10 +23,10 @@ Audio input/output classes for Kaldi backend
 """
 
 from __future__ import division, print_function
-import collections, contextlib, datetime, itertools, logging, os, time, threading, wave
+import collections, contextlib, datetime, logging, mmap, os, struct, time, threading, wave
 from io import open
 
-from six import PY2, binary_type, text_type, print_
+from six import binary_type, text_type, print_
 from six.moves import queue, range
 import sounddevice
 import webrtcvad
@@ -36,8 +36,116 @@ from dragonfly.engines.base import EngineError
 _log = logging.getLogger("engine")
 
 
+class AudioRingBuffer(object):
+    """
+    Preallocated single-producer/single-consumer ring buffer of fixed-size audio frames.
+
+    The producer (e.g. the audio callback) copies each frame into the next free slot with `write()`, without allocating
+    or taking a lock, unless the consumer is waiting for a frame, in which case it is woken. Frames written while the
+    buffer is full are dropped and counted in `num_overflowed`. The consumer gets each frame from `read()` as a
+    *memoryview* of its slot, which remains valid for the next *hold* reads.
+
+    Constructor arguments:
+    - *frame_size* (*int*): the size of each frame in bytes.
+    - *capacity* (*int*): the number of frames the buffer can hold, including the *hold* frames.
+    - *hold* (*int*, default *0*): the number of previously read frames whose slots are not reused yet.
+    """
+
+    def __init__(self, frame_size, capacity, hold=0):
+        if capacity <= hold:
+            raise ValueError("AudioRingBuffer capacity must be greater than hold")
+        self.frame_size = frame_size
+        self.capacity = capacity
+        self.hold = hold
+        self.num_overflowed = 0
+        self.closed = False
+        self._view = memoryview(bytearray(frame_size * capacity))
+        # Counts of frames since creation; only the producer changes _num_written, and only the consumer the others
+        self._num_written = 0
+        self._num_read = 0
+        self._num_released = 0
+        self._overflowing = False
+        self._consumer_waiting = False
+        self._woken = False
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        """ Returns the number of frames available to read. """
+        return self._num_written - self._num_read
+
+    def write(self, data):
+        """ Copies a frame into the buffer, returning ``False`` if it was dropped because the buffer is full. """
+        if len(data) != self.frame_size:
+            raise ValueError("Invalid audio frame size %d, not %d" % (len(data), self.frame_size))
+        if self._num_written - self._num_released >= self.capacity:
+            self.num_overflowed += 1
+            if not self._overflowing:
+                self._overflowing = True
+                _log.warning("audio buffer overflow; dropping audio blocks")
+            return False
+        self._overflowing = False
+
+        offset = (self._num_written % self.capacity) * self.frame_size
+        self._view[offset:offset + self.frame_size] = data
+        self._num_written += 1  # Publish the frame to the consumer
+        if self._consumer_waiting:
+            with self._condition:
+                self._condition.notify()
+        return True
+
+    def _wait(self, timeout, wakeable):
+        with self._condition:
+            # Announce waiting before checking again, so that the producer cannot miss notifying
+            self._consumer_waiting = True
+            try:
+                self._condition.wait_for(lambda: (self._num_written != self._num_read or self.closed
+                    or (wakeable and self._woken)), timeout)
+            finally:
+                self._consumer_waiting = False
+                if wakeable:
+                    self._woken = False
+
+    def wait(self, timeout=None):
+        """ Waits at most *timeout* seconds (forever if ``None``) until a frame is available to read, the buffer is
+            closed, or `wake()` is called. Returns whether a frame is available. """
+        if self._num_written == self._num_read and not self.closed:
+            self._wait(timeout, True)
+        return self._num_written != self._num_read
+
+    def wake(self):
+        """ Wakes the consumer from `wait()`, or makes its next call return immediately. """
+        with self._condition:
+            self._woken = True
+            self._condition.notify_all()
+
+    def read(self, timeout=None):
+        """ Returns the next frame as a *memoryview*, waiting at most *timeout* seconds (forever if ``None``) for one.
+            Returns ``False`` if no frame is available in time, or ``None`` if the buffer is closed and empty. """
+        if self._num_written == self._num_read:
+            if timeout != 0 and not self.closed:
+                self._wait(timeout, False)
+            if self._num_written == self._num_read:
+                return None if self.closed else False
+
+        offset = (self._num_read % self.capacity) * self.frame_size
+        self._num_read += 1
+        self._num_released = max(self._num_released, self._num_read - 1 - self.hold)
+        return self._view[offset:offset + self.frame_size]
+
+    def close(self):
+        """ Marks the end of the audio, waking the consumer. Unread frames can still be read. """
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
 class MicAudio(object):
-    """Streams raw audio from microphone. Data is received in a separate thread, and stored in a buffer, to be read from."""
+    """Streams raw audio from microphone. Data is received in a separate thread, and stored in a ring buffer, to be
+        read from as *memoryview* blocks, each valid until at least `ring_buffer.hold` more blocks have been read.
+        If *input_device* is ``False``, no audio device is opened, e.g. for processing audio from files, or for feeding
+        blocks from another source to `callback`.
+        The ring buffer holds *buffer_s* seconds of audio (by default 60); blocks received while it is full are
+        dropped and counted in `num_overflowed`."""
 
     FORMAT = 'int16'
     SAMPLE_WIDTH = 2
@@ -47,8 +155,14 @@ class MicAudio(object):
     BLOCK_SIZE_SAMPLES = int(SAMPLE_RATE / float(BLOCKS_PER_SECOND))  # Block size in number of samples
     BLOCK_DURATION_MS = int(1000 * BLOCK_SIZE_SAMPLES // SAMPLE_RATE)  # Block duration in milliseconds
 
+    DEFAULT_BUFFER_S = 60
+    DEFAULT_HOLD_BLOCKS = 1
+
     def __init__(self, callback=None, buffer_s=0, flush_queue=True, start=True, input_device=None, self_threaded=None, reconnect_callback=None):
-        self.callback = callback if callback is not None else lambda in_data: self.buffer_queue.put(in_data, block=False)
+        self.ring_buffer = AudioRingBuffer(self.BLOCK_SIZE_SAMPLES * self.SAMPLE_WIDTH,
+            max(self.DEFAULT_HOLD_BLOCKS + 1, int((buffer_s or self.DEFAULT_BUFFER_S) * self.BLOCKS_PER_SECOND)),
+            hold=self.DEFAULT_HOLD_BLOCKS)
+        self.callback = callback if callback is not None else self.ring_buffer.write
         self.flush_queue = bool(flush_queue)
         self.input_device = input_device
         self.self_threaded = bool(self_threaded)
@@ -57,12 +171,14 @@ class MicAudio(object):
             reconnect_callback = None
         self.reconnect_callback = reconnect_callback
 
-        self.buffer_queue = queue.Queue(maxsize=(buffer_s * 1000 // self.BLOCK_DURATION_MS))
         self.stream = None
         self.thread = None
         self.thread_cancelled = False
         self.device_info = None
 
+        if self.input_device is False:
+            return
+
         try:
             device_list = sounddevice.query_devices(device=self.input_device)
             if not device_list:
@@ -74,10 +190,18 @@ class MicAudio(object):
 
         self._connect(start=start)
 
+    num_overflowed = property(lambda self: self.ring_buffer.num_overflowed,
+        doc="Number of blocks dropped because the ring buffer was full.")
+
     def _connect(self, start=None):
         callback = self.callback
+        if callback == self.ring_buffer.write:
+            # The ring buffer copies the data from the temporary C buffer into a preallocated slot.
+            copy_callback = callback
+        else:
+            copy_callback = lambda in_data: callback(bytes(in_data))  # Must copy data from temporary C buffer!
         def proxy_callback(in_data, frame_count, time_info, status):
-            callback(bytes(in_data))  # Must copy data from temporary C buffer!
+            copy_callback(in_data)
 
         self.stream = sounddevice.RawInputStream(
             samplerate=self.SAMPLE_RATE,
@@ -91,7 +215,7 @@ class MicAudio(object):
 
         if self.self_threaded:
             self.thread_cancelled = False
-            self.thread = threading.Thread(target=self._reader_thread, args=(callback,))
+            self.thread = threading.Thread(target=self._reader_thread, args=(copy_callback,))
             self.thread.daemon = True
             self.thread.start()
 
@@ -106,15 +230,20 @@ class MicAudio(object):
 
     def _reader_thread(self, callback):
         while not self.thread_cancelled and self.stream and not self.stream.closed:
-            if self.stream.active and self.stream.read_available >= self.stream.blocksize:
+            if not self.stream.active:
+                time.sleep(self.BLOCK_DURATION_MS / 1000.0)
+                continue
+            read_available = self.stream.read_available
+            if read_available >= self.stream.blocksize:
                 in_data, overflowed = self.stream.read(self.stream.blocksize)
                 # print('_reader_thread', read_available, len(in_data), overflowed, self.stream.blocksize)
                 if overflowed:
                     _log.warning("audio stream overflow")
-                callback(bytes(in_data))  # Must copy data from temporary C buffer!
+                callback(in_data)
             else:
-                time.sleep(0.001)
-                
+                # Sleep until the rest of the block should have arrived, rather than polling
+                time.sleep(float(self.stream.blocksize - read_available) / self.SAMPLE_RATE)
+
     def _cancel_reader_thread(self):
         self.thread_cancelled = True
         if self.thread:
@@ -126,6 +255,7 @@ class MicAudio(object):
         if self.stream:
             self.stream.close()
             self.stream = None
+        self.ring_buffer.close()
 
     def reconnect(self):
         # FIXME: flapping
@@ -139,23 +269,28 @@ class MicAudio(object):
             raise EngineError("Audio reconnect could not reconnect to the same device")
 
     def start(self):
-        self.stream.start()
+        if self.stream:
+            self.stream.start()
 
     def stop(self):
-        self.stream.stop()
+        if self.stream:
+            self.stream.stop()
+
+    def wait(self, timeout=None):
+        """Wait at most *timeout* seconds (forever if ``None``) until a block is available to read, or until `wake()` is
+            called. Returns whether a block is available."""
+        return self.ring_buffer.wait(timeout)
+
+    def wake(self):
+        """Wake a thread waiting in `wait()`."""
+        self.ring_buffer.wake()
 
     def read(self, nowait=False):
-        """Return a block of audio data. If nowait==False, waits for a block if necessary; else, returns False immediately if no block is available."""
-        if self.stream or (self.flush_queue and not self.buffer_queue.empty()):
-            if nowait:
-                try:
-                    return self.buffer_queue.get_nowait()  # Return good block if available
-                except queue.Empty as e:
-                    return False  # Queue is empty for now
-            else:
-                return self.buffer_queue.get()  # Wait for a good block and return it
-        else:
+        """Return a block of audio data. If nowait==False, waits for a block if necessary; else, returns False immediately if no block is available.
+            Returns None after `destroy()` (once any remaining blocks have been read, if flush_queue)."""
+        if self.ring_buffer.closed and not (self.flush_queue and len(self.ring_buffer)):
             return None  # We are done
+        return self.ring_buffer.read(timeout=(0 if nowait else None))
 
     def read_loop(self, callback):
         """Block looping reading, repeatedly passing a block of audio data to callback."""
@@ -221,6 +356,29 @@ class MicAudio(object):
         print_("")
 
 
+class _VoicedWindow(object):
+    """Sliding window over the speech flags of the most recent audio blocks, with a running count of voiced blocks."""
+
+    __slots__ = ('flags', 'num_voiced')
+
+    def __init__(self, size):
+        self.flags = collections.deque(maxlen=size)
+        self.num_voiced = 0
+
+    num_unvoiced = property(lambda self: len(self.flags) - self.num_voiced)
+
+    def append(self, is_speech):
+        flags = self.flags
+        if len(flags) == flags.maxlen:
+            self.num_voiced -= flags[0]  # Oldest flag is about to leave the window
+        flags.append(is_speech)
+        self.num_voiced += is_speech
+
+    def clear(self):
+        self.flags.clear()
+        self.num_voiced = 0
+
+
 class VADAudio(MicAudio):
     """Filter & segment audio with voice activity detection."""
 
@@ -242,25 +400,33 @@ class VADAudio(MicAudio):
         num_start_padding_blocks = max(0, int((start_padding_ms or 0) // self.BLOCK_DURATION_MS))
         num_end_window_blocks = max(1, int(end_window_ms // self.BLOCK_DURATION_MS))
         num_complex_end_window_blocks = max(1, int((complex_end_window_ms or end_window_ms) // self.BLOCK_DURATION_MS))
-        num_end_padding_blocks = max(0, int((end_padding_ms or 0) // self.BLOCK_DURATION_MS))
         _log.debug("%s: vad_collector: num_start_window_blocks=%s num_end_window_blocks=%s num_complex_end_window_blocks=%s",
             self, num_start_window_blocks, num_end_window_blocks, num_complex_end_window_blocks)
         audio_reconnect_threshold_blocks = 5
         audio_reconnect_threshold_time = 50 * self.BLOCK_DURATION_MS / 1000
 
-        ring_buffer = collections.deque(maxlen=max(
-            (num_start_window_blocks + num_start_padding_blocks),
-            (num_end_window_blocks + num_end_padding_blocks),
-            (num_complex_end_window_blocks + num_end_padding_blocks),
-        ))
-        ring_buffer_recent_slice = lambda num_blocks: itertools.islice(ring_buffer, max(0, (len(ring_buffer) - num_blocks)), None)
+        # Blocks preceding the start of a phrase, yielded upon triggering. Voice activity is counted incrementally over
+        #  the windows of most recent blocks' speech flags, rather than by rescanning the blocks for every new one.
+        ring_buffer = collections.deque(maxlen=(num_start_window_blocks + num_start_padding_blocks))
+        start_window = _VoicedWindow(num_start_window_blocks)
+        end_window = _VoicedWindow(num_end_window_blocks)
+        complex_end_window = _VoicedWindow(num_complex_end_window_blocks)
+        start_threshold = num_start_window_blocks * ratio
+        end_threshold = num_end_window_blocks * ratio
+        complex_end_threshold = num_complex_end_window_blocks * ratio
 
         triggered = False
         in_complex_phrase = False
         num_empty_blocks = 0
         last_good_block_time = time.time()
 
-        if blocks is None: blocks = self.iter(nowait=nowait)
+        if blocks is None:
+            # Blocks read from the ring buffer are memoryviews, so keep those in ring_buffer from being overwritten
+            if ring_buffer.maxlen >= self.ring_buffer.capacity:
+                raise ValueError("Audio buffer is too small for %d ms of VAD start window and padding"
+                    % (ring_buffer.maxlen * self.BLOCK_DURATION_MS))
+            self.ring_buffer.hold = max(self.ring_buffer.hold, ring_buffer.maxlen)
+            blocks = self.iter(nowait=nowait)
         for block in blocks:
             if block is False or block is None:
                 # Bad/empty block
@@ -280,38 +446,105 @@ class VADAudio(MicAudio):
 
                 if not triggered:
                     # Between phrases
-                    ring_buffer.append((block, is_speech))
-                    num_voiced = len([1 for (_, speech) in ring_buffer_recent_slice(num_start_window_blocks) if speech])
-                    if num_voiced >= (num_start_window_blocks * ratio):
+                    ring_buffer.append(block)
+                    start_window.append(is_speech)
+                    if start_window.num_voiced >= start_threshold:
                         # Start of phrase
                         triggered = True
-                        for block, _ in ring_buffer_recent_slice(num_start_padding_blocks + num_start_window_blocks):
+                        for block in ring_buffer:
                             # print('|' if is_speech else '.', end='')
                             # print('|' if in_complex_phrase else '.', end='')
                             in_complex_phrase = yield block
                         # print('#', end='')
                         ring_buffer.clear()
+                        start_window.clear()
 
                 else:
                     # Ongoing phrase
                     in_complex_phrase = yield block
                     # print('|' if is_speech else '.', end='')
                     # print('|' if in_complex_phrase else '.', end='')
-                    ring_buffer.append((block, is_speech))
-                    num_unvoiced = len([1 for (_, speech) in ring_buffer_recent_slice(num_end_window_blocks) if not speech])
-                    num_complex_unvoiced = len([1 for (_, speech) in ring_buffer_recent_slice(num_complex_end_window_blocks) if not speech])
-                    if (not in_complex_phrase and num_unvoiced >= (num_end_window_blocks * ratio)) or \
-                        (in_complex_phrase and num_complex_unvoiced >= (num_complex_end_window_blocks * ratio)):
+                    end_window.append(is_speech)
+                    complex_end_window.append(is_speech)
+                    if (not in_complex_phrase and end_window.num_unvoiced >= end_threshold) or \
+                        (in_complex_phrase and complex_end_window.num_unvoiced >= complex_end_threshold):
                         # End of phrase
                         triggered = False
                         in_complex_phrase = yield None
                         # print('*')
-                        ring_buffer.clear()
+                        end_window.clear()
+                        complex_end_window.clear()
 
         if triggered:
             # We were in a phrase, so we must terminate it (this may be abrupt!)
             yield None
 
+    def segment_buffer(self, data, start_window_ms=150, start_padding_ms=100, end_window_ms=150, ratio=0.8):
+        """Segments a whole buffer of audio into phrases at once, for offline processing. Uses the same windows as
+            `vad_collector()`, and returns the same phrases as it would without complex phrases, as a list of
+            ``(start_block, end_block)`` index ranges (exclusive of `end_block`) of BLOCK_SIZE_SAMPLES-sample blocks.
+            A trailing partial block is ignored. Requires numpy.
+        """
+        import numpy as np  # Only required for offline segmentation
+        block_bytes = self.BLOCK_SIZE_SAMPLES * self.SAMPLE_WIDTH
+        data = memoryview(data)
+        num_blocks = len(data) // block_bytes
+        num_start_window_blocks = max(1, int(start_window_ms // self.BLOCK_DURATION_MS))
+        num_start_padding_blocks = max(0, int((start_padding_ms or 0) // self.BLOCK_DURATION_MS))
+        num_end_window_blocks = max(1, int(end_window_ms // self.BLOCK_DURATION_MS))
+
+        # Compute the speech flags of all blocks, then count voiced blocks over any range with prefix sums
+        is_speech, sample_rate = self.vad.is_speech, self.SAMPLE_RATE
+        flags = np.fromiter((is_speech(data[offset:offset + block_bytes], sample_rate)
+            for offset in range(0, num_blocks * block_bytes, block_bytes)), dtype=np.int64, count=num_blocks)
+        num_voiced_before = np.zeros(num_blocks + 1, dtype=np.int64)
+        np.cumsum(flags, out=num_voiced_before[1:])
+
+        def find_full_window_ends(num_window_blocks, threshold, voiced):
+            # Find all blocks at which the full window of blocks ending there counts at least `threshold` (un)voiced
+            #  blocks, as a sorted array.
+            if num_window_blocks > num_blocks:
+                return np.zeros(0, dtype=np.int64)
+            counts = num_voiced_before[num_window_blocks:] - num_voiced_before[:num_blocks + 1 - num_window_blocks]
+            if not voiced:
+                counts = num_window_blocks - counts
+            return np.flatnonzero(counts >= threshold) + (num_window_blocks - 1)
+
+        def find_window_end(since, num_window_blocks, threshold, voiced, full_window_ends):
+            # Find the first block from `since` at which the window of blocks ending there, excluding any blocks
+            #  before `since` (as the collector clears its windows), counts at least `threshold` (un)voiced blocks.
+            #  Only windows ending within num_window_blocks - 1 blocks of `since` are partial.
+            first_full_end = min(since + num_window_blocks - 1, num_blocks)
+            ends = np.arange(since, first_full_end) + 1
+            counts = num_voiced_before[ends] - num_voiced_before[since]
+            if not voiced:
+                counts = (ends - since) - counts
+            matches = np.flatnonzero(counts >= threshold)
+            if len(matches):
+                return since + int(matches[0])
+            index = np.searchsorted(full_window_ends, first_full_end)
+            return int(full_window_ends[index]) if index < len(full_window_ends) else None
+
+        start_threshold = num_start_window_blocks * ratio
+        end_threshold = num_end_window_blocks * ratio
+        full_start_window_ends = find_full_window_ends(num_start_window_blocks, start_threshold, True)
+        full_end_window_ends = find_full_window_ends(num_end_window_blocks, end_threshold, False)
+
+        segments = []
+        since = 0
+        while since < num_blocks:
+            trigger_block = find_window_end(since, num_start_window_blocks, start_threshold, True, full_start_window_ends)
+            if trigger_block is None:
+                break
+            start_block = max(since, trigger_block + 1 - (num_start_window_blocks + num_start_padding_blocks))
+            end_block = find_window_end(trigger_block + 1, num_end_window_blocks, end_threshold, False, full_end_window_ends)
+            if end_block is None:
+                segments.append((start_block, num_blocks))
+                break
+            segments.append((start_block, end_block + 1))
+            since = end_block + 1
+        return segments
+
     def debug_print_simple(self):
         print("block_duration_ms=%s" % self.BLOCK_DURATION_MS)
         for block in self.iter(nowait=False):
@@ -325,6 +558,77 @@ class VADAudio(MicAudio):
             block = audio_iter.send(False)
 
 
+class AsyncAudioIterator(object):
+    """
+    Adapter for awaiting audio blocks from a blocking audio iterator, such as the generator returned by
+    `VADAudio.vad_collector()`, from an asyncio event loop.
+
+    `send()` returns an awaitable for the next item that is not ``False`` (no block available yet), so blocks (and the
+    ``None`` phrase separators) can be awaited without blocking the loop. Waiting is done in a single worker thread, so
+    the wrapped iterator is never accessed concurrently. The adapter can also be used with ``async for``.
+
+    Constructor arguments:
+    - *audio_iter* (*generator*): the audio iterator to wrap, which must not have been primed yet.
+    - *loop* (*AbstractEventLoop*, default *None*): the event loop to use; defaults to the current event loop.
+    - *poll_interval* (*float*, default *0.001*): seconds to sleep in the worker thread when no block is available.
+    """
+
+    _stopped = object()
+
+    def __init__(self, audio_iter, loop=None, poll_interval=0.001):
+        import asyncio, concurrent.futures  # Python 3 only
+        self.audio_iter = audio_iter
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self.poll_interval = poll_interval
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._primed = False
+
+    def _send(self, in_complex):
+        try:
+            if not self._primed:
+                next(self.audio_iter)  # Prime the audio iterator
+                self._primed = True
+            while True:
+                block = self.audio_iter.send(in_complex)
+                if block is not False:
+                    return block
+                time.sleep(self.poll_interval)
+        except StopIteration:
+            # StopIteration cannot be set on an asyncio future, so return a sentinel instead.
+            return self._stopped
+
+    def _wrap(self, in_complex, stop_exception):
+        result_future = self.loop.create_future()
+        def on_done(future):
+            if result_future.cancelled():
+                return
+            exception = future.exception()
+            if exception is not None:
+                result_future.set_exception(exception)
+            elif future.result() is self._stopped:
+                result_future.set_exception(stop_exception())
+            else:
+                result_future.set_result(future.result())
+        future = self.loop.run_in_executor(self._executor, self._send, in_complex)
+        future.add_done_callback(on_done)
+        return result_future
+
+    def send(self, in_complex=False):
+        """Return an awaitable for the next audio block, or ``None`` at the end of a phrase. Raises `EOFError` when the audio iterator is exhausted."""
+        return self._wrap(in_complex, EOFError)
+
+    def close(self):
+        """Close the wrapped audio iterator and shut down the worker thread."""
+        self._executor.submit(self.audio_iter.close)
+        self._executor.shutdown(wait=False)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return self._wrap(False, StopAsyncIteration)
+
+
 class AudioStore(object):
     """
     Stores the current audio data being recognized, which is cleared upon calling `finalize()`.
@@ -332,6 +636,9 @@ class AudioStore(object):
     indexed in reverse order (0 is most recent), and advanced upon calling `finalize()`.
     Note: `finalize()` should be called after the recognition has been parsed and its actions executed.
 
+    Saved recognitions are written to disk by a background writer thread, so saving never blocks recognition. Call
+    `flush()` to wait for queued writes to complete, and `close()` to also stop the writer thread.
+
     Constructor arguments:
     - *maxlen* (*int*, default *None*): if set, the number of previous recognitions to temporarily store.
     - *save_dir* (*str*, default *None*): if set, the directory to save the `retain.tsv` file and optionally wav files.
@@ -339,9 +646,12 @@ class AudioStore(object):
     - *save_audio* (*bool*, default *None*): whether to automatically save the recognition audio data (in addition to just the recognition metadata).
     - *retain_approval_func* (*Callable*, default *None*): if set, will be called with the `AudioStoreEntry` object about to be saved,
         and should return `bool` whether to actually save. Example: `retain_approval_func=lambda entry: bool(entry.grammar_name != 'noisegrammar')`
+    - *max_queued_writes* (*int*, default *100*): the number of saved recognitions that may wait to be written; further
+        recognitions are not retained (with a warning) until the writer catches up.
     """
 
-    def __init__(self, audio_obj, maxlen=None, save_dir=None, save_audio=None, save_metadata=None, retain_approval_func=None):
+    def __init__(self, audio_obj, maxlen=None, save_dir=None, save_audio=None, save_metadata=None, retain_approval_func=None,
+            max_queued_writes=100):
         self.audio_obj = audio_obj
         self.maxlen = maxlen
         self.save_dir = save_dir
@@ -351,13 +661,30 @@ class AudioStore(object):
             _log.info("retaining recognition audio and/or metadata to '%s'", self.save_dir)
         self.retain_approval_func = retain_approval_func
         self.deque = collections.deque(maxlen=maxlen) if maxlen else None
-        self.blocks = []
-
-    current_audio_data = property(lambda self: b''.join(bytes(self.blocks)) if PY2 else b''.join(self.blocks))
-    current_audio_length_ms = property(lambda self: len(self.blocks) * self.audio_obj.BLOCK_DURATION_MS)
+        self.buffer = bytearray()
+        self._current_audio_data = None  # Cached copy of buffer as bytes
+        self._write_queue = queue.Queue(maxsize=max_queued_writes)
+        self._writer_thread = None
+
+    @property
+    def current_audio_data(self):
+        """ The current audio data as *bytes*, which is only copied from the buffer once per added block. """
+        if self._current_audio_data is None:
+            self._current_audio_data = bytes(self.buffer)
+        return self._current_audio_data
+
+    current_audio_view = property(lambda self: memoryview(self.buffer),
+        doc="The current audio data as a *memoryview* of the buffer, for slicing without copying.")
+    current_audio_length_ms = property(lambda self:
+        len(self.buffer) * 1000 // (self.audio_obj.SAMPLE_RATE * self.audio_obj.SAMPLE_WIDTH))
 
     def add_block(self, block):
-        self.blocks.append(block)
+        try:
+            self.buffer += block
+        except BufferError:
+            # A memoryview of the buffer still exists, so it cannot be resized; continue in a copy
+            self.buffer = self.buffer + block
+        self._current_audio_data = None
 
     def finalize(self, text, grammar_name, rule_name, likelihood=None, tag='', has_dictation=None):
         """ Finalizes current utterance, creating its AudioStoreEntry and saving it (if enabled). """
@@ -366,20 +693,19 @@ class AudioStore(object):
             if len(self.deque) == self.deque.maxlen:
                 self.save(-1)  # Save oldest, which is about to be evicted
             self.deque.appendleft(entry)
-        self.blocks = []
+        self.cancel()
 
     def cancel(self):
-        self.blocks = []
+        # Start a new buffer, rather than clearing it, in case memoryviews of it still exist
+        self.buffer = bytearray()
+        self._current_audio_data = None
 
     def save(self, index):
-        """ Saves AudioStoreEntry for given index (0 is most recent). """
+        """ Saves AudioStoreEntry for given index (0 is most recent), by queueing it to be written in the background. """
         if slice(index).indices(len(self.deque))[1] >= len(self.deque):
             raise EngineError("Invalid index to save in AudioStore")
         if not self.save_dir:
             return
-        if not os.path.isdir(self.save_dir):
-            _log.warning("Recognition data was not retained because '%s' was not a directory" % self.save_dir)
-            return
 
         entry = self.deque[index]
         if (not self.save_audio) and (not self.save_metadata) and (not entry.force_save):
@@ -388,21 +714,20 @@ class AudioStore(object):
             return
         if self.save_audio or entry.force_save:
             filename = os.path.join(self.save_dir, "retain_%s.wav" % datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f"))
-            self.audio_obj.write_wav(filename, entry.audio_data)
         else:
             filename = ''
 
-        with open(os.path.join(self.save_dir, "retain.tsv"), 'a', encoding='utf-8') as tsv_file:
-            tsv_file.write(u'\t'.join([
-                    filename,
-                    text_type(self.audio_obj.get_wav_length_s(entry.audio_data)),
-                    entry.grammar_name,
-                    entry.rule_name,
-                    entry.text,
-                    text_type(entry.likelihood),
-                    text_type(entry.tag),
-                    text_type(entry.has_dictation),
-                ]) + '\n')
+        row = u'\t'.join([
+                filename,
+                text_type(self.audio_obj.get_wav_length_s(entry.audio_data)),
+                entry.grammar_name,
+                entry.rule_name,
+                entry.text,
+                text_type(entry.likelihood),
+                text_type(entry.tag),
+                text_type(entry.has_dictation),
+            ]) + '\n'
+        self._queue_write((filename, entry.audio_data, row))
 
     def save_all(self, remove=True):
         if self.deque:
@@ -411,6 +736,59 @@ class AudioStore(object):
             if remove:
                 self.deque.clear()
 
+    def flush(self):
+        """ Waits until all saved recognitions have been written. """
+        if self._writer_thread is not None:
+            self._write_queue.join()
+
+    def close(self):
+        """ Writes all saved recognitions, then stops the writer thread. """
+        thread, self._writer_thread = self._writer_thread, None
+        if thread is not None:
+            self._write_queue.put(None)
+            thread.join()
+
+    def _queue_write(self, item):
+        if self._writer_thread is None:
+            self._writer_thread = threading.Thread(target=self._write_loop, name="AudioStoreWriter")
+            self._writer_thread.daemon = True
+            self._writer_thread.start()
+        try:
+            self._write_queue.put_nowait(item)
+        except queue.Full:
+            _log.warning("Recognition data was not retained because too many writes are queued")
+
+    def _write_loop(self):
+        while True:
+            # Write everything that is queued in one batch, appending to the TSV file once
+            items = [self._write_queue.get()]
+            while True:
+                try:
+                    items.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write([item for item in items if item is not None])
+            except Exception:
+                _log.exception("Error writing retained recognition data")
+            finally:
+                for _ in items:
+                    self._write_queue.task_done()
+            if None in items:
+                return
+
+    def _write(self, items):
+        if not items:
+            return
+        if not os.path.isdir(self.save_dir):
+            _log.warning("Recognition data was not retained because '%s' was not a directory" % self.save_dir)
+            return
+        for filename, audio_data, _ in items:
+            if filename:
+                self.audio_obj.write_wav(filename, audio_data)
+        with open(os.path.join(self.save_dir, "retain.tsv"), 'a', encoding='utf-8') as tsv_file:
+            tsv_file.write(u''.join(row for _, _, row in items))
+
     def __getitem__(self, key):
         return self.deque[key]
     def __len__(self):
@@ -441,6 +819,19 @@ class AudioStoreEntry(object):
 class WavAudio(object):
     """ Class for mimicking normal microphone input, but from wav files. """
 
+    @staticmethod
+    def _check_file(file, filename):
+        """ Validates the header of an open wave file. """
+        if file.getnchannels() != MicAudio.CHANNELS:
+            raise ValueError("WAV file '%s' should use %d channel(s), not %d!"
+                       % (filename, MicAudio.CHANNELS, file.getnchannels()))
+        elif file.getsampwidth() != MicAudio.SAMPLE_WIDTH:
+            raise ValueError("WAV file '%s' should use sample width %d, not "
+                       "%d!" % (filename, MicAudio.SAMPLE_WIDTH, file.getsampwidth()))
+        elif file.getframerate() != MicAudio.SAMPLE_RATE:
+            raise ValueError("WAV file '%s' should use sample rate %d, not "
+                       "%d!" % (filename, MicAudio.SAMPLE_RATE, file.getframerate()))
+
     @classmethod
     def read_file(cls, filename, realtime=False):
         """ Yields raw audio blocks from wav file, terminated by a None element. """
@@ -449,15 +840,7 @@ class WavAudio(object):
 
         with contextlib.closing(wave.open(filename, 'rb')) as file:
             # Validate the wave file's header
-            if file.getnchannels() != MicAudio.CHANNELS:
-                raise ValueError("WAV file '%s' should use %d channel(s), not %d!"
-                           % (filename, MicAudio.CHANNELS, file.getnchannels()))
-            elif file.getsampwidth() != MicAudio.SAMPLE_WIDTH:
-                raise ValueError("WAV file '%s' should use sample width %d, not "
-                           "%d!" % (filename, MicAudio.SAMPLE_WIDTH, file.getsampwidth()))
-            elif file.getframerate() != MicAudio.SAMPLE_RATE:
-                raise ValueError("WAV file '%s' should use sample rate %d, not "
-                           "%d!" % (filename, MicAudio.SAMPLE_RATE, file.getframerate()))
+            cls._check_file(file, filename)
 
             next_time = time.time()
             for _ in range(0, int(file.getnframes() / MicAudio.BLOCK_SIZE_SAMPLES) + 1):
@@ -475,6 +858,55 @@ class WavAudio(object):
     @classmethod
     def read_file_with_vad(cls, filename, realtime=False, **kwargs):
         """ Yields raw audio blocks from wav file, after processing by VAD, terminated by a None element. """
-        vad_audio = VADAudio()
+        vad_audio = VADAudio(input_device=False)
         vad_audio_iter = vad_audio.vad_collector(blocks=cls.read_file(filename, realtime=realtime), **kwargs)
         return vad_audio_iter
+
+    @classmethod
+    def map_file(cls, filename):
+        """ Returns the audio data of a wav file as a read-only memoryview of the memory-mapped file. """
+        with contextlib.closing(wave.open(filename, 'rb')) as file:
+            cls._check_file(file, filename)
+            num_bytes = file.getnframes() * MicAudio.SAMPLE_WIDTH
+
+        # Find the offset of the data chunk, after the RIFF header and any preceding chunks
+        with open(filename, 'rb') as file:
+            file.seek(12)
+            while True:
+                header = file.read(8)
+                if len(header) < 8:
+                    raise ValueError("WAV file '%s' has no data chunk!" % filename)
+                chunk_id, chunk_size = struct.unpack('<4sI', header)
+                if chunk_id == b'data':
+                    offset = file.tell()
+                    break
+                file.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+            if not num_bytes:
+                return memoryview(b'')
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(data)[offset:offset + num_bytes]
+
+    @classmethod
+    def segment_file(cls, filename, aggressiveness=3, **kwargs):
+        """
+        Segments a wav file into phrases with VAD all at once, for offline processing. Accepts the same window arguments
+        as `VADAudio.segment_buffer()`. Returns a list of memoryviews of the phrases' audio data in the memory-mapped file.
+        """
+        data = cls.map_file(filename)
+        vad_audio = VADAudio(aggressiveness=aggressiveness, input_device=False)
+        block_bytes = MicAudio.BLOCK_SIZE_SAMPLES * MicAudio.SAMPLE_WIDTH
+        return [data[start_block * block_bytes:end_block * block_bytes]
+            for start_block, end_block in vad_audio.segment_buffer(data, **kwargs)]
+
+    @classmethod
+    def read_file_with_offline_vad(cls, filename, **kwargs):
+        """
+        Yields raw audio blocks from wav file, after segmenting the whole file with VAD at once, with each phrase
+        terminated by a None element, like `read_file_with_vad()`. Blocks are memoryviews of the memory-mapped file.
+        Unlike `read_file_with_vad()`, complex phrases are not given longer end windows.
+        """
+        block_bytes = MicAudio.BLOCK_SIZE_SAMPLES * MicAudio.SAMPLE_WIDTH
+        for phrase in cls.segment_file(filename, **kwargs):
+            for offset in range(0, len(phrase), block_bytes):
+                yield phrase[offset:offset + block_bytes]
+            yield None
@@ -62,6 +62,114 @@ InternalRule = collections.namedtuple('InternalRule', 'name gstring')
 MockLiteral = collections.namedtuple('MockLiteral', 'words')
 
 
+class _FstTemplate(object):
+    """
+    States and arcs of a compiled referenced rule or list, recorded so that
+    further references can splice copies into FSTs without compiling the
+    rule's elements or the list's items again.
+    """
+
+    def __init__(self, key=None):
+        self.key = key  # For lists: the compiled form of the items (see _get_list_items_key())
+        self.state_kwargs = []  # List[dict] of add_state() keyword arguments
+        self.states = {}  # FST state -> template state
+        self.arcs = []  # List[(src, dst, args, kwargs)] of template states
+        self.src_state = None
+        self.dst_state = None
+        self.has_dictation = False
+        self.lists = []  # Lists referenced by the rule or its sub-rules
+        self.valid = True
+
+    def add_list(self, lst):
+        if not self.references_list(lst):
+            self.lists.append(lst)
+
+    def references_list(self, lst):
+        return any(template_lst is lst for template_lst in self.lists)
+
+    def splice(self, fst):
+        """ Add a copy of the template to the FST and return its (src_state, dst_state). """
+        states = [fst.add_state(**kwargs) for kwargs in self.state_kwargs]
+        for src_state, dst_state, args, kwargs in self.arcs:
+            fst.add_arc(states[src_state], states[dst_state], *args, **kwargs)
+        return (states[self.src_state], states[self.dst_state])
+
+
+class _RecordingFst(object):
+    """ Proxy for an FST, which records the states and arcs added through it in a _FstTemplate. """
+
+    def __init__(self, fst, template):
+        self._fst = fst
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._fst, name)
+
+    def add_state(self, **kwargs):
+        state = self._fst.add_state(**kwargs)
+        template = self._template
+        template.states[state] = len(template.state_kwargs)
+        template.state_kwargs.append(kwargs)
+        return state
+
+    def add_arc(self, src_state, dst_state, *args, **kwargs):
+        self._fst.add_arc(src_state, dst_state, *args, **kwargs)
+        template = self._template
+        try:
+            template.arcs.append((template.states[src_state], template.states[dst_state], args, kwargs))
+        except KeyError:
+            # Arc leaves the rule's sub-graph, so it cannot be replayed
+            template.valid = False
+
+
+class _FirstWordsFst(object):
+    """ Proxy for a KaldiRule's FST, which records its arcs in order to find the words that can begin a match. """
+
+    def __init__(self, fst):
+        self._fst = fst
+        self._initial_states = []
+        self._final_states = set()
+        self._arcs = collections.defaultdict(list)  # src_state -> List[(dst_state, label)]
+
+    def __getattr__(self, name):
+        return getattr(self._fst, name)
+
+    def add_state(self, **kwargs):
+        state = self._fst.add_state(**kwargs)
+        if kwargs.get('initial'):
+            self._initial_states.append(state)
+        if kwargs.get('final'):
+            self._final_states.add(state)
+        return state
+
+    def add_arc(self, src_state, dst_state, label, *args, **kwargs):
+        self._fst.add_arc(src_state, dst_state, label, *args, **kwargs)
+        self._arcs[src_state].append((dst_state, label))
+
+    def get_first_words(self, wildcard_labels):
+        """
+        Returns the set of words which can begin a match, including ``''`` if the FST can match empty output, or
+        ``None`` if any word can (i.e. a match can begin with dictation).
+        """
+        first_words = set()
+        state_queue = collections.deque(self._initial_states)
+        queued = set(state_queue)
+        while state_queue:
+            state = state_queue.popleft()
+            if state in self._final_states:
+                first_words.add('')
+            for dst_state, label in self._arcs.get(state, ()):
+                if label in wildcard_labels:
+                    return None
+                if label is None or label in WFST.silent_labels or label.startswith('#nonterm'):
+                    if dst_state not in queued:
+                        state_queue.append(dst_state)
+                        queued.add(dst_state)
+                else:
+                    first_words.add(label)
+        return frozenset(first_words)
+
+
 #---------------------------------------------------------------------------
 
 class KaldiCompiler(CompilerBase, KaldiAGCompiler):
@@ -75,7 +183,12 @@ class KaldiCompiler(CompilerBase, KaldiAGCompiler):
         self.lazy_compilation = bool(lazy_compilation)
 
         self.kaldi_rule_by_rule_dict = collections.OrderedDict()  # Rule -> KaldiRule
-        # self._grammar_rule_states_dict = dict()  # FIXME: disabled!
+        self._rule_templates_by_grammar = dict()  # Grammar -> Dict[Rule, _FstTemplate]
+        self._rule_template_stack = []  # List[_FstTemplate] currently being recorded
+        self._list_templates = dict()  # id(List) -> _FstTemplate
+        self.kaldi_rules_by_first_word = collections.defaultdict(set)  # str -> Set[KaldiRule]; '' for matching empty output
+        self.kaldi_rules_with_any_first_word = set()  # Set[KaldiRule] whose matches can begin with dictation
+        self._first_words_by_kaldi_rule = dict()  # KaldiRule -> FrozenSet[str] | None
         self.kaldi_rules_by_listreflist_dict = collections.defaultdict(set)  # Rule -> Set[KaldiRule]
         self.internal_grammar = InternalGrammar('!kaldi_engine_internal')
 
@@ -159,19 +272,40 @@ class KaldiCompiler(CompilerBase, KaldiAGCompiler):
         return kaldi_rule_by_rule_dict
 
     def _compile_rule_root(self, rule, grammar, kaldi_rule):
-        src_state, dst_state = self._compile_rule(rule, grammar, kaldi_rule, kaldi_rule.fst, export=True)
+        fst = _FirstWordsFst(kaldi_rule.fst)
+        src_state, dst_state = self._compile_rule(rule, grammar, kaldi_rule, fst, export=True)
         if kaldi_rule.fst.native and not kaldi_rule.fst.has_path():
             # Impossible paths break AGF compilation, so bolt on an Impossible element. This is less than ideal, but what are you doing compiling this anyway?
-            self._compile_impossible(None, src_state, dst_state, grammar, kaldi_rule, kaldi_rule.fst)
+            self._compile_impossible(None, src_state, dst_state, grammar, kaldi_rule, fst)
+        self._index_first_words(kaldi_rule, fst.get_first_words(self.wildcard_nonterms))
         kaldi_rule.compile(lazy=self.lazy_compilation)
 
+    def _index_first_words(self, kaldi_rule, first_words):
+        self._unindex_first_words(kaldi_rule)
+        self._first_words_by_kaldi_rule[kaldi_rule] = first_words
+        if first_words is None:
+            self.kaldi_rules_with_any_first_word.add(kaldi_rule)
+        else:
+            for word in first_words:
+                self.kaldi_rules_by_first_word[word].add(kaldi_rule)
+
+    def _unindex_first_words(self, kaldi_rule):
+        first_words = self._first_words_by_kaldi_rule.pop(kaldi_rule, None)
+        self.kaldi_rules_with_any_first_word.discard(kaldi_rule)
+        for word in first_words or ():
+            kaldi_rules = self.kaldi_rules_by_first_word[word]
+            kaldi_rules.discard(kaldi_rule)
+            if not kaldi_rules:
+                del self.kaldi_rules_by_first_word[word]
+
+    def get_candidate_kaldi_rules(self, output):
+        """ Returns the set of KaldiRules which may match the given output, judging by the words that can begin their matches. """
+        words = output.split()
+        first_word = words[0] if words else ''
+        return self.kaldi_rules_by_first_word.get(first_word, set()) | self.kaldi_rules_with_any_first_word
+
     def _compile_rule(self, rule, grammar, kaldi_rule, fst, export):
         """ :param export: whether rule is exported (a root rule) """
-        # Determine whether this rule has already been compiled.
-        # if (grammar.name, rule.name) in self._grammar_rule_states_dict:
-        #     self._log.debug("%s: Already compiled rule %s%s." % (self, rule.name, ' [EXPORTED]' if export else ''))
-        #     return self._grammar_rule_states_dict[(grammar.name, rule.name)]
-        # else:
         self._log.debug("%s: Compiling rule %s%s." % (self, rule.name, ' [EXPORTED]' if export else ''))
 
         if export:
@@ -191,25 +325,81 @@ class KaldiCompiler(CompilerBase, KaldiAGCompiler):
             dst_state = fst.add_state()
 
         self.compile_element(rule.element, inner_src_state, dst_state, grammar, kaldi_rule, fst)
-        # self._grammar_rule_states_dict[(grammar.name, rule.name)] = (src_state, dst_state)
         return (outer_src_state, dst_state)
 
+    def _compile_referenced_rule(self, rule, grammar, kaldi_rule, fst):
+        """
+        Compiles a referenced rule into the FST and returns its (src_state, dst_state). The rule's elements are
+        compiled only on its first reference within the grammar; later references splice in a recorded copy.
+        """
+        templates = self._rule_templates_by_grammar.setdefault(grammar, dict())
+        template = templates.get(rule)
+        if template is not None:
+            self._log.debug("%s: Splicing already compiled rule %s." % (self, rule.name))
+            self._apply_rule_template(template, kaldi_rule)
+            return template.splice(fst)
+
+        template = _FstTemplate()
+        self._rule_template_stack.append(template)
+        try:
+            src_state, dst_state = self._compile_rule(rule, grammar, kaldi_rule, _RecordingFst(fst, template), export=False)
+        finally:
+            self._rule_template_stack.pop()
+        if template.valid:
+            template.src_state = template.states[src_state]
+            template.dst_state = template.states[dst_state]
+            templates[rule] = template
+        return (src_state, dst_state)
+
+    def _apply_rule_template(self, template, kaldi_rule):
+        """ Applies the compilation side effects of a spliced rule to the KaldiRule and to any enclosing templates. """
+        if template.has_dictation:
+            kaldi_rule.has_dictation = True
+        for lst in template.lists:
+            self.kaldi_rules_by_listreflist_dict[id(lst)].add(kaldi_rule)
+        for outer_template in self._rule_template_stack:
+            outer_template.has_dictation |= template.has_dictation
+            for lst in template.lists:
+                outer_template.add_list(lst)
+
+    def _invalidate_rule_templates(self, lst):
+        """ Discards the compiled templates of all rules referencing the list. """
+        for templates in self._rule_templates_by_grammar.values():
+            for rule, template in list(templates.items()):
+                if template.references_list(lst):
+                    del templates[rule]
+
     def unload_grammar(self, grammar, rules, engine):
+        self._rule_templates_by_grammar.pop(grammar, None)
         for rule in rules:
             kaldi_rule = self.kaldi_rule_by_rule_dict[rule]
             # Unload kaldi_rule: destroy() handles KaldiAGCompiler stuff; we must handle ours
             kaldi_rule.destroy()
             del self.kaldi_rule_by_rule_dict[rule]
+            self._unindex_first_words(kaldi_rule)
             for kaldi_rules_set in self.kaldi_rules_by_listreflist_dict.values():
                 kaldi_rules_set.discard(kaldi_rule)
+        # Drop the templates of lists no longer referenced by any KaldiRule
+        for list_id, kaldi_rules_set in list(self.kaldi_rules_by_listreflist_dict.items()):
+            if not kaldi_rules_set:
+                del self.kaldi_rules_by_listreflist_dict[list_id]
+                self._list_templates.pop(list_id, None)
             # NOTE: the kaldi_rule_by_rule_dict we returned from compile_grammar() is not updated, but it should be dropped upon unload anyway!
 
     def update_list(self, lst, grammar):
         # Note: we update all rules in all grammars that reference this list (unlike WSR/natlink?)
+        # Skip recompiling if the list's compiled form is unchanged, e.g. for a dynamic list refreshed with the same items
+        template = self._list_templates.get(id(lst))
+        if template is not None and template.key == self._get_list_items_key(lst.get_list_items()):
+            self._log.debug("%s: List %s is unchanged; not recompiling rules." % (self, lst.name))
+            return
+        self._list_templates.pop(id(lst), None)
+        self._invalidate_rule_templates(lst)
         lst_kaldi_rules = self.kaldi_rules_by_listreflist_dict[id(lst)]
         for kaldi_rule in lst_kaldi_rules:
+            # Compile with the rule's own grammar, which may not be the one given, so rule templates are cached under it
             with kaldi_rule.reload():
-                self._compile_rule_root(kaldi_rule.parent_rule, grammar, kaldi_rule)
+                self._compile_rule_root(kaldi_rule.parent_rule, kaldi_rule.parent_grammar, kaldi_rule)
 
     #-----------------------------------------------------------------------
     # Methods for compiling elements.
@@ -314,8 +504,8 @@ class KaldiCompiler(CompilerBase, KaldiAGCompiler):
     # @trace_compile
     def _compile_rule_ref(self, element, src_state, dst_state, grammar, kaldi_rule, fst):
         weight = self.get_weight(element)  # Handle weight internally below without adding a state
-        # Compile target rule "inline"
-        rule_src_state, rule_dst_state = self._compile_rule(element.rule, grammar, kaldi_rule, fst, export=False)
+        # Compile target rule "inline", reusing its compiled sub-graph if it has been referenced before
+        rule_src_state, rule_dst_state = self._compile_referenced_rule(element.rule, grammar, kaldi_rule, fst)
         fst.add_arc(src_state, rule_src_state, None, weight=weight)
         fst.add_arc(rule_dst_state, dst_state, None)
 
@@ -327,12 +517,36 @@ class KaldiCompiler(CompilerBase, KaldiAGCompiler):
             # Should only happen during initial compilation; during updates, we must skip this
             grammar.add_list(element.list)
         self.kaldi_rules_by_listreflist_dict[id(element.list)].add(kaldi_rule)
-        for child_str in element.list.get_list_items():
-            self._compile_literal(MockLiteral(child_str.split()), src_state, dst_state, grammar, kaldi_rule, fst)
+        for template in self._rule_template_stack:
+            template.add_list(element.list)
+
+        # Compile the list items into their own sub-graph, reusing the last compiled one if the items are unchanged
+        items = element.list.get_list_items()
+        key = self._get_list_items_key(items)
+        template = self._list_templates.get(id(element.list))
+        if template is not None and template.key == key:
+            list_src_state, list_dst_state = template.splice(fst)
+        else:
+            template = _FstTemplate()
+            recording_fst = _RecordingFst(fst, template)
+            list_src_state = recording_fst.add_state()
+            list_dst_state = recording_fst.add_state()
+            for child_str in items:
+                self._compile_literal(MockLiteral(child_str.split()), list_src_state, list_dst_state, grammar, kaldi_rule, recording_fst)
+            # Compute the key again, since handling OOV words may have added them to the lexicon
+            template.key = self._get_list_items_key(items)
+            if template.valid:
+                template.src_state = template.states[list_src_state]
+                template.dst_state = template.states[list_dst_state]
+                self._list_templates[id(element.list)] = template
+        fst.add_arc(src_state, list_src_state, None)
+        fst.add_arc(list_dst_state, dst_state, None)
 
     # @trace_compile
     def _compile_dictation(self, element, src_state, dst_state, grammar, kaldi_rule, fst):
         kaldi_rule.has_dictation = True
+        for template in self._rule_template_stack:
+            template.has_dictation = True
         src_state = self.add_weight_linkage(src_state, dst_state, self.get_weight(element), fst)
         # fst.add_arc(src_state, dst_state, '#nonterm:dictation', olabel=WFST.eps)
         extra_state = fst.add_state()
@@ -373,6 +587,12 @@ class KaldiCompiler(CompilerBase, KaldiAGCompiler):
             weight = 1e-9
         return weight
 
+    def _get_list_items_key(self, items):
+        """ Returns a key for the compiled form of list items: their lowercase words and whether each is in the lexicon. """
+        lexicon_words = self.lexicon_words
+        return tuple(tuple((word, word in lexicon_words) for word in (text_type(word).lower() for word in item.split()))
+            for item in items)
+
     def add_weight_linkage(self, outer_src_state, dst_state, weight, fst):
         """ Returns new source state, to be used by the caller as the effective source state. Only modifies if weight is non-default. """
         if (weight is None) or (weight == 1):
@@ -395,4 +615,5 @@ class KaldiCompiler(CompilerBase, KaldiAGCompiler):
             rule_tree = '\n'.join(rule_tree_lines)
         self._log.error("Failed rule's elements:\n" + rule_tree)
         kaldi_rule.destroy()
+        self._unindex_first_words(kaldi_rule)
         return CompilerError(message)
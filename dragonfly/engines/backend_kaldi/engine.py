@@ -22,7 +22,8 @@
 Kaldi engine classes
 """
 
-import collections, logging, os, sys, time
+import collections, logging, multiprocessing, os, sys, time
+from concurrent.futures    import ThreadPoolExecutor
 
 import kaldi_active_grammar
 from packaging.version     import Version
@@ -31,7 +32,8 @@ from six.moves             import zip
 from kaldi_active_grammar  import KaldiError, KaldiRule
 
 import dragonfly.engines
-from dragonfly.windows.window  import Window
+from dragonfly.windows.foreground import get_foreground
+from dragonfly.metrics         import get_latency_metrics
 from dragonfly.engines.base    import (EngineBase,
                                        EngineError,
                                        MimicFailure,
@@ -58,6 +60,12 @@ except TypeError:
 
 nan = float('nan')
 
+WaveFileResult = collections.namedtuple('WaveFileResult', 'filename utterances error')
+WaveFileResult.__doc__ = """ Recognitions of a wave file from `KaldiEngine.recognize_wave_files()`; *error* is a message if it failed. """
+UtteranceResult = collections.namedtuple('UtteranceResult',
+    'grammar_name rule_name words acceptable confidence expected_error_rate start_s end_s decode_s')
+UtteranceResult.__doc__ = """ Recognition of one utterance of a wave file, with its position in the file and decoding time in seconds. """
+
 #===========================================================================
 
 # noinspection PyAttributeOutsideInit
@@ -77,7 +85,7 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
         auto_add_to_user_lexicon=True, allow_online_pronunciations=False,
         lazy_compilation=True, invalidate_cache=False,
         expected_error_rate_threshold=None,
-        alternative_dictation=None,
+        alternative_dictation=None, detect_ambiguity=False,
         compiler_init_config=None, decoder_init_config=None,
         ):
         EngineBase.__init__(self)
@@ -138,6 +146,7 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
             invalidate_cache = bool(invalidate_cache),
             expected_error_rate_threshold = float(expected_error_rate_threshold) if expected_error_rate_threshold is not None else None,
             alternative_dictation = alternative_dictation,
+            detect_ambiguity = bool(detect_ambiguity),
             compiler_init_config = dict(compiler_init_config) if compiler_init_config else {},
             decoder_init_config = dict(decoder_init_config) if decoder_init_config else {},
         )
@@ -153,10 +162,15 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
         self._audio = None
         self._audio_iter = None
         self.audio_store = None
+        self._parse_executor = None
 
         self._loadunload_queue = collections.deque()
         self._grammar_wrappers_copy = {}
         self._any_exclusive_grammars = False
+        self._active_kaldi_rules = set()
+        self._kaldi_rules_activity = []  # Indexed by KaldiRule.id; updated in place
+        self._kaldi_rules_activity_stale = True  # Whether the activity of all rules must be recomputed
+        self._dirty_grammar_wrappers = set()  # Grammar wrappers whose rules' activity must be recomputed
         self._saving_adaptation_state = False
         self._ignore_current_phrase = False
         self._in_phrase = False
@@ -206,11 +220,16 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
         """ Disconnect from back-end SR engine. Exits from ``do_recognition()``. """
         if self._doing_recognition:
             self._deferred_disconnect = True
+            if self._audio:
+                self._audio.wake()  # Stop waiting for audio
         else:
             if self._audio:
                 self._audio.destroy()
             if self.audio_store:
                 self.audio_store.save_all()
+                self.audio_store.close()
+            if self._parse_executor:
+                self._parse_executor.shutdown()
             self._reset_state()
             self._grammar_wrappers = {}  # From EngineBase
 
@@ -244,6 +263,7 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
             for (rule, kaldi_rule) in kaldi_rule_by_rule_dict.items():
                 kaldi_rule.active = bool(rule.active)  # Initialize to correct activity
                 kaldi_rule.load(lazy=self._compiler.lazy_compilation)
+            self._dirty_grammar_wrappers.add(wrapper)
         if self._in_phrase:
             self._loadunload_queue.append(load)
         else:
@@ -264,6 +284,8 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
         def unload():
             rules = list(wrapper.kaldi_rule_by_rule_dict.keys())
             self._compiler.unload_grammar(grammar, rules, self)
+            self._any_exclusive_grammars = any(gw.exclusive for gw in self._grammar_wrappers.values())
+            self._kaldi_rules_activity_stale = True  # Rule IDs may be reused
         if self._in_phrase:
             self._loadunload_queue.append(unload)
         else:
@@ -272,32 +294,45 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
     def activate_grammar(self, grammar):
         """ Activate the given *grammar*. """
         self._log.debug("Activating grammar %s." % grammar.name)
-        self._get_grammar_wrapper(grammar).active = True
+        self._set_grammar_wrapper_activity(self._get_grammar_wrapper(grammar), True)
 
     def deactivate_grammar(self, grammar):
         """ Deactivate the given *grammar*. """
         self._log.debug("Deactivating grammar %s." % grammar.name)
-        self._get_grammar_wrapper(grammar).active = False
+        self._set_grammar_wrapper_activity(self._get_grammar_wrapper(grammar), False)
 
     def activate_rule(self, rule, grammar):
         """ Activate the given *rule*. """
         self._log.debug("Activating rule %s in grammar %s." % (rule.name, grammar.name))
         self._compiler.kaldi_rule_by_rule_dict[rule].active = True
+        self._dirty_grammar_wrappers.add(self._get_grammar_wrapper(grammar))
 
     def deactivate_rule(self, rule, grammar):
         """ Deactivate the given *rule*. """
         self._log.debug("Deactivating rule %s in grammar %s." % (rule.name, grammar.name))
         self._compiler.kaldi_rule_by_rule_dict[rule].active = False
+        self._dirty_grammar_wrappers.add(self._get_grammar_wrapper(grammar))
 
     def update_list(self, lst, grammar):
         self._compiler.update_list(lst, grammar)
 
     def set_exclusiveness(self, grammar, exclusive):
         self._log.debug("Setting exclusiveness of grammar %s to %s." % (grammar.name, exclusive))
-        self._get_grammar_wrapper(grammar).exclusive = exclusive
+        wrapper = self._get_grammar_wrapper(grammar)
+        wrapper.exclusive = exclusive
         if exclusive:
-            self._get_grammar_wrapper(grammar).active = True
-        self._any_exclusive_grammars = any(gw.exclusive for gw in self._grammar_wrappers.values())
+            wrapper.active = True
+        self._dirty_grammar_wrappers.add(wrapper)
+        any_exclusive_grammars = any(gw.exclusive for gw in self._grammar_wrappers.values())
+        if any_exclusive_grammars != self._any_exclusive_grammars:
+            # The activity of every other grammar changes too
+            self._any_exclusive_grammars = any_exclusive_grammars
+            self._kaldi_rules_activity_stale = True
+
+    def _set_grammar_wrapper_activity(self, wrapper, active):
+        if wrapper.active != active:
+            wrapper.active = active
+            self._dirty_grammar_wrappers.add(wrapper)
 
     #-----------------------------------------------------------------------
     # Miscellaneous methods.
@@ -365,7 +400,7 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
             self.prepare_for_recognition()  # Try to get compilation out of the way before starting audio
 
             if timeout != None:
-                end_time = time.time() + timeout
+                end_time = time.monotonic() + timeout
                 timed_out = True
 
             if audio_iter == None:
@@ -375,12 +410,12 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
             next(audio_iter)  # Prime the audio iterator
 
             # Loop until timeout (if set) or until disconnect() is called.
-            while (not self._deferred_disconnect) and ((not end_time) or (time.time() < end_time)):
+            while (not self._deferred_disconnect) and ((not end_time) or (time.monotonic() < end_time)):
                 block = audio_iter.send(in_complex)
 
                 if block is False:
-                    # No audio block available
-                    time.sleep(0.001)
+                    # No audio block available, so wait for one, until the next timer is due, or until timeout
+                    self._wait_for_audio(audio_iter, end_time)
 
                 elif block is not None:
                     if not self._in_phrase:
@@ -458,6 +493,26 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
 
         return not timed_out
 
+    def _wait_for_audio(self, audio_iter, end_time):
+        """ Blocks until an audio block is available, the next timer is due, *end_time* is reached, or `wake()` is
+            called on the audio. Other audio iterators than the engine's own cannot be waited on, so sleep briefly. """
+        wait_s = self.time_until_next_timer()
+        if end_time is not None:
+            remaining_s = max(0.0, end_time - time.monotonic())
+            wait_s = remaining_s if wait_s is None else min(wait_s, remaining_s)
+        if audio_iter is self._audio_iter and self._audio:
+            if self._options['audio_auto_reconnect']:
+                # Keep yielding empty blocks regularly, so that the VAD collector can detect lost audio and reconnect
+                wait_s = 0.1 if wait_s is None else min(wait_s, 0.1)
+            self._audio.wait(wait_s)
+        else:
+            time.sleep(0.001 if wait_s is None else min(wait_s, 0.001))
+
+    def timers_changed(self):
+        """ Wakes the recognition loop to recompute how long to wait for audio. """
+        if self._doing_recognition and self._audio:
+            self._audio.wake()
+
     in_phrase = property(lambda self: self._in_phrase,
         doc="Whether or not the engine is currently in the middle of hearing a phrase from the user.")
 
@@ -468,13 +523,151 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
         """
         self.do_recognition(audio_iter=WavAudio.read_file(filename, realtime=realtime), **kwargs)
 
-    def recognize_wave_file_as_stream(self, filename, realtime=False, **kwargs):
+    def recognize_wave_file_as_stream(self, filename, realtime=False, offline_vad=False, **kwargs):
         """
             Does recognition on given wave file, treating it as a stream and
             processing it with VAD to break it into multiple utterances (as with
             normal microphone audio input), then returns.
+
+            If *offline_vad* is ``True``, the whole file is segmented into
+            utterances at once before recognition, which is faster for long
+            files.  Segmentation then happens before decoding, so the end of
+            an utterance which the decoder finds to be in a complex rule is
+            not extended with the longer *complex_end_window_ms* window, as
+            it is with streaming VAD.  Such utterances may be split at
+            shorter pauses, so the results can differ from those with
+            *offline_vad* ``False``.
+        """
+        if offline_vad:
+            audio_iter = WavAudio.read_file_with_offline_vad(filename)
+        else:
+            audio_iter = WavAudio.read_file_with_vad(filename, realtime=realtime)
+        self.do_recognition(audio_iter=audio_iter, **kwargs)
+
+    def recognize_wave_files(self, filenames, workers=None, as_stream=False):
+        """
+            Does recognition on the given wave files, returning an iterator that yields a `WaveFileResult` for each
+            file, in order. Recognitions are not processed (no actions are executed and no recognition observers are notified),
+            and rules are used with their current activity (contexts are not evaluated).
+
+            Each file is treated as a single utterance, unless *as_stream* is ``True``, in which case it is segmented
+            into utterances with offline VAD. The files are sharded across *workers* worker processes (by default, one
+            per CPU), each of which builds its own decoder from the engine's compiled grammars. Worker processes
+            require the ``fork`` start method; otherwise, or if *workers* is 1, recognition is done in this process.
+
+            Worker processes are forked from this process when the iterator is first advanced. Only the forking thread
+            runs in them: other threads, such as those of timers, queued logging or the X selection monitor, do not,
+            and a lock held by one of them at the time of the fork stays locked in the workers. Use worker processes
+            from a process which is not running such threads, such as the ``recognize-wave-files`` CLI command, or pass
+            *workers* as 1.
+
+            An `EngineError` is raised immediately if the engine is not connected or is doing recognition.
+        """
+        if not self._decoder:
+            raise EngineError("Cannot recognize before connect()")
+        if self._doing_recognition:
+            raise EngineError("Cannot recognize wave files during do_recognition()")
+        filenames = list(filenames)
+        self.prepare_for_recognition()  # Compile everything before any workers are started
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(int(workers), len(filenames))
+        if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            self._log.warning("Recognizing wave files in one process, because worker processes cannot be forked")
+            workers = 1
+        return self._recognize_wave_files(filenames, workers, as_stream)
+
+    def _recognize_wave_files(self, filenames, workers, as_stream):
+        """ Generator doing the work of `recognize_wave_files()`. """
+        if workers <= 1:
+            for filename in filenames:
+                yield self._recognize_wave_file_utterances(filename, as_stream)
+            return
+
+        self._log.info("Recognizing %d wave files with %d worker processes", len(filenames), workers)
+        pool = multiprocessing.get_context('fork').Pool(workers, initializer=_init_wave_file_worker, initargs=(self,))
+        try:
+            for result in pool.imap(_recognize_wave_file_in_worker, [(filename, as_stream) for filename in filenames]):
+                yield result
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _init_wave_file_worker(self):
+        """ Replaces the engine's decoder and audio input in a forked worker process with a new decoder with all of the
+            compiled rules loaded, so that it does not share native state with the parent process. """
+        self._audio = None
+        self._audio_iter = None
+        self.audio_store = None
+        self._parse_executor = None
+        self._compiler.decoder = None
+        self._decoder = self._compiler.init_decoder(config=self._options['decoder_init_config'])
+        for kaldi_rule in sorted(self._compiler.kaldi_rule_by_id_dict.values(), key=lambda kaldi_rule: kaldi_rule.id):
+            kaldi_rule.has_been_loaded = False
+            kaldi_rule.load()
+
+    def _recognize_wave_file_utterances(self, filename, as_stream):
+        """ Recognizes the utterances of a wave file without processing them, returning a `WaveFileResult`. """
+        try:
+            audio_data = WavAudio.map_file(filename)
+            block_bytes = MicAudio.BLOCK_SIZE_SAMPLES * MicAudio.SAMPLE_WIDTH
+            bytes_per_second = float(MicAudio.SAMPLE_RATE * MicAudio.SAMPLE_WIDTH)
+            if as_stream:
+                vad_audio = VADAudio(aggressiveness=self._options['vad_aggressiveness'], input_device=False)
+                segments = [(start_block * block_bytes, end_block * block_bytes)
+                    for start_block, end_block in vad_audio.segment_buffer(audio_data,
+                        start_window_ms=self._options['vad_padding_start_ms'],
+                        end_window_ms=self._options['vad_padding_end_ms'])]
+            else:
+                segments = [(0, len(audio_data))]
+
+            utterances = []
+            audio_store, self.audio_store = self.audio_store, AudioStore(MicAudio)  # Don't retain batch recognitions
+            try:
+                for start, end in segments:
+                    start_time = time.time()
+                    kaldi_rules_activity = self._compute_kaldi_rules_activity(phrase_start=False)
+                    self._decoder.decode(audio_data[start:end], False, kaldi_rules_activity)
+                    self.audio_store.add_block(audio_data[start:end])
+                    self._decoder.decode(b'', True)
+                    output, info = self._decoder.get_output()
+                    recognition = self._parse_recognition(output)
+                    self.audio_store.cancel()
+
+                    kaldi_rule = recognition.kaldi_rule
+                    expected_error_rate = info.get('expected_error_rate', nan)
+                    acceptable = bool(kaldi_rule and (recognition.has_dictation or not (
+                        self._options['expected_error_rate_threshold'] and (expected_error_rate > self._options['expected_error_rate_threshold'])
+                    )))
+                    utterances.append(UtteranceResult(
+                        grammar_name=(kaldi_rule.parent_grammar.name if kaldi_rule else None),
+                        rule_name=(kaldi_rule.parent_rule.name if kaldi_rule else None),
+                        words=recognition.words,
+                        acceptable=acceptable,
+                        confidence=info.get('confidence', nan),
+                        expected_error_rate=expected_error_rate,
+                        start_s=start / bytes_per_second,
+                        end_s=end / bytes_per_second,
+                        decode_s=time.time() - start_time,
+                    ))
+            finally:
+                self.audio_store = audio_store
+            return WaveFileResult(filename, tuple(utterances), None)
+
+        except (EnvironmentError, EOFError, ValueError, KaldiError) as e:
+            self._log.error("Failed to recognize wave file '%s': %s", filename, e)
+            return WaveFileResult(filename, (), "%s: %s" % (e.__class__.__name__, e))
+
+    def recognize_once(self, timeout=None, audio_iter=None):
+        """
+            Coroutine method that does recognition of a single utterance without blocking the running asyncio event
+            loop, or for at most *timeout* seconds. Timers and asynchronous recognition observers are run on the loop.
+            Returns ``False`` if timeout occurred without a recognition.
         """
-        self.do_recognition(audio_iter=WavAudio.read_file_with_vad(filename, realtime=realtime), **kwargs)
+        from dragonfly.engines.base.asyncio_support import run_in_executor
+        return run_in_executor(self, self._do_recognition, timeout=timeout, single=True, audio_iter=audio_iter)
 
     def ignore_current_phrase(self):
         """
@@ -546,7 +739,7 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
     def _compute_kaldi_rules_activity(self, phrase_start=True):
         window_info = {}
         if phrase_start:
-            fg_window = Window.get_foreground()
+            fg_window = get_foreground()
             window_info = {
                 "executable": fg_window.executable,
                 "title": fg_window.title,
@@ -555,32 +748,62 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
             for grammar_wrapper in self._iter_all_grammar_wrappers_dynamically():
                 grammar_wrapper.phrase_start_callback(**window_info)
         self.prepare_for_recognition()
-        self._active_kaldi_rules = set()
-        self._kaldi_rules_activity = [False] * self._compiler.num_kaldi_rules
-        for grammar_wrapper in self._iter_all_grammar_wrappers_dynamically():
-            if grammar_wrapper.active and (not self._any_exclusive_grammars or grammar_wrapper.exclusive):
-                for kaldi_rule in grammar_wrapper.kaldi_rule_by_rule_dict.values():
-                    if kaldi_rule.active:
-                        self._active_kaldi_rules.add(kaldi_rule)
-                        self._kaldi_rules_activity[kaldi_rule.id] = True
+        self._update_kaldi_rules_activity()
         self._log.debug("active kaldi_rules (from window %s): %s", window_info, [kr.name for kr in self._active_kaldi_rules])
         return self._kaldi_rules_activity
 
+    def _update_kaldi_rules_activity(self):
+        """ Applies activity changes made since the last call to ``_kaldi_rules_activity`` and ``_active_kaldi_rules``. """
+        activity = self._kaldi_rules_activity
+        num_kaldi_rules = self._compiler.num_kaldi_rules
+        if len(activity) < num_kaldi_rules:
+            activity.extend([False] * (num_kaldi_rules - len(activity)))
+        elif len(activity) > num_kaldi_rules:
+            del activity[num_kaldi_rules:]
+
+        if self._kaldi_rules_activity_stale:
+            self._kaldi_rules_activity_stale = False
+            self._dirty_grammar_wrappers.clear()
+            activity[:] = [False] * num_kaldi_rules
+            self._active_kaldi_rules.clear()
+            for grammar_wrapper in self._iter_all_grammar_wrappers_dynamically():
+                self._apply_grammar_wrapper_activity(grammar_wrapper)
+        else:
+            while self._dirty_grammar_wrappers:
+                grammar_wrapper = self._dirty_grammar_wrappers.pop()
+                if self._grammar_wrappers.get(id(grammar_wrapper.grammar)) is grammar_wrapper:
+                    self._apply_grammar_wrapper_activity(grammar_wrapper)
+
+    def _apply_grammar_wrapper_activity(self, grammar_wrapper):
+        grammar_active = grammar_wrapper.active and (not self._any_exclusive_grammars or grammar_wrapper.exclusive)
+        for kaldi_rule in grammar_wrapper.kaldi_rule_by_rule_dict.values():
+            active = bool(grammar_active and kaldi_rule.active)
+            self._kaldi_rules_activity[kaldi_rule.id] = active
+            if active:
+                self._active_kaldi_rules.add(kaldi_rule)
+            else:
+                self._active_kaldi_rules.discard(kaldi_rule)
+
     def _parse_recognition(self, output, mimic=False):
         if mimic or self._compiler.parsing_framework == 'text':
             with debug_timer(self._log.debug, "kaldi_rule parse time"):
-                detect_ambiguity = False
-                results = []
-                for kaldi_rule in sorted(self._active_kaldi_rules, key=lambda kr: 100 if kr.has_dictation else 0):
-                    self._log.debug("attempting to parse %r with %s", output, kaldi_rule)
-                    words = self._compiler.parse_output_for_rule(kaldi_rule, output)
-                    if words is None:
-                        continue
-                    # self._log.debug("success %d", kaldi_rule_id)
-                    # Pass (kaldi_rule, words) to below.
-                    results.append((kaldi_rule, words))
-                    if not detect_ambiguity:
-                        break
+                detect_ambiguity = self._options['detect_ambiguity']
+                # Only parse with the active rules whose matches can begin with the output's first word
+                kaldi_rules = self._compiler.get_candidate_kaldi_rules(output) & self._active_kaldi_rules
+                kaldi_rules = sorted(kaldi_rules, key=lambda kr: 100 if kr.has_dictation else 0)
+                if detect_ambiguity and len(kaldi_rules) > 1:
+                    results = self._parse_output_for_rules_parallel(kaldi_rules, output)
+                else:
+                    results = []
+                    for kaldi_rule in kaldi_rules:
+                        self._log.debug("attempting to parse %r with %s", output, kaldi_rule)
+                        words = self._compiler.parse_output_for_rule(kaldi_rule, output)
+                        if words is None:
+                            continue
+                        # Pass (kaldi_rule, words) to below.
+                        results.append((kaldi_rule, words))
+                        if not detect_ambiguity:
+                            break
 
                 if not results:
                     if not mimic:
@@ -621,6 +844,30 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
 
         return Recognition(self, kaldi_rule=kaldi_rule, words=words, words_are_dictation_mask=words_are_dictation_mask)
 
+    def _parse_output_for_rules_parallel(self, kaldi_rules, output):
+        """ Parses output with all of the given rules, using worker threads, and returns the list of (kaldi_rule, words) matches in order. """
+        if self._parse_executor is None:
+            self._parse_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        self._log.debug("attempting to parse %r with %s", output, kaldi_rules)
+        parse = lambda kaldi_rule: self._compiler.parse_output_for_rule(kaldi_rule, output)
+        return [(kaldi_rule, words)
+            for kaldi_rule, words in zip(kaldi_rules, self._parse_executor.map(parse, kaldi_rules))
+            if words is not None]
+
+
+#===========================================================================
+# Functions for recognizing wave files in worker processes.
+
+_wave_file_worker_engine = None
+
+def _init_wave_file_worker(engine):
+    global _wave_file_worker_engine
+    _wave_file_worker_engine = engine
+    engine._init_wave_file_worker()
+
+def _recognize_wave_file_in_worker(args):
+    return _wave_file_worker_engine._recognize_wave_file_utterances(*args)
+
 
 #===========================================================================
 
@@ -709,18 +956,24 @@ class GrammarWrapper(GrammarWrapperBase):
         if dispatch_other:
             self.engine.dispatch_recognition_other(self.grammar, words, results)
 
-        # Call the grammar's general process_recognition method, if it is present.
-        #  Stop if it returns False.
-        stop = self.recognition_process_callback(words, results) is False
-        if stop: return
-
-        # Process the recognition.
+        # Record latency metrics for the rest of processing, if enabled.
+        metrics = get_latency_metrics()
+        metrics.mark("processing", first=True)
         try:
-            root = state.build_parse_tree()
-            with debug_timer(self.engine._log.debug, "rule execution time"):
-                rule.process_recognition(root)
-        except Exception as e:
-            self._log.exception("Failed to process rule %r: %s", rule.name, e)
+            # Call the grammar's general process_recognition method, if it is present.
+            #  Stop if it returns False.
+            stop = self.recognition_process_callback(words, results) is False
+            if stop: return
+
+            # Process the recognition.
+            try:
+                root = state.build_parse_tree()
+                with debug_timer(self.engine._log.debug, "rule execution time"):
+                    rule.process_recognition(root)
+            except Exception as e:
+                self._log.exception("Failed to process rule %r: %s", rule.name, e)
+        finally:
+            metrics.end_utterance(self.grammar.name, rule.name)
 
     def recognition_callback(self, recognition):
         words = recognition.words
@@ -43,6 +43,7 @@ from win32com.client.gencache  import EnsureDispatch
 
 from dragonfly.grammar.recobs  import RecognitionObserver
 from dragonfly.windows.window  import Window
+from dragonfly.windows.foreground import get_foreground
 from dragonfly.engines.base    import (EngineBase, EngineError,
                                        MimicFailure, DelegateTimerManager,
                                        DelegateTimerManagerInterface,
@@ -499,7 +500,7 @@ class GrammarWrapper(GrammarWrapperBase):
             c.OnFalseRecognition = self.recognition_failure_callback
 
     def phrase_start_callback(self, stream_number, stream_position):
-        window = Window.get_foreground()
+        window = get_foreground()
         self.grammar.process_begin(window.executable, window.title,
                                    window.handle)
 
@@ -31,7 +31,7 @@ from sphinxwrapper  import PocketSphinx
 from pocketsphinx   import Hypothesis
 
 import dragonfly.engines
-from dragonfly.windows.window                         import Window
+from dragonfly.windows.foreground                     import get_foreground
 from dragonfly.engines.base                           import (EngineBase, EngineError, MimicFailure,
                                                               DelegateTimerManagerInterface)
 from dragonfly.engines.backend_sphinx.compiler         import SphinxJSGFCompiler
@@ -494,7 +494,7 @@ class SphinxEngine(EngineBase, DelegateTimerManagerInterface):
 
     def _speech_start_callback(self):
         # Get context info.
-        fg_window = Window.get_foreground()
+        fg_window = get_foreground()
         window_info = {
             "executable": fg_window.executable,
             "title": fg_window.title,
@@ -29,7 +29,7 @@ from dragonfly.engines.base                  import (EngineBase,
                                                      ThreadedTimerManager,
                                                      GrammarWrapperBase)
 from dragonfly.engines.backend_text.recobs   import TextRecObsManager
-from dragonfly.windows.window                import Window
+from dragonfly.windows.foreground            import get_foreground
 
 
 #---------------------------------------------------------------------------
@@ -145,6 +145,35 @@ class TextInputEngine(EngineBase):
         except KeyboardInterrupt:
             pass
 
+    def run_async(self, delay=0):
+        """
+        Coroutine method for recognizing words from standard input (stdin)
+        until the end of input is reached or :meth:`disconnect` is called.
+
+        Standard input is read without blocking the running event loop.
+        Timers and asynchronous recognition observers are run on the loop.
+
+        :param delay: time in seconds to delay before mimicking each
+            command.
+        """
+        from dragonfly.engines.backend_text.engine_asyncio import run_async
+        return run_async(self, delay)
+
+    def recognize_once(self, delay=0):
+        """
+        Coroutine method for recognizing the next non-empty line of
+        standard input (stdin).
+
+        The coroutine returns ``True`` if the words were recognized,
+        ``False`` if they were not and ``None`` at the end of input.
+
+        :param delay: time in seconds to delay before mimicking the
+            command.
+        """
+        from dragonfly.engines.backend_text.engine_asyncio import \
+            recognize_once
+        return recognize_once(self, delay)
+
     def mimic(self, words, **kwargs):
         """
         Mimic a recognition of the given *words*.
@@ -183,7 +212,7 @@ class TextInputEngine(EngineBase):
 
     def _emulate_start_speech(self, **kwargs):
         # Get foreground window attributes.
-        w = Window.get_foreground()
+        w = get_foreground()
         window_info = {
             "executable": w.executable,
             "title": w.title,
@@ -0,0 +1,111 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2018 by Dane Finlay
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+asyncio support for the text-input engine
+============================================================================
+
+This module requires Python 3.5 or higher.
+
+"""
+
+import asyncio
+import sys
+import threading
+
+from dragonfly.engines.base                   import MimicFailure
+from dragonfly.engines.base.asyncio_support   import (use_event_loop,
+                                                      wait_for_callbacks)
+
+
+#---------------------------------------------------------------------------
+
+def _read_line(loop):
+    # Read a line from stdin in a daemon thread so that the event loop is
+    #  not blocked and a pending read doesn't prevent the process from
+    #  exiting.
+    future = loop.create_future()
+
+    def set_result(line):
+        if not future.done():
+            future.set_result(line)
+
+    def set_exception(exception):
+        if not future.done():
+            future.set_exception(exception)
+
+    def read():
+        try:
+            line = sys.stdin.readline()
+        except Exception as e:
+            loop.call_soon_threadsafe(set_exception, e)
+        else:
+            loop.call_soon_threadsafe(set_result, line)
+
+    thread = threading.Thread(target=read)
+    thread.daemon = True
+    thread.start()
+    return future
+
+
+async def recognize_once(engine, delay=0):
+    """
+    Implementation of :meth:`TextInputEngine.recognize_once`.
+    """
+    loop = asyncio.get_event_loop()
+    with use_event_loop(engine, loop):
+        # Skip empty lines.
+        while True:
+            line = await _read_line(loop)
+            if not line:
+                return None
+            line = line.strip()
+            if line:
+                break
+
+        # Delay before mimicking if necessary.
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        try:
+            await engine.mimic_async(line.split())
+        except MimicFailure:
+            engine._log.error("Mimic failure for words: %s", line)
+            return False
+        return True
+
+
+async def run_async(engine, delay=0):
+    """
+    Implementation of :meth:`TextInputEngine.run_async`.
+    """
+    engine.connect()
+    loop = asyncio.get_event_loop()
+    with use_event_loop(engine, loop):
+        try:
+            while True:
+                result = await recognize_once(engine, delay)
+
+                # Finish on end of input or if disconnect() was called.
+                if result is None or engine._connected is False:
+                    break
+        finally:
+            await wait_for_callbacks(engine)
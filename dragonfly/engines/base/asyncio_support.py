@@ -0,0 +1,281 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+asyncio integration
+============================================================================
+
+This module implements the engine-independent parts of Dragonfly's
+:mod:`asyncio` support:
+
+ - a timer manager that schedules timers on an event loop,
+ - scheduling of coroutines returned by recognition observers,
+ - the default implementations of :meth:`EngineBase.run_async` and
+   :meth:`EngineBase.mimic_async`.
+
+This module requires Python 3.5 or higher.  It is imported lazily by the
+engine classes so that the rest of the library remains usable on Python 2.
+
+"""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import logging
+
+from dragonfly.engines.base.timer import TimerManagerBase
+
+_log = logging.getLogger("engine.asyncio")
+
+
+#---------------------------------------------------------------------------
+
+def get_running_loop():
+    """
+    Get the event loop running in the current thread, or ``None`` if there
+    isn't one.
+    """
+    try:
+        return asyncio.get_running_loop()
+    except AttributeError:
+        # Python 3.5 and 3.6.
+        loop = asyncio.get_event_loop()
+        return loop if loop.is_running() else None
+    except RuntimeError:
+        return None
+
+
+#---------------------------------------------------------------------------
+
+class AsyncioTimerManager(TimerManagerBase):
+    """
+    Timer manager class that calls timer functions on an :mod:`asyncio`
+    event loop.
+
+    The manager keeps a single :meth:`loop.call_later` handle for the
+    earliest timer deadline and reschedules it whenever a timer is added
+    or removed.  Timers may be started and stopped from any thread.
+
+    This manager is installed automatically by :meth:`EngineBase.run_async`
+    for the duration of the call.
+    """
+
+    def __init__(self, interval, engine, loop):
+        TimerManagerBase.__init__(self, interval, engine)
+        self.loop = loop
+        self._handle = None
+
+    def add_timer(self, timer):
+        TimerManagerBase.add_timer(self, timer)
+        self._reschedule()
+
+    def remove_timer(self, timer):
+        TimerManagerBase.remove_timer(self, timer)
+        self._reschedule()
+
+    def _reschedule(self):
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._schedule_wakeup)
+
+    def _schedule_wakeup(self):
+        # This method is always called on the event loop's thread.
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        if not (self._active and self._enabled):
+            return
+        delay = self.time_until_next_timer()
+        if delay is not None:
+            self._handle = self.loop.call_later(delay, self._wakeup)
+
+    def _wakeup(self):
+        self._handle = None
+        self.main_callback()
+        self._schedule_wakeup()
+
+    def _activate_main_callback(self, callback, sec):
+        """"""
+        # Wake-ups are scheduled by _reschedule() once _active is set.
+
+    def _deactivate_main_callback(self):
+        """"""
+        self._reschedule()
+
+
+def _move_timers(source, destination):
+    # Move each active timer from one manager to another, keeping its
+    #  current deadline.
+    for timer in tuple(source.timers):
+        source.remove_timer(timer)
+        timer.manager = destination
+        destination.add_timer(timer)
+
+
+@contextlib.contextmanager
+def use_event_loop(engine, loop, timers=True):
+    """
+    Context manager for binding an engine to an event loop.
+
+    Coroutines returned by recognition observers are scheduled on the
+    bound loop.  If *timers* is true, the engine's timers are also moved
+    onto the loop for the duration and moved back afterwards.
+
+    Nothing is changed if the engine is already bound to *loop*.
+    """
+    if engine._event_loop is loop:
+        yield
+        return
+
+    previous_loop = engine._event_loop
+    previous_manager = engine._timer_manager
+    manager = None
+    if timers and previous_manager is not None:
+        manager = AsyncioTimerManager(previous_manager.interval, engine,
+                                      loop)
+        manager._enabled = previous_manager._enabled
+        _move_timers(previous_manager, manager)
+        engine._timer_manager = manager
+
+    engine._event_loop = loop
+    try:
+        yield
+    finally:
+        engine._event_loop = previous_loop
+        if manager is not None:
+            engine._timer_manager = previous_manager
+            _move_timers(manager, previous_manager)
+
+
+#---------------------------------------------------------------------------
+
+def _log_future_exception(description, future):
+    if future.cancelled():
+        return
+    exception = future.exception()
+    if exception is not None:
+        _log.error("Exception during %s: %s", description, exception,
+                   exc_info=(type(exception), exception,
+                             exception.__traceback__))
+
+
+def schedule_coroutine(engine, coroutine, description="coroutine"):
+    """
+    Schedule a coroutine returned by a callback function.
+
+    The coroutine is scheduled on the engine's bound event loop, or on the
+    event loop running in the current thread.  If there is no event loop,
+    the coroutine is run to completion immediately in a temporary one.
+
+    Exceptions raised by the coroutine are logged.  The returned future,
+    if any, is tracked by the engine until it is done so that
+    :meth:`EngineBase.mimic_async` can wait for it.
+    """
+    running_loop = get_running_loop()
+    loop = engine._event_loop or running_loop
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(coroutine)
+        except Exception as e:
+            _log.exception("Exception during %s: %s", description, e)
+        finally:
+            loop.close()
+        return None
+
+    if loop is running_loop:
+        future = loop.create_task(coroutine)
+    else:
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+    pending = engine._pending_async_callbacks
+    pending.add(future)
+    future.add_done_callback(pending.discard)
+    future.add_done_callback(functools.partial(_log_future_exception,
+                                               description))
+    return future
+
+
+async def wait_for_callbacks(engine, futures=None):
+    """
+    Wait until scheduled callback coroutines are done.
+
+    If *futures* is ``None``, all of the engine's pending callback
+    coroutines are waited for.
+    """
+    if futures is None:
+        futures = tuple(engine._pending_async_callbacks)
+    if not futures:
+        return
+    awaitables = []
+    for future in futures:
+        if isinstance(future, concurrent.futures.Future):
+            future = asyncio.wrap_future(future)
+        awaitables.append(future)
+
+    # Exceptions are logged by schedule_coroutine().
+    await asyncio.gather(*awaitables, return_exceptions=True)
+
+
+#---------------------------------------------------------------------------
+
+async def run_in_executor(engine, function, *args, **kwargs):
+    """
+    Call a blocking engine function in the event loop's default executor.
+
+    The engine is bound to the running loop for the duration of the call.
+    """
+    loop = asyncio.get_event_loop()
+    with use_event_loop(engine, loop):
+        return await loop.run_in_executor(
+            None, functools.partial(function, *args, **kwargs)
+        )
+
+
+async def run_async(engine, *args, **kwargs):
+    """
+    Default implementation of :meth:`EngineBase.run_async`.
+
+    The engine's blocking :meth:`do_recognition` method is run in the
+    event loop's default executor.
+    """
+    return await run_in_executor(engine, engine.do_recognition, *args,
+                                 **kwargs)
+
+
+async def mimic_async(engine, words, **kwargs):
+    """
+    Default implementation of :meth:`EngineBase.mimic_async`.
+
+    The engine's :meth:`mimic` method is called on the event loop's thread
+    and any coroutines returned by recognition observers during the call
+    are awaited before returning.
+    """
+    loop = asyncio.get_event_loop()
+    with use_event_loop(engine, loop, timers=False):
+        before = set(engine._pending_async_callbacks)
+        try:
+            if kwargs:
+                engine.mimic(words, **kwargs)
+            else:
+                engine.mimic(words)
+        finally:
+            futures = set(engine._pending_async_callbacks) - before
+            await wait_for_callbacks(engine, futures)
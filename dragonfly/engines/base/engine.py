@@ -26,6 +26,7 @@ EngineBase class
 
 import locale
 import logging
+import threading
 
 import six
 
@@ -65,6 +66,7 @@ class EngineBase(object):
     _log = logging.getLogger("engine")
     _name = "base"
     _timer_manager = None
+    _event_loop = None
     DictationContainer = DictationContainerBase
 
     #-----------------------------------------------------------------------
@@ -75,6 +77,10 @@ class EngineBase(object):
 
         self._grammar_wrappers = {}
         self._recognition_observer_manager = None
+        self._pending_async_callbacks = set()
+        self._foreground_lock = threading.Lock()
+        self._foreground_window = None
+        self._foreground_pending = False
 
         # Recognizing quoted words (literals) is not supported by default.
         self._has_quoted_words_support = False
@@ -261,6 +267,47 @@ class EngineBase(object):
         raise NotImplementedError("Virtual method not implemented for"
                                   " engine %s." % self)
 
+    #-----------------------------------------------------------------------
+    # Methods for asyncio integration.
+    # Note: These methods require Python 3.5 or higher.
+
+    def run_async(self, *args, **kwargs):
+        """
+        Coroutine method for recognizing speech without blocking the running
+        :mod:`asyncio` event loop.
+
+        While this method runs, the engine's timers are scheduled on the
+        event loop and coroutines returned by recognition observers are run
+        on it.  Arguments are passed to the engine's :meth:`do_recognition`
+        method.
+
+        By default, :meth:`do_recognition` is run in the event loop's
+        default executor.
+        """
+        from dragonfly.engines.base.asyncio_support import run_async
+        return run_async(self, *args, **kwargs)
+
+    def recognize_once(self, *args, **kwargs):
+        """
+        Coroutine method for recognizing a single utterance without
+        blocking the running :mod:`asyncio` event loop.
+
+        This method should be implemented by each engine that supports it.
+        """
+        raise NotImplementedError("Virtual method not implemented for"
+                                  " engine %s." % self)
+
+    def mimic_async(self, words, **kwargs):
+        """
+        Coroutine method for mimicking a recognition of the given *words*.
+
+        This awaitable variant of :meth:`mimic` also waits for any
+        coroutines returned by recognition observers during the
+        recognition.
+        """
+        from dragonfly.engines.base.asyncio_support import mimic_async
+        return mimic_async(self, words, **kwargs)
+
     def process_grammars_context(self, window=None):
         """
             Enable/disable grammars & rules based on their current contexts.
@@ -275,7 +322,8 @@ class EngineBase(object):
             be passed in as an optimization if it has already been gathered.
 
             The user may wish to call this method to update if custom
-            contexts are used.
+            contexts are used.  Alternatively, :meth:`watch_foreground`
+            may be used to call it automatically.
 
             .. note ::
 
@@ -285,8 +333,8 @@ class EngineBase(object):
         """
 
         if window is None:
-            from dragonfly.windows.window import Window
-            window = Window.get_foreground()
+            from dragonfly.windows.foreground import get_foreground
+            window = get_foreground()
 
         # Disable recognition observers for the duration.
         self.disable_recognition_observers()
@@ -295,6 +343,46 @@ class EngineBase(object):
                                   window.handle)
         self.enable_recognition_observers()
 
+    def watch_foreground(self, enabled=True):
+        """
+            Enable or disable calling :meth:`process_grammars_context`
+            whenever the foreground window or its title changes.
+
+            This uses the shared
+            :class:`dragonfly.windows.foreground.ForegroundWatcher`
+            instance, which is started if necessary.  Contexts are not
+            processed on the watcher's thread; each change schedules a
+            one-shot engine timer instead, so that grammar code runs
+            wherever the engine runs its timers.  Changes made before the
+            timer is called are processed once, using the latest window.
+        """
+        from dragonfly.windows.foreground import get_foreground_watcher
+        watcher = get_foreground_watcher()
+        if enabled:
+            watcher.add_listener(self._foreground_changed)
+        else:
+            watcher.remove_listener(self._foreground_changed)
+
+    def _foreground_changed(self, window):
+        # Called from the foreground watcher's thread.  Schedule context
+        #  processing unless it is already pending.
+        with self._foreground_lock:
+            self._foreground_window = window
+            if self._foreground_pending:
+                return
+            self._foreground_pending = True
+        self.create_timer(self._process_foreground_change, 0,
+                          repeating=False)
+
+    def _process_foreground_change(self):
+        # Called from the engine's timer manager.
+        with self._foreground_lock:
+            window = self._foreground_window
+            self._foreground_window = None
+            self._foreground_pending = False
+        if window is not None:
+            self.process_grammars_context(window)
+
     def dispatch_recognition_other(self, grammar, words, results):
         """
             Dispatch recognition data for a grammar to all other grammars
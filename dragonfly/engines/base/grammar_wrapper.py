@@ -33,6 +33,7 @@ except ImportError:
     from inspect import getargspec
 
 from dragonfly.grammar import state as state_
+from dragonfly.metrics import get_latency_metrics
 
 
 #---------------------------------------------------------------------------
@@ -107,18 +108,24 @@ class GrammarWrapperBase(object):
             self.engine.dispatch_recognition_other(self.grammar, words,
                                                    results)
 
-        # Call the grammar's general process_recognition method, if it is
-        #  present.  Stop if it returns False.
-        stop = self.recognition_process_callback(words, results) is False
-        if stop: return
-
-        # Process the recognition.
+        # Record latency metrics for the rest of processing, if enabled.
+        metrics = get_latency_metrics()
+        metrics.mark("processing", first=True)
         try:
-            root = state.build_parse_tree()
-            rule.process_recognition(root)
-        except Exception as e:
-            self._log.exception("Failed to process rule %r: %s",
-                                rule.name, e)
+            # Call the grammar's general process_recognition method, if it
+            #  is present.  Stop if it returns False.
+            stop = self.recognition_process_callback(words, results) is False
+            if stop: return
+
+            # Process the recognition.
+            try:
+                root = state.build_parse_tree()
+                rule.process_recognition(root)
+            except Exception as e:
+                self._log.exception("Failed to process rule %r: %s",
+                                    rule.name, e)
+        finally:
+            metrics.end_utterance(self.grammar.name, rule.name)
 
     def recognition_other_callback(self, words, results):
         func = getattr(self.grammar, "process_recognition_other", None)
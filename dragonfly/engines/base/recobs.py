@@ -26,6 +26,12 @@ Recognition observer base class
 
 import logging
 
+try:
+    from inspect import iscoroutine
+except ImportError:
+    # Coroutines are not available on Python 2.
+    iscoroutine = lambda obj: False
+
 try:
     from inspect import getfullargspec as getargspec
 except ImportError:
@@ -97,11 +103,23 @@ class RecObsManagerBase(object):
 
             # Invoke the callback function, catching and logging exceptions.
             try:
-                func(**func_kwargs)
+                result = func(**func_kwargs)
             except Exception as e:
                 self._log.exception("Exception during %s() method of"
                                     " recognition observer %s: %s",
                                     cb_name, observer, e)
+                continue
+
+            # Schedule coroutines returned by asynchronous callbacks.
+            if iscoroutine(result):
+                self._schedule_coroutine(result, cb_name, observer)
+
+    def _schedule_coroutine(self, coroutine, cb_name, observer):
+        # Import locally because asyncio support requires Python 3.5+.
+        from dragonfly.engines.base.asyncio_support import schedule_coroutine
+        description = ("%s() method of recognition observer %s"
+                       % (cb_name, observer))
+        schedule_coroutine(self._engine, coroutine, description)
 
     def notify_begin(self):
         self._process_observer_callbacks("on_begin", [])
@@ -48,3 +48,30 @@ class SpeakerBase(object):
     def speak(self, text):
         """ Speak the given *text* using text-to-speech. """
         raise NotImplementedError("Virtual method not implemented.")
+
+    def speak_async(self, text):
+        """
+        Queue the given *text* to be spoken using text-to-speech and return
+        without waiting for it to be spoken.
+
+        Speakers which cannot speak asynchronously speak the text before
+        returning.
+        """
+        self.speak(text)
+
+    def wait(self, timeout=None):
+        """
+        Wait until all queued text has been spoken.
+
+        :param timeout: maximum number of seconds to wait, or ``None`` to
+            wait indefinitely.
+        :returns: whether all queued text was spoken before the timeout.
+        :rtype: bool
+        """
+        return True
+
+    def flush(self):
+        """ Discard queued text which is not being spoken yet. """
+
+    def interrupt(self):
+        """ Stop speaking the current text and discard queued text. """
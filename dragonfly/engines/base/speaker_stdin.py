@@ -22,6 +22,20 @@
 Stdin Speaker classes
 ============================================================================
 
+These speaker classes run a command-line program for each utterance,
+passing the text on standard input.  By default, :meth:`speak` blocks until
+the text has been spoken and raises an error if the program fails.  Text
+passed to :meth:`speak_async`, or to :meth:`speak` if :attr:`asynchronous`
+is ``True``, is queued and spoken in order by a background worker thread,
+so that the calling thread, often the recognition thread, is not blocked.
+Errors are then logged instead of raised.  The :meth:`wait` method may be
+used to wait until all queued text has been spoken.
+
+A new process is started for each utterance because neither eSpeak nor CMU
+Flite report when they have finished speaking text read from a long-lived
+standard input stream.  Starting the process takes little time compared
+with speaking the text.
+
 """
 
 from __future__                      import print_function
@@ -29,36 +43,86 @@ from __future__                      import print_function
 from locale                          import getpreferredencoding
 from subprocess                      import Popen, PIPE
 import sys
+import threading
+import time
 
 from six                             import text_type, binary_type
+from six.moves                       import queue
 
 from dragonfly.engines.base.speaker  import SpeakerBase
 
+
+# Use a monotonic clock if one is available.
+monotonic = getattr(time, "monotonic", time.time)
+
+
 #---------------------------------------------------------------------------
 
 class StdinSpeakerBase(SpeakerBase):
 
     _read_stdin_command = []
 
+    #: Whether :meth:`speak` queues the text and returns without waiting
+    #: for it to be spoken, like :meth:`speak_async`.  If this is ``False``,
+    #: the default, :meth:`speak` waits until any previously queued text and
+    #: the given text have been spoken.
+    asynchronous = False
+
+    _worker_lock = threading.Lock()
+    _thread = None
+
     @classmethod
     def is_available(cls):
         raise NotImplementedError("Virtual method not implemented.")
 
-    def speak(self, text):
-        """ Speak the given *text* using text-to-speech. """
+    def _check_command(self):
         if len(self._read_stdin_command) == 0:
             raise NotImplementedError("Virtual method not implemented.")
 
-        # Encode input, if necessary.
+    #-----------------------------------------------------------------------
+    # Worker thread methods.
+
+    def _start_worker(self):
+        # Start the worker thread, if necessary.
+        with self._worker_lock:
+            if self._thread is not None:
+                return
+            self._queue = queue.Queue()
+            self._condition = threading.Condition()
+            self._pending = 0
+            self._process = None
+            self._thread = threading.Thread(target=self._run,
+                                            name="dragonfly-speaker")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            text = self._queue.get()
+            try:
+                self._synthesize(text)
+            except Exception as e:
+                self._log.exception("Failed to speak %r: %s", text, e)
+            finally:
+                with self._condition:
+                    self._pending -= 1
+                    self._condition.notify_all()
+
+    def _synthesize(self, text):
+        # Speak *text* using the specified command.
         encoding = getpreferredencoding()
         if isinstance(text, text_type):
             text = text.encode(encoding)
-
-        # Speak *text* using the specified command.
-        p = Popen(self._read_stdin_command, stdout=PIPE, stdin=PIPE,
-                  stderr=PIPE)
-        stdout, stderr = p.communicate(input=text)
-        returncode = p.wait()
+        with self._condition:
+            p = Popen(self._read_stdin_command, stdout=PIPE, stdin=PIPE,
+                      stderr=PIPE)
+            self._process = p
+        try:
+            stdout, stderr = p.communicate(input=text)
+            returncode = p.wait()
+        finally:
+            with self._condition:
+                self._process = None
 
         # Decode output if it is binary.
         if isinstance(stdout, binary_type): stdout = stdout.decode(encoding)
@@ -66,10 +130,80 @@ class StdinSpeakerBase(SpeakerBase):
         if stdout: print(stdout)
         if stderr: print(stderr, file=sys.stderr)
 
-        # Handle non-zero return codes.
-        if returncode != 0:
+        # Handle non-zero return codes.  Negative return codes mean that
+        #  the process was terminated by interrupt().
+        if returncode > 0:
             raise RuntimeError("%s exited with non-zero return code %d"
-                               % (self.name, p.returncode))
+                               % (self.name, returncode))
+
+    #-----------------------------------------------------------------------
+    # Speaker methods.
+
+    def speak(self, text):
+        """
+        Speak the given *text* using text-to-speech.
+
+        This method waits until the text has been spoken and raises an
+        error if the command fails, unless :attr:`asynchronous` is
+        ``True``, in which case it behaves like :meth:`speak_async`.
+        """
+        if self.asynchronous:
+            self.speak_async(text)
+            return
+
+        # Speak the text in this thread after any queued text, so that
+        #  errors are raised to the caller.  The worker state is still
+        #  used so that interrupt() can stop the process.
+        self._check_command()
+        self._start_worker()
+        self.wait()
+        self._synthesize(text)
+
+    def speak_async(self, text):
+        self._check_command()
+        self._start_worker()
+        with self._condition:
+            self._pending += 1
+        self._queue.put(text)
+
+    def wait(self, timeout=None):
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._condition:
+            while self._pending:
+                if deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def flush(self):
+        if self._thread is None:
+            return
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify_all()
+
+    def interrupt(self):
+        if self._thread is None:
+            return
+        self.flush()
+        with self._condition:
+            process = self._process
+            if process is not None and process.poll() is None:
+                try:
+                    process.terminate()
+                except OSError:
+                    pass
 
 
 #---------------------------------------------------------------------------
@@ -24,10 +24,18 @@ Multiplexing interface to a timer
 
 """
 
+import heapq
+import itertools
 import time
 import logging
 
-from threading import Thread, current_thread, RLock
+from threading import Thread, current_thread, RLock, Condition
+
+#---------------------------------------------------------------------------
+
+# Use a monotonic clock for timer deadlines if one is available so that
+#  system clock adjustments don't affect when timers are called.
+monotonic = getattr(time, "monotonic", time.time)
 
 #---------------------------------------------------------------------------
 
@@ -47,6 +55,11 @@ class Timer(object):
 
     Instances of this class are normally initialised from
     :meth:`engine.create_timer`.
+
+    Repeating timers are scheduled relative to their previous deadline,
+    not to the time the function was actually called, so the call times
+    of a timer do not drift.  If a timer falls behind by more than one
+    interval, the missed calls are skipped.
     """
 
     _log = logging.getLogger("engine.timer")
@@ -68,9 +81,9 @@ class Timer(object):
         """
         if self.active:
             return
-        self.manager.add_timer(self)
+        self.next_time = monotonic() + self.interval
         self.active = True
-        self.next_time = time.time() + self.interval
+        self.manager.add_timer(self)
 
     def stop(self):
         """ Stop calling the timer's function on an interval. """
@@ -86,7 +99,17 @@ class Timer(object):
 
         This method is normally called by the timer manager.
         """
-        self.next_time = time.time() + self.interval
+        now = monotonic()
+        next_time = self.next_time
+        if next_time is None or next_time > now:
+            # Called early or manually: start a new interval from now.
+            next_time = now + self.interval
+        else:
+            # Called on (or after) the deadline: keep to the schedule.
+            next_time += self.interval
+            if next_time <= now:
+                next_time = now + self.interval
+        self.next_time = next_time
         try:
             self.function()
         except Exception as e:
@@ -96,7 +119,14 @@ class Timer(object):
 
 
 class TimerManagerBase(object):
-    """ Base timer manager class. """
+    """
+    Base timer manager class.
+
+    Active timers are kept in a min-heap ordered by their next deadline.
+    :meth:`main_callback` only looks at timers that are due and
+    :meth:`time_until_next_timer` reports how long the manager may sleep
+    before the next timer is due.
+    """
 
     _log = logging.getLogger("engine.timer")
 
@@ -105,13 +135,57 @@ class TimerManagerBase(object):
         self.engine = engine
         self.timers = []
         self._lock = RLock()
+        self._condition = Condition(self._lock)
+        self._heap = []
+        self._heap_entries = {}
+        self._counter = itertools.count()
         self._enabled = True
         self._active = False
 
+    def _schedule(self, timer):
+        # Push a heap entry for the timer, invalidating any existing entry.
+        # This method must be called with the lock held.
+        entry = self._heap_entries.pop(timer, None)
+        if entry is not None:
+            entry[-1] = None
+        entry = [timer.next_time, next(self._counter), timer]
+        self._heap_entries[timer] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _unschedule(self, timer):
+        # Invalidate the timer's heap entry.  It is discarded lazily when
+        # it reaches the top of the heap.  This method must be called with
+        # the lock held.
+        entry = self._heap_entries.pop(timer, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def _peek(self):
+        # Return the earliest valid heap entry, or None.  This method must
+        # be called with the lock held.
+        heap = self._heap
+        while heap:
+            entry = heap[0]
+            timer = entry[-1]
+            if timer is None:
+                heapq.heappop(heap)
+            elif timer.next_time != entry[0]:
+                # The timer's deadline was changed externally, e.g. by
+                # calling Timer.call() directly.  Reschedule it.
+                heapq.heappop(heap)
+                del self._heap_entries[timer]
+                if timer.next_time is not None:
+                    self._schedule(timer)
+            else:
+                return entry
+        return None
+
     def add_timer(self, timer):
         """ Add a timer and activate the main callback if required. """
         with self._lock:
             self.timers.append(timer)
+            self._schedule(timer)
+            self._condition.notify_all()
         if len(self.timers) == 1 and self._enabled:
             self._activate_main_callback(self.main_callback,
                                          self.interval)
@@ -122,6 +196,8 @@ class TimerManagerBase(object):
         try:
             with self._lock:
                 self.timers.remove(timer)
+                self._unschedule(timer)
+                self._condition.notify_all()
         except Exception as e:
             self._log.exception("Failed to remove timer: %s" % e)
             return
@@ -129,6 +205,21 @@ class TimerManagerBase(object):
             self._deactivate_main_callback()
             self._active = False
 
+    def time_until_next_timer(self):
+        """
+        Get the number of seconds until the next timer is due.
+
+        Returns ``None`` if there are no active timers.  The returned value
+        is never negative; zero means at least one timer is due now.
+
+        :rtype: float | None
+        """
+        with self._lock:
+            entry = self._peek()
+        if entry is None:
+            return None
+        return max(0.0, entry[0] - monotonic())
+
     def enable(self):
         """
         Method to re-enable the main timer callback.
@@ -156,14 +247,29 @@ class TimerManagerBase(object):
             self._deactivate_main_callback()
             self._active = False
 
-        now = time.time()
-        for c in tuple(self.timers):
-            if c.next_time < now:
-                try:
-                    c.call()
-                except Exception as e:
-                    self._log.exception("Exception occurred during"
-                                        " timer callback: %s" % (e,))
+        # Call each timer that is due.  Timers are taken off the heap
+        # before they are called and rescheduled afterwards, so that
+        # timer functions may safely start or stop timers themselves.
+        now = monotonic()
+        while True:
+            with self._lock:
+                entry = self._peek()
+                if entry is None or entry[0] > now:
+                    break
+                heapq.heappop(self._heap)
+                timer = entry[-1]
+                del self._heap_entries[timer]
+
+            try:
+                timer.call()
+            except Exception as e:
+                self._log.exception("Exception occurred during"
+                                    " timer callback: %s" % (e,))
+
+            with self._lock:
+                if (timer.active and timer not in self._heap_entries
+                        and timer in self.timers):
+                    self._schedule(timer)
 
     def _activate_main_callback(self, callback, msec):
         """
@@ -189,6 +295,10 @@ class ThreadedTimerManager(TimerManagerBase):
     This class is used by the "text" engine. It is only suitable for engine
     backends with no recognition loop to execute timer functions on.
 
+    The thread sleeps until the next timer is due or until a timer is
+    added or removed.  The *interval* argument is kept for compatibility
+    and is not used for polling.
+
     .. warning::
 
        The timer interface is **not** thread-safe. Use the :meth:`enable`
@@ -209,12 +319,20 @@ class ThreadedTimerManager(TimerManagerBase):
 
         def run():
             while self._running:
-                time.sleep(sec)
+                with self._condition:
+                    # Wait until the next timer is due, or until a timer
+                    # is added or removed.
+                    delay = self.time_until_next_timer()
+                    if delay is None or delay > 0:
+                        self._condition.wait(delay)
+                        continue
+
+                # Call due timers without holding the lock.
                 callback()
 
         self._running = True
         self._thread = Thread(target=run)
-        self._thread.setDaemon(True)
+        self._thread.daemon = True
         self._thread.start()
 
     def _deactivate_main_callback(self):
@@ -223,7 +341,9 @@ class ThreadedTimerManager(TimerManagerBase):
         # after 5 seconds.
         should_join = (self._thread and self._thread.is_alive() and
                        self._thread is not current_thread())
-        self._running = False
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
         if should_join:
             timeout = 5
             self._thread.join(timeout=timeout)
@@ -235,12 +355,15 @@ class ThreadedTimerManager(TimerManagerBase):
 class DelegateTimerManagerInterface(object):
     """
     DelegateTimerManager interface.
+
+    Engine classes using this interface are expected to set the
+    ``_timer_manager`` attribute to a :class:`DelegateTimerManager`
+    instance.
     """
 
     def __init__(self):
         self._timer_callback = None
         self._timer_interval = None
-        self._timer_next_time = 0
 
     def set_timer_callback(self, callback, sec):
         """
@@ -253,18 +376,38 @@ class DelegateTimerManagerInterface(object):
         """
         self._timer_callback = callback
         self._timer_interval = sec
-        self._timer_next_time = time.time()
 
-    def call_timer_callback(self):
-        """"""
+    def time_until_next_timer(self):
+        """
+        Get the number of seconds until the timer callback should next be
+        called.
+
+        Engine recognition loops can use this to block for at most this
+        long.  Returns ``None`` if there are no active timers.
+
+        :rtype: float | None
+        """
         if not (self._timer_callback and self._timer_interval):
-            return
+            return None
+        return self._timer_manager.time_until_next_timer()
 
-        now = time.time()
-        if self._timer_next_time < now:
-            self._timer_next_time = now + self._timer_interval
+    def call_timer_callback(self):
+        """"""
+        delay = self.time_until_next_timer()
+        if delay is not None and delay <= 0:
             self._timer_callback()
 
+    def timers_changed(self):
+        """
+        Method called when a timer is added or removed, possibly from
+        another thread.
+
+        Engine recognition loops that block for the time returned by
+        :meth:`time_until_next_timer` can override this to wake up and
+        block again for the new time.  The default implementation does
+        nothing.
+        """
+
 
 class DelegateTimerManager(TimerManagerBase):
     """
@@ -278,6 +421,14 @@ class DelegateTimerManager(TimerManagerBase):
     def __init__(self, interval, engine):
         TimerManagerBase.__init__(self, interval, engine)
 
+    def add_timer(self, timer):
+        TimerManagerBase.add_timer(self, timer)
+        self.engine.timers_changed()
+
+    def remove_timer(self, timer):
+        TimerManagerBase.remove_timer(self, timer)
+        self.engine.timers_changed()
+
     def _activate_main_callback(self, callback, sec):
         """"""
         self.engine.set_timer_callback(callback, sec)
@@ -31,6 +31,7 @@ from six                        import integer_types
 
 from dragonfly.actions.actions  import Playback
 from dragonfly.engines          import get_engine
+from dragonfly.metrics          import get_latency_metrics
 
 
 #---------------------------------------------------------------------------
@@ -195,3 +196,52 @@ class PlaybackHistory(RecognitionHistory):
 
     def __getslice__(self, i, j):
         return self.__getitem__(slice(i, j))
+
+
+#---------------------------------------------------------------------------
+
+class LatencyMetricsObserver(RecognitionObserver):
+    """
+        Recognition observer for recording end-to-end utterance latency.
+
+        Registering an instance of this class enables the shared
+        :class:`dragonfly.metrics.LatencyMetrics` collector returned by
+        :func:`dragonfly.metrics.get_latency_metrics`.  Speech start and
+        decoding times are recorded by this observer; the remaining stages
+        are recorded by grammar rule processing, actions and keyboard
+        events.
+
+        Sub-classes may override :meth:`on_latency` to receive the stage
+        timings of each completed utterance.
+
+    """
+
+    def __init__(self):
+        RecognitionObserver.__init__(self)
+        self.metrics = get_latency_metrics()
+
+    def register(self):
+        RecognitionObserver.register(self)
+        self.metrics.enabled = True
+        self.metrics.add_listener(self.on_latency)
+
+    def unregister(self):
+        RecognitionObserver.unregister(self)
+        self.metrics.remove_listener(self.on_latency)
+
+    def on_begin(self):
+        self.metrics.begin_utterance()
+
+    def on_recognition(self, words, results=None):
+        self.metrics.mark("decoded")
+
+    def on_failure(self, results=None):
+        self.metrics.mark("decoded")
+        self.metrics.end_utterance(None, None)
+
+    def on_latency(self, timings):
+        """
+        Method called with the
+        :class:`dragonfly.metrics.UtteranceTimings` object of each
+        completed utterance.
+        """
@@ -73,25 +73,28 @@ class CallbackRecognitionObserver(RecognitionObserver):
                 func_kwargs = {k: v for (k, v) in func_kwargs.items()
                                if k in arg_names or k in required_names}
 
-        # Call the callback function.
-        self._function(**func_kwargs)
+        # Call the callback function, returning the result so that
+        # coroutine functions may be used.
+        return self._function(**func_kwargs)
 
     def on_begin(self):
         """"""
-        self._process_recognition_event("on_begin", [])
+        return self._process_recognition_event("on_begin", [])
 
     def on_recognition(self, words, results):
         """"""
-        self._process_recognition_event("on_recognition", ["words"],
-                                        words=words, results=results)
+        return self._process_recognition_event("on_recognition", ["words"],
+                                               words=words, results=results)
 
     def on_failure(self, results):
         """"""
-        self._process_recognition_event("on_failure", [], results=results)
+        return self._process_recognition_event("on_failure", [],
+                                               results=results)
 
     def on_end(self, results):
         """"""
-        self._process_recognition_event("on_end", [], results=results)
+        return self._process_recognition_event("on_end", [],
+                                               results=results)
 
 
 def register_beginning_callback(function):
@@ -34,6 +34,21 @@ else:
     import importlib.util
 
 
+# --------------------------------------------------------------------------
+# Paths of currently loaded command module files.
+
+_loaded_paths = frozenset()
+
+
+def get_loaded_module_paths():
+    """
+    Get the absolute paths of the currently loaded command module files.
+
+    :rtype: frozenset
+    """
+    return _loaded_paths
+
+
 # --------------------------------------------------------------------------
 # Command module class; wraps a single command-module.
 
@@ -55,6 +70,7 @@ class CommandModule(object):
         return self._loaded
 
     def load(self):
+        global _loaded_paths
         if self._loaded: return
         self._log.info("%s: Loading module: '%s'", self, self._path)
 
@@ -81,8 +97,10 @@ class CommandModule(object):
             return
 
         self._loaded = True
+        _loaded_paths = _loaded_paths | frozenset([self._path])
 
     def unload(self):
+        global _loaded_paths
         if not self._loaded: return
         self._log.info("%s: Unloading module: '%s'", self, self._path)
 
@@ -99,6 +117,7 @@ class CommandModule(object):
         del sys.modules[self._name]
 
         self._loaded = False
+        _loaded_paths = _loaded_paths - frozenset([self._path])
 
     def check_freshness(self):
         pass
@@ -21,7 +21,8 @@
 """
 Dragonfly's logging infrastructure is defined in the ``dragonfly.log``
 module. It defines sane defaults for the various loggers used in the library
-as well as functions for setting up logging and tracing.
+as well as functions for setting up logging and tracing.  For profiling,
+see :mod:`dragonfly.profiler`.
 
 Adjusting logger levels
 ----------------------------------------------------------------------------
@@ -48,15 +49,45 @@ a logging handler to avoid messages like tho following::
 
     No handlers could be found for logger "typeables"
 
+Queued logging
+----------------------------------------------------------------------------
+
+By default, log messages are written to stderr and the log file on whichever
+thread logged them, which may be the engine's recognition thread.  Passing
+``use_queue=True`` to :meth:`setup_log` instead puts log records on a
+queue that is drained by a single background writer thread:
+
+..  code::
+
+    from dragonfly.log import setup_log
+    setup_log(use_queue=True)
+
+In this mode, the writer flushes output once per batch of records and
+rotates the log file by size (see the *max_bytes* and *backup_count*
+parameters).  If the writer cannot keep up, for example because the disk
+is unresponsive, new records are dropped instead of blocking the thread
+that logged them.  Queued logging requires Python 3.2 or higher.
+
 
 Functions
 ----------------------------------------------------------------------------
 
 """
 
+import atexit
 import sys
 import os.path
 import logging
+import logging.handlers
+import threading
+
+from six.moves import queue
+
+try:
+    from logging.handlers import QueueHandler
+except ImportError:
+    # Queued logging is not available on Python 2.
+    QueueHandler = None
 
 
 # --------------------------------------------------------------------------
@@ -175,6 +206,129 @@ def _setup_file_handler():
     return _file_handler
 
 
+# --------------------------------------------------------------------------
+# Classes for queued logging.
+
+class _BatchFlushMixin(object):
+    # Defer flushing of the handler's stream until flush_batch() is called.
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        logging.StreamHandler.flush(self)
+
+    def close(self):
+        self.flush_batch()
+        super(_BatchFlushMixin, self).close()
+
+
+class _BatchStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class _BatchRotatingFileHandler(_BatchFlushMixin,
+                                logging.handlers.RotatingFileHandler):
+    pass
+
+
+if QueueHandler is not None:
+    class _DroppingQueueHandler(QueueHandler):
+        # Queue handler that drops records instead of raising an error or
+        #  blocking if the queue is full.
+
+        def __init__(self, record_queue):
+            QueueHandler.__init__(self, record_queue)
+            self.dropped = 0
+
+        def enqueue(self, record):
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+
+
+class QueueWriter(object):
+    """
+    Background writer for queued log records.
+
+    Records taken from the queue are dispatched to each handler according
+    to a precomputed dictionary of ``{name: (level, ...)}`` thresholds,
+    mirroring the :class:`NameLevelFilter` objects used by
+    :class:`DispatchingHandler`.  Records whose names are not in the
+    dictionary are passed to every handler.
+
+    Each handler is flushed once per batch of records instead of once
+    per record.
+    """
+
+    _sentinel = object()
+
+    def __init__(self, record_queue, handlers, thresholds,
+                 max_batch_size=256):
+        self.queue = record_queue
+        self.handlers = handlers
+        self.thresholds = thresholds
+        self.max_batch_size = max_batch_size
+        self.queue_handler = None
+        self._thread = None
+
+    def start(self):
+        """ Start the writer thread. """
+        self._thread = threading.Thread(target=self._run,
+                                        name="dragonfly-log-writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """ Write queued records, then stop the writer thread. """
+        if not self._thread:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        running = True
+        while running:
+            # Wait for a record, then take any others that are waiting.
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            for record in batch:
+                if record is self._sentinel:
+                    running = False
+                    continue
+                self._write(record)
+
+            self._report_dropped()
+            for handler in self.handlers:
+                try:
+                    handler.flush_batch()
+                except Exception:
+                    pass
+
+    def _write(self, record):
+        levels = self.thresholds.get(record.name)
+        for i, handler in enumerate(self.handlers):
+            if levels is None or record.levelno >= levels[i]:
+                handler.handle(record)
+
+    def _report_dropped(self):
+        queue_handler = self.queue_handler
+        if not (queue_handler and queue_handler.dropped):
+            return
+        dropped, queue_handler.dropped = queue_handler.dropped, 0
+        record = logging.LogRecord("log", logging.WARNING, __file__, 0,
+                                   "%d log records were dropped",
+                                   (dropped,), None)
+        self._write(record)
+
+
 # --------------------------------------------------------------------------
 
 _stderr_handler = None
@@ -183,7 +337,70 @@ _stderr_filters = {}
 _file_filters = {}
 
 
-def setup_log(use_stderr=True, use_file=True, use_stdout=False):
+_queue_writer = None
+
+
+def _stop_queue_writer():
+    global _queue_writer
+    if _queue_writer:
+        _queue_writer.stop()
+        for handler in _queue_writer.handlers:
+            handler.close()
+        _queue_writer = None
+
+atexit.register(_stop_queue_writer)
+
+
+def _setup_queued_log(use_stderr, use_file, max_bytes, backup_count,
+                      queue_size):
+    global _queue_writer
+
+    if QueueHandler is None:
+        raise RuntimeError("queued logging requires Python 3.2 or higher")
+
+    # Create the writer's handlers and the (name, level) lookup table.
+    handlers = []
+    if use_stderr:
+        handler = _BatchStreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(name)s (%(levelname)s):"
+                                               " %(message)s"))
+        handlers.append(handler)
+    if use_file:
+        home_path = os.path.expanduser("~")
+        log_file_path = os.path.join(home_path, ".dragonfly.log")
+        handler = _BatchRotatingFileHandler(log_file_path,
+                                            maxBytes=max_bytes,
+                                            backupCount=backup_count,
+                                            delay=True)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s"
+                                               " (%(levelname)s):"
+                                               " %(message)s"))
+        handlers.append(handler)
+    thresholds = {}
+    for name, (stderr_level, file_level) in default_levels.items():
+        levels = []
+        if use_stderr: levels.append(stderr_level)
+        if use_file: levels.append(file_level)
+        thresholds[name] = tuple(levels)
+
+    # Start the writer and register a single queue handler for each
+    #  default logger.
+    record_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = _DroppingQueueHandler(record_queue)
+    _queue_writer = QueueWriter(record_queue, handlers, thresholds)
+    _queue_writer.queue_handler = queue_handler
+    _queue_writer.start()
+    for name, (stderr_level, file_level) in default_levels.items():
+        _dispatching_handlers[name] = queue_handler
+        logger = logging.getLogger(name)
+        logger.addHandler(queue_handler)
+        logger.setLevel(min(stderr_level, file_level))
+        logger.propagate = False
+
+
+def setup_log(use_stderr=True, use_file=True, use_stdout=False,
+              use_queue=False, max_bytes=10 * 1024 * 1024, backup_count=3,
+              queue_size=10000):
     """
     Setup Dragonfly's logging infrastructure with sane defaults.
 
@@ -193,19 +410,39 @@ def setup_log(use_stderr=True, use_file=True, use_stdout=False):
       *~/.dragonfly.log* log file (default: True).
     :param use_stdout: this parameter does nothing andhas been left in for
       backwards-compatibility (default: False).
+    :param use_queue: whether to write log messages from a background
+      thread (default: False).
+    :param max_bytes: size in bytes at which the log file is rotated if
+      *use_queue* is true (default: 10 MiB).  Zero disables rotation.
+    :param backup_count: number of rotated log files to keep if
+      *use_queue* is true (default: 3).
+    :param queue_size: maximum number of log records waiting to be
+      written if *use_queue* is true (default: 10000).  Further records
+      are dropped.
     :type use_stderr: bool
     :type use_file: bool
     :type use_stdout: bool
+    :type use_queue: bool
+    :type max_bytes: int
+    :type backup_count: int
+    :type queue_size: int
 
     """
     global _dispatching_handlers
     global _stderr_handler, _file_handler
     global _stderr_filters, _file_filters
 
-    # Remove any previously created dispatching handlers.
+    # Remove any previously created dispatching handlers and stop the
+    #  queue writer, if necessary.
     for name, handler in _dispatching_handlers.items():
         logger = logging.getLogger(name)
         logger.removeHandler(handler)
+    _stop_queue_writer()
+
+    if use_queue:
+        _setup_queued_log(use_stderr, use_file, max_bytes, backup_count,
+                          queue_size)
+        return
 
     # Setup default handlers.
     if use_stderr:
@@ -239,11 +476,20 @@ def setup_tracing(output, limit=None):
     """
     Setup call tracing for low-level debugging.
 
+    .. deprecated:: 1.0.0-rc3
+       Tracing slows the process down by orders of magnitude.  Use
+       :class:`dragonfly.profiler.SamplingProfiler` instead.
+
     :param output: the file to write tracing messages to.
     :type output: file
     :param limit: the recursive depth limit for tracing (default: None).
     :type limit: int|None
     """
+    import warnings
+    warnings.warn("setup_tracing() is deprecated; use "
+                  "dragonfly.profiler.SamplingProfiler instead",
+                  DeprecationWarning, stacklevel=2)
+
     from pkg_resources import resource_filename
     library_prefix = os.path.dirname(resource_filename(__name__, "setup.py"))
     print("prefix:", library_prefix)
@@ -0,0 +1,389 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Latency metrics
+============================================================================
+
+This module measures the end-to-end latency of each utterance, i.e. the
+time from the start of speech until the last keystroke of the resulting
+actions has been sent.  The time of each of the following stages is
+recorded relative to the start of speech, using a monotonic clock:
+
+ - ``"decoded"`` -- the engine finished decoding the utterance.
+ - ``"processing"`` -- grammar rule processing started.
+ - ``"action"`` -- the first action was executed.
+ - ``"keyboard"`` -- the last keyboard events were sent.
+ - ``"done"`` -- grammar rule processing finished.
+
+Rolling latency percentiles (p50, p95 and p99) are kept for each grammar
+and rule.  Metrics collection is disabled by default.  It is enabled by
+registering a :class:`dragonfly.grammar.recobs.LatencyMetricsObserver`,
+or by calling :func:`enable_latency_metrics`::
+
+    from dragonfly.metrics import enable_latency_metrics
+
+    metrics = enable_latency_metrics()
+    metrics.start_dump("latency.prom", interval=60, format="prometheus")
+
+    # ... later ...
+    print(metrics.get_percentiles())
+
+Recognition failures are recorded under the ``None`` grammar and rule
+names.
+
+
+Classes and functions
+----------------------------------------------------------------------------
+
+"""
+
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+#---------------------------------------------------------------------------
+
+# Use a monotonic clock if one is available.
+monotonic = getattr(time, "monotonic", time.time)
+
+
+#---------------------------------------------------------------------------
+
+class UtteranceTimings(object):
+    """
+    Stage timings of a single utterance.
+
+    :ivar grammar: name of the grammar that processed the utterance, or
+        ``None`` for recognition failures.
+    :ivar rule: name of the rule that processed the utterance, or ``None``.
+    :ivar stages: dictionary of stage names and seconds since the start of
+        speech.
+    """
+
+    def __init__(self, start_time):
+        self.start_time = start_time
+        self.grammar = None
+        self.rule = None
+        self.stages = {}
+
+    def __repr__(self):
+        stages = ", ".join("%s=%.1fms" % (stage, seconds * 1000)
+                           for stage, seconds in sorted(self.stages.items(),
+                                                        key=lambda i: i[1]))
+        return "%s(%r, %r, %s)" % (self.__class__.__name__, self.grammar,
+                                   self.rule, stages)
+
+
+class LatencyMetrics(object):
+    """
+    Latency metrics collector.
+
+    Constructor arguments:
+     - *window* (*int*) -- number of recent utterances per grammar and rule
+       to calculate percentiles from (default: 1000).
+
+    The instrumentation hooks call :meth:`begin_utterance`, :meth:`mark`
+    and :meth:`end_utterance` on the shared instance returned by
+    :func:`get_latency_metrics`.  These methods do nothing while the
+    collector is disabled.
+    """
+
+    _log = logging.getLogger("metrics")
+
+    #: Stage names in the order they normally occur.
+    stages = ("decoded", "processing", "action", "keyboard", "done")
+
+    #: Percentiles reported by :meth:`get_percentiles`.
+    percentiles = (50, 95, 99)
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.enabled = False
+        self._current = None
+        self._samples = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._dump_thread = None
+        self._dump_stop_event = threading.Event()
+
+    #-----------------------------------------------------------------------
+    # Instrumentation methods.
+
+    def begin_utterance(self):
+        """ Start timing a new utterance. """
+        if self.enabled:
+            self._current = UtteranceTimings(monotonic())
+
+    def mark(self, stage, first=False):
+        """
+        Record the time of a stage of the current utterance.
+
+        If *first* is true, only the first time the stage is reached is
+        recorded.  Otherwise, the last time is recorded.  Stages reached
+        outside of an utterance, e.g. by actions executed from timers, are
+        ignored.
+        """
+        current = self._current
+        if current is None or not self.enabled:
+            return
+        if first and stage in current.stages:
+            return
+        current.stages[stage] = monotonic() - current.start_time
+
+    def end_utterance(self, grammar=None, rule=None):
+        """
+        Finish timing the current utterance and record its stage timings
+        under the given grammar and rule names.
+        """
+        current, self._current = self._current, None
+        if current is None or not self.enabled:
+            return
+        current.grammar, current.rule = grammar, rule
+        current.stages["done"] = monotonic() - current.start_time
+
+        key = (grammar, rule)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = dict(
+                    (stage, collections.deque(maxlen=self.window))
+                    for stage in self.stages
+                )
+            for stage, seconds in current.stages.items():
+                if stage in samples:
+                    samples[stage].append(seconds)
+            listeners = tuple(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(current)
+            except Exception as e:
+                self._log.exception("Exception during latency metrics "
+                                    "listener %r: %s", listener, e)
+
+    #-----------------------------------------------------------------------
+    # Export methods.
+
+    def add_listener(self, listener):
+        """
+        Add a function to be called with the :class:`UtteranceTimings`
+        object of each completed utterance.
+        """
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """ Remove a function added with :meth:`add_listener`. """
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def clear(self):
+        """ Discard all recorded samples. """
+        with self._lock:
+            self._samples.clear()
+
+    def get_percentiles(self):
+        """
+        Get latency percentiles for each grammar and rule.
+
+        The returned dictionary maps ``(grammar, rule)`` name pairs to
+        dictionaries of stage names and ``{"count": n, "p50": seconds,
+        "p95": seconds, "p99": seconds}`` dictionaries.  Stages with no
+        samples are omitted.
+
+        :rtype: dict
+        """
+        with self._lock:
+            samples = dict((key, dict((stage, list(values))
+                                      for stage, values in stages.items()))
+                           for key, stages in self._samples.items())
+
+        result = {}
+        for key, stages in samples.items():
+            summary = {}
+            for stage, values in stages.items():
+                if not values:
+                    continue
+                values.sort()
+                stage_summary = {"count": len(values)}
+                for percentile in self.percentiles:
+                    index = int(round(percentile / 100.0
+                                      * (len(values) - 1)))
+                    stage_summary["p%d" % percentile] = values[index]
+                summary[stage] = stage_summary
+            result[key] = summary
+        return result
+
+    def to_json(self):
+        """ Get latency percentiles as a JSON string. """
+        entries = []
+        for (grammar, rule), stages in sorted(self.get_percentiles().items(),
+                                              key=_sort_key):
+            entries.append({"grammar": grammar, "rule": rule,
+                            "stages": stages})
+        return json.dumps({"utterance_latency_seconds": entries},
+                          indent=2, sort_keys=True)
+
+    def to_prometheus(self):
+        """ Get latency percentiles in the Prometheus text format. """
+        name = "dragonfly_utterance_latency_seconds"
+        lines = [
+            "# HELP %s Time from speech start to each processing stage."
+            % name,
+            "# TYPE %s summary" % name,
+        ]
+        for (grammar, rule), stages in sorted(self.get_percentiles().items(),
+                                              key=_sort_key):
+            labels = 'grammar="%s",rule="%s"' % (_escape_label(grammar),
+                                                 _escape_label(rule))
+            for stage in self.stages:
+                summary = stages.get(stage)
+                if not summary:
+                    continue
+                stage_labels = '%s,stage="%s"' % (labels, stage)
+                for percentile in self.percentiles:
+                    lines.append('%s{%s,quantile="%s"} %.6f' % (
+                        name, stage_labels, percentile / 100.0,
+                        summary["p%d" % percentile]
+                    ))
+                lines.append("%s_count{%s} %d" % (name, stage_labels,
+                                                  summary["count"]))
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, format="json"):
+        """
+        Write latency percentiles to a file.
+
+        The file is replaced atomically where the platform allows it.
+
+        :param path: file path.
+        :param format: ``"json"`` or ``"prometheus"``.
+        """
+        if format == "json":
+            text = self.to_json()
+        elif format == "prometheus":
+            text = self.to_prometheus()
+        else:
+            raise ValueError("unknown metrics format %r" % format)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(text)
+        try:
+            os.replace(temp_path, path)
+        except AttributeError:
+            # Python 2.
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+
+    def start_dump(self, path, interval=60, format="json"):
+        """
+        Periodically write latency percentiles to a file from a daemon
+        thread.
+
+        :param path: file path.
+        :param interval: seconds between writes.
+        :param format: ``"json"`` or ``"prometheus"``.
+        """
+        self.stop_dump()
+
+        def run():
+            while not self._dump_stop_event.wait(interval):
+                try:
+                    self.write(path, format)
+                except Exception as e:
+                    self._log.exception("Failed to write metrics to %r: "
+                                        "%s", path, e)
+
+        self._dump_stop_event.clear()
+        self._dump_thread = threading.Thread(target=run,
+                                             name="dragonfly-metrics")
+        self._dump_thread.daemon = True
+        self._dump_thread.start()
+
+    def stop_dump(self):
+        """ Stop writing latency percentiles periodically. """
+        if self._dump_thread:
+            self._dump_stop_event.set()
+            self._dump_thread.join()
+            self._dump_thread = None
+
+
+def _sort_key(item):
+    (grammar, rule), _ = item
+    return (grammar or "", rule or "")
+
+
+def _escape_label(value):
+    if value is None:
+        return ""
+    return (value.replace("\\", "\\\\").replace("\n", "\\n")
+            .replace('"', '\\"'))
+
+
+#---------------------------------------------------------------------------
+
+_latency_metrics = LatencyMetrics()
+_observer = None
+
+
+def get_latency_metrics():
+    """
+    Get the shared :class:`LatencyMetrics` instance.
+
+    :rtype: LatencyMetrics
+    """
+    return _latency_metrics
+
+
+def enable_latency_metrics():
+    """
+    Enable latency metrics collection for the current engine.
+
+    This registers a
+    :class:`dragonfly.grammar.recobs.LatencyMetricsObserver` that records
+    the start of speech and the end of decoding.
+
+    :returns: the shared metrics instance
+    :rtype: LatencyMetrics
+    """
+    global _observer
+    if _observer is None:
+        # Import locally to avoid cycles.
+        from dragonfly.grammar.recobs import LatencyMetricsObserver
+        _observer = LatencyMetricsObserver()
+        _observer.register()
+    return _latency_metrics
+
+
+def disable_latency_metrics():
+    """ Disable latency metrics collection. """
+    global _observer
+    if _observer is not None:
+        _observer.unregister()
+        _observer = None
+    _latency_metrics.enabled = False
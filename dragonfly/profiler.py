@@ -0,0 +1,217 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Sampling profiler
+============================================================================
+
+This module defines a low-overhead sampling profiler for finding out where
+time is spent in Dragonfly and in loaded command modules while speech is
+being recognized.  Unlike a tracing profiler, it does not slow down the
+profiled code: a background thread periodically takes a snapshot of every
+thread's stack using :func:`sys._current_frames` and counts how often each
+stack is seen.
+
+Only frames from the *dragonfly* package and from command modules loaded
+with :class:`dragonfly.loader.CommandModule` are kept by default.  The
+results are written in the "collapsed stack" format used by flame graph
+tools, such as `FlameGraph <https://github.com/brendangregg/FlameGraph>`__
+and `speedscope <https://www.speedscope.app>`__::
+
+    from dragonfly.profiler import SamplingProfiler
+
+    profiler = SamplingProfiler(rate=200)
+    profiler.start()
+    # ... recognize speech ...
+    profiler.stop()
+    with open("dragonfly.folded", "w") as f:
+        profiler.write_collapsed(f)
+
+The profiler can also be used as a context manager, or from the command
+line with the ``--profile`` option of ``python -m dragonfly``.
+
+
+Classes
+----------------------------------------------------------------------------
+
+"""
+
+import collections
+import logging
+import os.path
+import sys
+import threading
+
+from dragonfly.loader import get_loaded_module_paths
+
+
+# --------------------------------------------------------------------------
+
+class SamplingProfiler(object):
+    """
+    Sampling profiler class.
+
+    Constructor arguments:
+     - *rate* (*float*) -- number of samples to take per second
+       (default: 100).
+     - *paths* (*iterable*) -- directories or files whose frames should be
+       kept.  The default is the *dragonfly* package directory.  Frames
+       from loaded command modules are always kept.
+
+    Stacks that contain no matching frames are not counted.
+    """
+
+    _log = logging.getLogger("profiler")
+
+    def __init__(self, rate=100, paths=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive, not %r" % rate)
+        if paths is None:
+            paths = [os.path.dirname(os.path.abspath(__file__))]
+        self.rate = rate
+        self.paths = tuple(os.path.abspath(path) for path in paths)
+        self.stacks = collections.Counter()
+        self.sample_count = 0
+        self._filename_cache = {}
+        self._module_paths = frozenset()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def running(self):
+        """ Whether the profiler is currently taking samples. """
+        return self._thread is not None
+
+    def start(self):
+        """ Start taking samples in a background thread. """
+        if self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name="dragonfly-profiler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop taking samples. """
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def clear(self):
+        """ Discard all samples taken so far. """
+        self.stacks.clear()
+        self.sample_count = 0
+
+    def _run(self):
+        interval = 1.0 / self.rate
+        ident = threading.current_thread().ident
+        while not self._stop_event.wait(interval):
+            try:
+                self.sample(exclude=(ident,))
+            except Exception as e:
+                self._log.exception("Error taking sample: %s", e)
+
+    def _get_frame_label(self, code):
+        # Return a label for frames of the given code object if they should
+        #  be kept, otherwise None.  Labels are cached per filename and
+        #  function.
+        filename = code.co_filename
+        relative_path = self._filename_cache.get(filename, False)
+        if relative_path is False:
+            relative_path = self._get_relative_path(filename)
+            self._filename_cache[filename] = relative_path
+        if relative_path is None:
+            return None
+        return "%s (%s:%d)" % (code.co_name, relative_path,
+                               code.co_firstlineno)
+
+    def _get_relative_path(self, filename):
+        path = os.path.abspath(filename)
+        if path in self._module_paths:
+            return os.path.basename(path)
+        for prefix in self.paths:
+            if path == prefix:
+                return os.path.basename(path)
+            if path.startswith(prefix + os.sep):
+                parent = os.path.dirname(prefix)
+                return os.path.relpath(path, parent).replace(os.sep, "/")
+        return None
+
+    def sample(self, exclude=()):
+        """
+        Take one sample of each thread's stack.
+
+        This method is normally called by the profiler's thread.
+
+        :param exclude: identifiers of threads to ignore.
+        """
+        # Forget cached filename lookups if command modules were loaded or
+        #  unloaded since the last sample.
+        module_paths = get_loaded_module_paths()
+        if module_paths != self._module_paths:
+            self._module_paths = module_paths
+            self._filename_cache.clear()
+
+        thread_names = dict((t.ident, t.name) for t in threading.enumerate())
+        for ident, frame in sys._current_frames().items():
+            if ident in exclude:
+                continue
+
+            # Walk the stack from the innermost frame outwards, keeping
+            #  matching frames only.
+            labels = []
+            while frame is not None:
+                label = self._get_frame_label(frame.f_code)
+                if label is not None:
+                    labels.append(label)
+                frame = frame.f_back
+            if not labels:
+                continue
+
+            labels.append(thread_names.get(ident, "thread-%d" % ident))
+            labels.reverse()
+            self.stacks[tuple(labels)] += 1
+        self.sample_count += 1
+
+
+    def write_collapsed(self, output):
+        """
+        Write the collected samples in collapsed stack format.
+
+        Each line contains a semicolon-separated stack, outermost frame
+        first and starting with the thread name, followed by a space and
+        the number of samples.
+
+        :param output: file to write to.
+        :type output: file
+        """
+        for stack, count in sorted(self.stacks.items()):
+            output.write("%s %d\n" % (";".join(stack), count))
@@ -24,6 +24,12 @@ import sys
 
 import pytest
 
+try:
+    from shutil import which
+except ImportError:
+    # Python 2.
+    from distutils.spawn import find_executable as which
+
 from dragonfly                   import get_engine
 from dragonfly.log               import setup_log
 from dragonfly._platform_checks  import IS_X11
@@ -40,8 +46,13 @@ common_names = [
     "test_contexts",
     "test_basic_rule",
     "test_engine_nonexistent",
+    "test_clipboard_changes",
+    "test_foreground",
     "test_log",
+    "test_metrics",
     "test_parser",
+    "test_profiler",
+    "test_speaker",
     "test_lark_parser",
     "test_timer",
     "test_window",
@@ -63,6 +74,15 @@ try:
 except ImportError:
     pass
 
+# Include in-process X11 back-end tests if python-xlib and Xvfb are
+#  available.
+try:
+    import Xlib
+    if which("Xvfb"):
+        common_names.append("test_x11_xlib")
+except ImportError:
+    pass
+
 # Define spoken language test files. All of them work with the natlink and
 # text engines. The English tests should work with sapi5 and sphinx by
 # default.
@@ -121,6 +141,7 @@ engine_tests_dict = {
 
     "kaldi": [
         "test_engine_kaldi",
+        "test_kaldi_audio",
         "test_language_en_number",
 
         # Note: Kaldi cannot handle the special characters in this file.
@@ -136,6 +157,11 @@ engine_tests_dict = {
 }
 
 
+# Include asyncio tests for the text engine on Python 3.5+.
+if sys.version_info >= (3, 5):
+    engine_tests_dict["text"].insert(1, "test_engine_text_asyncio")
+
+
 # Add aliases of 'sapi5'.
 engine_tests_dict['sapi5inproc'] = engine_tests_dict['sapi5']
 engine_tests_dict['sapi5shared'] = engine_tests_dict['sapi5']
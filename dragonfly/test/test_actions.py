@@ -19,6 +19,9 @@
 #   <http://www.gnu.org/licenses/>.
 #
 
+import os
+import shutil
+import tempfile
 import unittest
 
 from six import PY2
@@ -29,6 +32,9 @@ from dragonfly.actions.action_key import Key
 from dragonfly.actions.action_mimic import Mimic
 from dragonfly.actions.action_paste import Paste
 from dragonfly.actions.action_text import Text
+from dragonfly.actions.keyboard._x11_base import BaseX11Keyboard
+from dragonfly.actions.keyboard._x11_xdotool import XdotoolKeyboard
+from dragonfly.windows.base_window import BaseWindow
 
 
 #===========================================================================
@@ -107,6 +113,196 @@ class TestRepeat(unittest.TestCase):
         self.assertEqual(r4.factor({"n": 3}), 6)
 
 
+class RecordingKeyboard(BaseX11Keyboard):
+    """ Keyboard class which records the events and text it is sent. """
+
+    def __init__(self, bulk=True):
+        self.bulk = bulk
+        self.calls = []
+
+    def send_keyboard_events(self, events):
+        self.calls.append(("events", events))
+
+    def type_text(self, text, interval=0):
+        if not self.bulk:
+            return False
+        self.calls.append(("text", text, interval))
+        return True
+
+
+class TestTextBulkTyping(unittest.TestCase):
+
+    # Text payload of 10k characters.
+    payload = (u"The quick brown fox jumps over the lazy d\xf6g.\n"
+               * 250)[:10000]
+
+    def execute_text(self, keyboard, spec, **kwargs):
+        action = Text(spec, **kwargs)
+        action._keyboard = keyboard
+        action.execute()
+        return keyboard.calls
+
+    def test_bulk_typing(self):
+        """ Test that text is typed in one operation if supported. """
+        calls = self.execute_text(RecordingKeyboard(), self.payload,
+                                  pause=0.002)
+        self.assertEqual(calls, [("text", self.payload, 0.002)])
+
+    def test_character_typing(self):
+        """ Test that events are sent for each character otherwise. """
+        calls = self.execute_text(RecordingKeyboard(bulk=False), u"a\tb")
+        self.assertEqual([call[0] for call in calls], ["events"])
+        self.assertGreaterEqual(len(calls[0][1]), 6)
+
+        # Hardware events are always sent for each character.
+        calls = self.execute_text(RecordingKeyboard(), u"ab",
+                                  use_hardware=True)
+        self.assertEqual([call[0] for call in calls], ["events"])
+
+    def test_bulk_typing_disabled(self):
+        """ Test that bulk typing of long text can be disabled. """
+        Text.bulk_typing = False
+        try:
+            calls = self.execute_text(RecordingKeyboard(), self.payload,
+                                      pause=0)
+        finally:
+            Text.bulk_typing = True
+        self.assertEqual([call[0] for call in calls], ["events"])
+        self.assertGreaterEqual(len(calls[0][1]), 2 * len(self.payload))
+
+
+@unittest.skipUnless(os.name == "posix", "requires a POSIX shell")
+class TestXdotoolTypeText(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.output = os.path.join(self.tempdir, "output")
+
+        # Write a fake xdotool script which records its arguments and
+        #  input.
+        self.xdotool = os.path.join(self.tempdir, "xdotool")
+        with open(self.xdotool, "w") as f:
+            f.write('#!/bin/sh\necho "$@" > "%s"\ncat >> "%s"\n'
+                    % (self.output, self.output))
+        os.chmod(self.xdotool, 0o755)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def type_text(self, xdotool, text, interval=0):
+        original = (XdotoolKeyboard.xdotool, XdotoolKeyboard.use_session)
+        XdotoolKeyboard.xdotool = xdotool
+        XdotoolKeyboard.use_session = True
+        try:
+            return XdotoolKeyboard.type_text(text, interval)
+        finally:
+            XdotoolKeyboard.xdotool, XdotoolKeyboard.use_session = original
+
+    def test_literal_text(self):
+        """ Test that text is passed to xdotool literally on stdin. """
+        self.assertTrue(self.type_text(self.xdotool, u"$HOME", 0.002))
+        with open(self.output) as f:
+            self.assertEqual(f.read(),
+                             "type --delay 2 --file -\n$HOME")
+
+    def test_start_failure(self):
+        """ Test that text is not marked as typed if xdotool fails. """
+        xdotool = os.path.join(self.tempdir, "missing")
+        self.assertFalse(self.type_text(xdotool, u"abc"))
+
+
+class TestActionSeriesBatching(unittest.TestCase):
+
+    def setUp(self):
+        self.keyboard = RecordingKeyboard()
+
+    def with_keyboard(self, action):
+        action._keyboard = self.keyboard
+        return action
+
+    def test_batching(self):
+        """ Test that consecutive keyboard actions are sent together. """
+        series = (self.with_keyboard(Key("a-d")) +
+                  self.with_keyboard(Text("foo")) +
+                  self.with_keyboard(Key("enter")))
+        series.execute()
+        self.assertEqual([call[0] for call in self.keyboard.calls],
+                         ["events"])
+
+        # Each key is pressed and released: alt, d, f, o, o and enter.
+        self.assertGreaterEqual(len(self.keyboard.calls[0][1]), 12)
+
+    def test_ordering(self):
+        """ Test that events are sent before other actions execute. """
+        order = []
+        def record():
+            order.append(len(self.keyboard.calls))
+        series = (self.with_keyboard(Key("a")) + Function(record) +
+                  self.with_keyboard(Key("b")) +
+                  self.with_keyboard(Key("c")))
+        series.execute()
+        self.assertEqual(order, [1])
+        self.assertEqual(len(self.keyboard.calls), 2)
+
+    def test_stop_on_failures(self):
+        """ Test that events before a failed action are still sent. """
+        def fail():
+            raise RuntimeError("failure")
+        series = (self.with_keyboard(Key("a")) +
+                  self.with_keyboard(Key("%(missing)s")) +
+                  self.with_keyboard(Key("b")))
+        series.execute({"other": 1})
+        self.assertEqual(len(self.keyboard.calls), 1)
+        self.assertEqual(self.keyboard.calls[0][1][0][0], "a")
+
+        # Keyboard events are not sent after a failure.
+        self.keyboard.calls = []
+        series = self.with_keyboard(Key("a")) + Function(fail) + \
+            self.with_keyboard(Key("b"))
+        series.execute()
+        self.assertEqual(len(self.keyboard.calls), 1)
+
+    def test_long_text(self):
+        """ Test that long text is typed in one operation in a series. """
+        text = u"x" * (Text.batch_text_max_length + 1)
+        series = (self.with_keyboard(Key("a")) +
+                  self.with_keyboard(Text(text)) +
+                  self.with_keyboard(Key("b")))
+        series.execute()
+        self.assertEqual([call[0] for call in self.keyboard.calls],
+                         ["events", "text", "events"])
+
+
+class TestActionSeriesWindowSnapshot(unittest.TestCase):
+
+    def test_snapshot_scope(self):
+        """ Test that window-matching actions share a window snapshot. """
+        snapshots = []
+        def match():
+            # Record the current snapshot, or start one.
+            snapshot = BaseWindow._get_scoped_snapshot()
+            if snapshot is None:
+                snapshot = object()
+                BaseWindow._set_scoped_snapshot(snapshot)
+            snapshots.append(snapshot)
+
+        class MatchWindow(Function):
+            def _can_share_window_snapshot(self):
+                return True
+
+        series = (MatchWindow(match) + MatchWindow(match) +
+                  Function(match) + MatchWindow(match))
+        series.execute()
+
+        # The first two actions share a snapshot.  The third action is
+        #  outside of a scope, so the fourth action reads a new one.
+        self.assertIs(snapshots[0], snapshots[1])
+        self.assertIsNot(snapshots[2], snapshots[1])
+        self.assertIsNot(snapshots[3], snapshots[2])
+        self.assertIsNot(snapshots[3], snapshots[0])
+        self.assertIsNone(BaseWindow._get_scoped_snapshot())
+
+
 #===========================================================================
 
 if __name__ == "__main__":
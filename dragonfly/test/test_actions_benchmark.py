@@ -0,0 +1,90 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Benchmarks for typing long text
+============================================================================
+
+These benchmarks are not part of any test suite.  Run them with pytest's
+``-s`` option to see the timings::
+
+    python -m pytest -s dragonfly/test/test_actions_benchmark.py
+
+"""
+
+import time
+import unittest
+
+from dragonfly.actions.action_text import Text
+from dragonfly.test.test_actions import RecordingKeyboard
+
+
+#===========================================================================
+
+class TestTextBulkTypingBenchmark(unittest.TestCase):
+
+    # Text payload of 10k characters.
+    payload = (u"The quick brown fox jumps over the lazy d\xf6g.\n"
+               * 250)[:10000]
+
+    # Number of times each typing method is timed.
+    repeat = 5
+
+    def time_text(self, bulk, pause):
+        # Return the best time taken to type the payload and the calls
+        #  made to the keyboard.
+        original = Text.bulk_typing
+        Text.bulk_typing = bulk
+        try:
+            best = None
+            for _ in range(self.repeat):
+                keyboard = RecordingKeyboard()
+                action = Text(self.payload, pause=pause)
+                action._keyboard = keyboard
+                start = time.time()
+                action.execute()
+                elapsed = time.time() - start
+                best = elapsed if best is None else min(best, elapsed)
+        finally:
+            Text.bulk_typing = original
+        return best, keyboard.calls
+
+    def benchmark(self, pause):
+        bulk_time, bulk_calls = self.time_text(True, pause)
+        events_time, events_calls = self.time_text(False, pause)
+        print("Typing %d characters with pause=%s: bulk %.4fs, "
+              "per-character %.4fs"
+              % (len(self.payload), pause, bulk_time, events_time))
+        self.assertEqual(bulk_calls, [("text", self.payload, pause)])
+        self.assertEqual([call[0] for call in events_calls], ["events"])
+
+    def test_no_pause(self):
+        """ Compare bulk and per-character typing without pauses. """
+        self.benchmark(0)
+
+    def test_pause(self):
+        """ Compare bulk and per-character typing with pauses. """
+        self.benchmark(0.005)
+
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+
+
+"""
+Test cases for waiting for clipboard changes
+============================================================================
+
+"""
+
+import threading
+import time
+import unittest
+
+from six import PY2
+
+from dragonfly.windows.base_clipboard import BaseClipboard
+
+if PY2:
+    from dragonfly.error import TimeoutError
+
+
+#===========================================================================
+
+class MemoryClipboard(BaseClipboard):
+    """ Clipboard class using an in-memory system clipboard. """
+
+    system_text = u""
+    sequence_number = 0
+    use_sequence_number = True
+    copy_count = 0
+
+    @classmethod
+    def get_system_text(cls):
+        return cls.system_text
+
+    @classmethod
+    def set_system_text(cls, content):
+        cls.system_text = content or u""
+        cls.sequence_number += 1
+
+    @classmethod
+    def clear_clipboard(cls):
+        cls.set_system_text(u"")
+
+    @classmethod
+    def get_sequence_number(cls):
+        if not cls.use_sequence_number:
+            return None
+        return cls.sequence_number
+
+    def copy_from_system(self, formats=None, clear=False):
+        MemoryClipboard.copy_count += 1
+        self._contents = {self.format_unicode: self.system_text}
+
+    def copy_to_system(self, clear=True):
+        self.set_system_text(self.get_text())
+
+
+class TestClipboardChanges(unittest.TestCase):
+    """ Tests for BaseClipboard.wait_for_change(). """
+
+    def setUp(self):
+        MemoryClipboard.system_text = u"initial"
+        MemoryClipboard.sequence_number = 0
+        MemoryClipboard.use_sequence_number = True
+        MemoryClipboard.copy_count = 0
+
+    def set_later(self, text, delay=0.05):
+        timer = threading.Timer(delay, MemoryClipboard.set_system_text,
+                                (text,))
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def test_sequence_change(self):
+        """ Verify that sequence number changes are waited for. """
+        self.set_later(u"changed")
+        self.assertTrue(MemoryClipboard.wait_for_change(1))
+
+        # The clipboard contents are not retrieved.
+        self.assertEqual(MemoryClipboard.copy_count, 0)
+
+    def test_timeout(self):
+        """ Verify that False is returned if nothing changes. """
+        start = time.time()
+        self.assertFalse(MemoryClipboard.wait_for_change(0.05))
+        self.assertGreaterEqual(time.time() - start, 0.04)
+        self.assertEqual(MemoryClipboard.copy_count, 0)
+
+    def test_unrelated_change(self):
+        """ Verify that changes to other contents are ignored. """
+        initial = MemoryClipboard(from_system=True)
+        MemoryClipboard.copy_count = 0
+
+        # Change the sequence number without changing the text.
+        self.set_later(u"initial", 0.02)
+        self.set_later(u"changed", 0.1)
+        self.assertTrue(MemoryClipboard.wait_for_change(
+            1, initial_clipboard=initial))
+
+        # The contents are only retrieved after sequence number changes.
+        self.assertEqual(MemoryClipboard.copy_count, 2)
+        self.assertEqual(MemoryClipboard.get_system_text(), u"changed")
+
+    def test_polling_fallback(self):
+        """ Verify that contents are polled without sequence numbers. """
+        MemoryClipboard.use_sequence_number = False
+        self.set_later(u"changed")
+        self.assertTrue(MemoryClipboard.wait_for_change(1))
+        self.assertFalse(MemoryClipboard.wait_for_change(0.05))
+
+    def test_synchronized_changes(self):
+        """ Verify synchronized_changes() with and without changes. """
+        for use_sequence_number in (True, False):
+            MemoryClipboard.use_sequence_number = use_sequence_number
+            with MemoryClipboard.synchronized_changes(1):
+                MemoryClipboard.set_system_text(u"text %s"
+                                                % use_sequence_number)
+            with self.assertRaises(TimeoutError):
+                with MemoryClipboard.synchronized_changes(0.05):
+                    pass
+
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,12 +10,23 @@ These tests assume that the `kaldi_model` model is used.
 Adapted from `test_engine_sphinx.py`.
 """
 
+import contextlib
+import os
+import shutil
+import tempfile
 import unittest
+import wave
 
 import logging
 
-from dragonfly.engines import (EngineBase, get_engine)
-from dragonfly.grammar.elements import Literal, Sequence
+from dragonfly.engines import (EngineBase, EngineError, MimicFailure,
+                               get_engine)
+from dragonfly.grammar.elements import (Alternative, Dictation, ListRef,
+                                        Literal, RuleRef, Sequence)
+from dragonfly.grammar.grammar_base import Grammar
+from dragonfly.grammar.list import List
+from dragonfly.grammar.rule_compound import CompoundRule
+from dragonfly.grammar.rule_basic import BasicRule
 from dragonfly.test import ElementTester
 
 try:
@@ -64,6 +75,154 @@ class KaldiEngineTests(unittest.TestCase):
         results = tester.recognize("hello world")
         self.assertEqual(results, [u"hello", u"world"])
 
+    def test_repeated_rule_ref(self):
+        """ Verify that a rule referenced several times is recognized at each reference. """
+        lst = List("colors", ["red", "green"])
+        rule = BasicRule(name="color", exported=False,
+                         element=Alternative([Literal("blue"),
+                                              ListRef("color", lst)]))
+        seq = Sequence([RuleRef(rule), Literal("and"), RuleRef(rule)])
+        tester = ElementTester(seq, engine=get_engine())
+        tester.load()
+        try:
+            results = tester.recognize("blue and red")
+            self.assertEqual(results, [u"blue", u"and", u"red"])
+
+            # Updating the list must also update the spliced references.
+            lst.append("yellow")
+            results = tester.recognize("yellow and yellow")
+            self.assertEqual(results, [u"yellow", u"and", u"yellow"])
+
+            # Setting the same items again must keep the list usable.
+            lst.set(["red", "green", "yellow"])
+            results = tester.recognize("green and yellow")
+            self.assertEqual(results, [u"green", u"and", u"yellow"])
+        finally:
+            tester.unload()
+
+    def test_list_shared_by_grammars(self):
+        """ Verify that rule templates are dropped with their grammar when a shared list is updated. """
+        engine = get_engine()
+        compiler = engine._compiler
+        lst = List("shared_colors", ["red"])
+        grammars, results = [], []
+        for name in ("bravo", "alpha"):
+            # The list's grammar is the last one it was loaded with: "alpha".
+            sub_rule = BasicRule(name="%s_color" % name, exported=False,
+                                 element=Literal("%s blue" % name))
+            element = Sequence([Literal(name), ListRef("color", lst),
+                                RuleRef(sub_rule), RuleRef(sub_rule)])
+            rule = BasicRule(name="%s_root" % name, element=element)
+            rule.process_recognition = (lambda node, name=name:
+                                        results.append(name))
+            grammar = Grammar("test_shared_list_%s" % name)
+            grammar.add_rule(rule)
+            grammars.append(grammar)
+            grammar.load()
+        bravo, alpha = grammars
+        try:
+            lst.append("green")
+            templates = compiler._rule_templates_by_grammar
+            bravo_rules = set(bravo.rules)
+            self.assertFalse(bravo_rules & set(templates.get(alpha, ())))
+
+            # Unloading bravo drops its templates, and it works after reloading.
+            bravo.unload()
+            for grammar_templates in templates.values():
+                self.assertFalse(bravo_rules & set(grammar_templates))
+            bravo.load()
+            lst.append("yellow")
+            engine.mimic("bravo yellow bravo blue bravo blue")
+            engine.mimic("alpha green alpha blue alpha blue")
+            self.assertEqual(results, ["bravo", "alpha"])
+        finally:
+            for grammar in grammars:
+                if grammar.loaded:
+                    grammar.unload()
+
+    def test_rule_activity_changes(self):
+        """ Verify that rule and grammar activity changes apply to the next recognition. """
+        engine = get_engine()
+        grammar = Grammar("test_activity")
+        rule = CompoundRule(name="r1", spec="hello world")
+        grammar.add_rule(rule)
+        grammar.load()
+        try:
+            engine.mimic("hello world")
+            rule.disable()
+            self.assertRaises(MimicFailure, engine.mimic, "hello world")
+            rule.enable()
+            engine.mimic("hello world")
+            grammar.disable()
+            self.assertRaises(MimicFailure, engine.mimic, "hello world")
+            grammar.enable()
+            engine.mimic("hello world")
+        finally:
+            grammar.unload()
+
+    def test_mimic_candidate_rules(self):
+        """ Verify that mimics are parsed by the rule matching their first word. """
+        engine = get_engine()
+        grammar = Grammar("test_candidates")
+        results = []
+        for name, spec in (("r1", "hello world"), ("r2", "[hello] there"),
+                           ("r3", "testing <text>")):
+            rule = CompoundRule(name=name, spec=spec,
+                                extras=[Dictation("text")])
+            rule._process_recognition = (lambda node, extras, name=name:
+                                         results.append(name))
+            grammar.add_rule(rule)
+        grammar.load()
+        try:
+            engine.mimic("hello world")
+            engine.mimic("hello there")
+            engine.mimic("there")
+            engine.mimic("testing hello world")
+            self.assertEqual(results, ["r1", "r2", "r2", "r3"])
+            self.assertRaises(MimicFailure, engine.mimic, "world")
+        finally:
+            grammar.unload()
+
+    def test_recognize_wave_files(self):
+        """ Verify that wave files are recognized the same with and without worker processes. """
+        engine = get_engine()
+        tmp_dir = tempfile.mkdtemp()
+        filenames = [os.path.join(tmp_dir, "silence%d.wav" % i) for i in range(3)]
+        for filename in filenames:
+            with contextlib.closing(wave.open(filename, "wb")) as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(16000)
+                wav_file.writeframes(b"\x00\x00" * 16000)
+        filenames.append(os.path.join(tmp_dir, "missing.wav"))
+        grammar = Grammar("test_wave_files")
+        grammar.add_rule(CompoundRule(name="r1", spec="hello world"))
+        grammar.load()
+        try:
+            results = list(engine.recognize_wave_files(filenames, workers=1))
+            self.assertEqual([result.filename for result in results], filenames)
+            self.assertEqual([bool(result.error) for result in results],
+                             [False, False, False, True])
+            for result in results[:3]:
+                self.assertEqual(len(result.utterances), 1)
+                self.assertEqual(result.utterances[0].end_s, 1.0)
+            parallel_results = list(engine.recognize_wave_files(filenames, workers=2))
+            words = lambda results: [[utterance.words for utterance in result.utterances]
+                                     for result in results]
+            self.assertEqual(words(parallel_results), words(results))
+        finally:
+            grammar.unload()
+            shutil.rmtree(tmp_dir)
+
+    def test_recognize_wave_files_errors(self):
+        """ Verify that wave file recognition errors are raised when it is called. """
+        engine = get_engine()
+        engine._doing_recognition = True
+        try:
+            self.assertRaises(EngineError, engine.recognize_wave_files, [])
+        finally:
+            engine._doing_recognition = False
+
     # FIXME: handling reseting user lexicon
     # def test_unknown_grammar_words(self):
     #     """ Verify that warnings are logged for a grammar with unknown words. """
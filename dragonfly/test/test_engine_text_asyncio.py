@@ -0,0 +1,122 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2018 by Dane Finlay
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import io
+import sys
+import unittest
+
+from dragonfly import (Grammar, CompoundRule, MimicFailure, get_engine,
+                       register_recognition_callback)
+from dragonfly.engines.base.asyncio_support import AsyncioTimerManager
+
+
+# --------------------------------------------------------------------------
+
+class RecordingRule(CompoundRule):
+
+    spec = "hello async"
+
+    def __init__(self):
+        CompoundRule.__init__(self)
+        self.count = 0
+
+    def _process_recognition(self, node, extras):
+        self.count += 1
+
+
+class TestEngineTextAsyncio(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = get_engine("text")
+        self.loop = asyncio.new_event_loop()
+        self.rule = RecordingRule()
+        self.grammar = Grammar("asyncio_test")
+        self.grammar.add_rule(self.rule)
+        self.grammar.load()
+
+    def tearDown(self):
+        self.grammar.unload()
+        self.loop.close()
+
+    def test_mimic_async(self):
+        """ Verify that mimic_async() awaits coroutine observers. """
+        words_list = []
+
+        async def callback(words):
+            await asyncio.sleep(0.01)
+            words_list.append(words)
+
+        observer = register_recognition_callback(callback)
+        try:
+            self.loop.run_until_complete(
+                self.engine.mimic_async("hello async")
+            )
+        finally:
+            observer.unregister()
+        self.assertEqual(self.rule.count, 1)
+        self.assertEqual(words_list, [("hello", "async")])
+
+        # Check that mimic failures are raised as normal.
+        with self.assertRaises(MimicFailure):
+            self.loop.run_until_complete(self.engine.mimic_async("goodbye"))
+
+    def test_recognize_once(self):
+        """ Verify that lines from stdin are recognized asynchronously. """
+        stdin = sys.stdin
+        sys.stdin = io.StringIO(u"\nhello async\ngoodbye\n")
+        try:
+            results = [
+                self.loop.run_until_complete(self.engine.recognize_once())
+                for _ in range(3)
+            ]
+        finally:
+            sys.stdin = stdin
+        self.assertEqual(results, [True, False, None])
+        self.assertEqual(self.rule.count, 1)
+
+    def test_timers_on_event_loop(self):
+        """ Verify that timers are moved onto the running event loop. """
+        calls = []
+        manager = self.engine._timer_manager
+        enabled = manager._enabled
+        manager.enable()
+
+        def callback():
+            calls.append(isinstance(timer.manager, AsyncioTimerManager))
+
+        timer = self.engine.create_timer(callback, 0.01)
+        stdin = sys.stdin
+        sys.stdin = io.StringIO(u"hello async\n")
+        try:
+            # Delay mimicking so that the timer is called on the loop
+            # while recognition is running.
+            self.loop.run_until_complete(self.engine.run_async(delay=0.1))
+        finally:
+            sys.stdin = stdin
+            timer.stop()
+            if not enabled:
+                manager.disable()
+
+        self.assertTrue(len(calls) >= 2)
+        self.assertTrue(all(calls))
+        self.assertIs(timer.manager, manager)
+        self.assertIs(self.engine._timer_manager, manager)
+        self.assertEqual(self.rule.count, 1)
@@ -0,0 +1,158 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+
+"""
+Test cases for the foreground window watcher
+============================================================================
+
+"""
+
+import threading
+import time
+import unittest
+
+from dragonfly import get_engine
+from dragonfly.engines.base.timer import TimerManagerBase
+from dragonfly.windows import foreground
+from dragonfly.windows.foreground import ForegroundWatcher
+
+
+#===========================================================================
+
+class StubWindow(object):
+    """ Window class with a settable foreground window. """
+
+    current = None
+
+    def __init__(self, handle, title):
+        self.handle = handle
+        self.title = title
+
+    @classmethod
+    def get_foreground(cls):
+        return cls.current
+
+
+class ForegroundWatcherTestCase(unittest.TestCase):
+    """ Test behavior of the foreground window watcher. """
+
+    def setUp(self):
+        self._original_window_class = foreground.Window
+        foreground.Window = StubWindow
+        StubWindow.current = StubWindow(1, "first")
+        self.watcher = ForegroundWatcher(min_interval=0.01,
+                                         max_interval=0.05,
+                                         use_events=False)
+
+    def tearDown(self):
+        self.watcher.stop()
+        foreground.Window = self._original_window_class
+
+    def test_listeners(self):
+        """ Verify that listeners are notified of changes. """
+        changes = []
+        self.watcher.add_listener(lambda window: changes.append(window.title))
+        self.assertTrue(self.watcher.running)
+        self.assertEqual(self.watcher.get_foreground().handle, 1)
+
+        # Title changes are changes too.
+        StubWindow.current = StubWindow(1, "second")
+        time.sleep(0.2)
+        StubWindow.current = StubWindow(2, "third")
+        time.sleep(0.2)
+        self.assertEqual(changes, ["first", "second", "third"])
+        self.assertEqual(self.watcher.get_foreground().title, "third")
+
+    def test_wait_for(self):
+        """ Verify waiting for a matching foreground window. """
+        def change():
+            time.sleep(0.1)
+            StubWindow.current = StubWindow(2, "target")
+
+        thread = threading.Thread(target=change)
+        thread.start()
+        window = self.watcher.wait_for(lambda w: w.title == "target", 5)
+        thread.join()
+        self.assertEqual(window.handle, 2)
+
+        # Verify that None is returned on timeout.
+        start_time = time.time()
+        self.assertIsNone(self.watcher.wait_for(lambda w: False, 0.1))
+        self.assertTrue(time.time() - start_time < 1)
+
+
+class ManualTimerManager(TimerManagerBase):
+    """ Timer manager whose timers are only run by main_callback(). """
+
+    def _activate_main_callback(self, callback, sec):
+        pass
+
+    def _deactivate_main_callback(self):
+        pass
+
+
+class EngineForegroundTestCase(unittest.TestCase):
+    """ Test processing of foreground changes by the engine. """
+
+    def setUp(self):
+        self.engine = get_engine("text")
+        self.manager = ManualTimerManager(0.02, self.engine)
+        self._original_manager = self.engine._timer_manager
+        self.engine._timer_manager = self.manager
+        self.processed = []
+        self.engine.process_grammars_context = self.process
+
+    def tearDown(self):
+        del self.engine.process_grammars_context
+        self.engine._timer_manager = self._original_manager
+
+    def process(self, window):
+        self.processed.append((window.title, threading.current_thread()))
+
+    def test_changes_run_on_timer(self):
+        """ Verify that contexts are processed by the engine's timers. """
+        # Notify the engine of two changes from another thread.
+        def notify():
+            self.engine._foreground_changed(StubWindow(1, "first"))
+            self.engine._foreground_changed(StubWindow(2, "second"))
+        thread = threading.Thread(target=notify)
+        thread.start()
+        thread.join()
+        self.assertEqual(self.processed, [])
+
+        # Only the latest window is processed, on the timer's thread.
+        self.manager.main_callback()
+        self.assertEqual(self.processed,
+                         [("second", threading.current_thread())])
+        self.manager.main_callback()
+        self.assertEqual(len(self.processed), 1)
+
+        # Later changes are processed again.
+        self.engine._foreground_changed(StubWindow(3, "third"))
+        self.manager.main_callback()
+        self.assertEqual(self.processed[-1][0], "third")
+
+#===========================================================================
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,362 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Test cases for the Kaldi back-end's audio classes
+============================================================================
+
+"""
+
+import math
+import os
+import random
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import unittest
+import wave
+
+from dragonfly.engines.backend_kaldi.audio import (AudioRingBuffer,
+                                                   AudioStore, MicAudio,
+                                                   VADAudio, WavAudio,
+                                                   _VoicedWindow)
+
+
+#===========================================================================
+
+class FlagVad(object):
+    """ VAD which reports speech for blocks beginning with a 1 byte. """
+
+    def is_speech(self, block, sample_rate):
+        return block[:1] == b"\x01"
+
+
+def make_blocks(pattern):
+    """ Make numbered blocks from a string of '|' (speech) and '.'. """
+    return [struct.pack("<BH", int(char == "|"), i)
+            for i, char in enumerate(pattern)]
+
+
+def collect(blocks, **kwargs):
+    """ Run blocks through the VAD collector, returning its output. """
+    vad_audio = VADAudio(input_device=False)
+    vad_audio.vad = FlagVad()
+    return list(vad_audio.vad_collector(blocks=iter(blocks), **kwargs))
+
+
+class TestVoicedWindow(unittest.TestCase):
+
+    def test_counts(self):
+        """ Verify that counts only include the most recent blocks. """
+        window = _VoicedWindow(3)
+        for is_speech in (True, True, False, True, False, False):
+            window.append(is_speech)
+        self.assertEqual((window.num_voiced, window.num_unvoiced), (1, 2))
+        window.append(True)
+        self.assertEqual((window.num_voiced, window.num_unvoiced), (1, 2))
+        window.clear()
+        self.assertEqual((window.num_voiced, window.num_unvoiced), (0, 0))
+
+
+class TestVadCollector(unittest.TestCase):
+
+    def test_phrases(self):
+        """ Verify that phrases are segmented with start padding. """
+        blocks = make_blocks("....||||||||....||||" + "." * 8)
+        output = collect(blocks, start_window_ms=30, start_padding_ms=20,
+                         end_window_ms=40, ratio=1)
+        self.assertEqual(output, (blocks[2:16] + [None]
+                                  + blocks[16:24] + [None]))
+
+    def test_unterminated_phrase(self):
+        """ Verify that a phrase is terminated at the end of the blocks. """
+        blocks = make_blocks("..|||||")
+        output = collect(blocks, start_window_ms=20, start_padding_ms=0,
+                         end_window_ms=40)
+        self.assertEqual(output, blocks[2:] + [None])
+
+
+class TestOfflineSegmentation(unittest.TestCase):
+
+    def test_matches_collector(self):
+        """ Verify that offline segmentation matches the VAD collector. """
+        rng = random.Random(0)
+        vad_audio = VADAudio(input_device=False)
+        vad_audio.vad = FlagVad()
+        block_bytes = MicAudio.BLOCK_SIZE_SAMPLES * MicAudio.SAMPLE_WIDTH
+        for _ in range(100):
+            pattern = "".join(rng.choice(["|", "."]) * rng.randint(1, 30)
+                              for _ in range(rng.randint(0, 20)))
+            kwargs = dict(start_window_ms=rng.choice([10, 50, 150]),
+                          start_padding_ms=rng.choice([0, 100, 300]),
+                          end_window_ms=rng.choice([10, 150, 200]),
+                          ratio=rng.choice([0.5, 0.8, 1]))
+            blocks = [block.ljust(block_bytes, b"\x00")
+                      for block in make_blocks(pattern)]
+
+            # Convert the collector's output to block index ranges.
+            expected, start = [], None
+            for block in collect(blocks, **kwargs):
+                if block is None:
+                    expected.append((start, blocks.index(previous) + 1))
+                    start = None
+                elif start is None:
+                    start = blocks.index(block)
+                previous = block
+            segments = vad_audio.segment_buffer(b"".join(blocks), **kwargs)
+            self.assertEqual(segments, expected, (pattern, kwargs))
+
+
+class TestAudioRingBuffer(unittest.TestCase):
+
+    def test_read_write(self):
+        """ Verify that frames are read in order as memoryviews. """
+        buf = AudioRingBuffer(2, 4)
+        for frame in (b"ab", b"cd", b"ef"):
+            self.assertTrue(buf.write(frame))
+        self.assertEqual(len(buf), 3)
+        frames = [buf.read(timeout=0) for _ in range(3)]
+        self.assertTrue(all(isinstance(f, memoryview) for f in frames))
+        self.assertEqual([bytes(f) for f in frames], [b"ab", b"cd", b"ef"])
+        self.assertIs(buf.read(timeout=0), False)
+        self.assertIs(buf.read(timeout=0.01), False)
+        buf.write(b"gh")
+        buf.close()
+        self.assertEqual(bytes(buf.read()), b"gh")
+        self.assertIs(buf.read(), None)
+        self.assertRaises(ValueError, buf.write, b"abc")
+
+    def test_overflow(self):
+        """ Verify that frames are dropped and counted when full. """
+        buf = AudioRingBuffer(1, 4, hold=1)
+        for frame in b"abcde":
+            buf.write(bytearray([frame]))
+        self.assertEqual(buf.num_overflowed, 1)
+        held = [buf.read(), buf.read()]
+
+        # The slots of the held frames are not reused.
+        self.assertFalse(buf.write(b"x"))
+        self.assertEqual(buf.num_overflowed, 2)
+        self.assertEqual([bytes(f) for f in held], [b"a", b"b"])
+
+        # Reading another frame releases the oldest held frame's slot.
+        self.assertEqual(bytes(buf.read()), b"c")
+        self.assertTrue(buf.write(b"y"))
+        self.assertEqual(bytes(held[1]), b"b")
+        self.assertEqual([bytes(buf.read(timeout=0)) for _ in range(2)],
+                         [b"d", b"y"])
+
+    def test_wait(self):
+        """ Verify that waiting ends on new frames, wake-ups or timeout. """
+        buf = AudioRingBuffer(2, 4)
+        start = time.time()
+        self.assertFalse(buf.wait(0.05))
+        self.assertGreaterEqual(time.time() - start, 0.04)
+
+        # Wake-ups before waiting are not lost.
+        buf.wake()
+        start = time.time()
+        self.assertFalse(buf.wait(5))
+        self.assertLess(time.time() - start, 1)
+
+        # Writing from another thread ends the wait.
+        timer = threading.Timer(0.02, buf.write, args=(b"ab",))
+        timer.start()
+        self.assertTrue(buf.wait(5))
+        timer.join()
+        self.assertEqual(bytes(buf.read(timeout=0)), b"ab")
+
+        threading.Timer(0.02, buf.wake).start()
+        start = time.time()
+        self.assertFalse(buf.wait())
+        self.assertLess(time.time() - start, 1)
+
+    def test_synthetic_source(self):
+        """ Verify that blocks fed from another thread are all read. """
+        audio = MicAudio(input_device=False, buffer_s=1)
+        block_bytes = MicAudio.BLOCK_SIZE_SAMPLES * MicAudio.SAMPLE_WIDTH
+        blocks = [struct.pack("<H", i).ljust(block_bytes, b"\x00")
+                  for i in range(300)]
+
+        def produce():
+            for i, block in enumerate(blocks):
+                audio.callback(block)
+                if i % 50 == 0:
+                    time.sleep(0.01)
+            audio.destroy()
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        received = [bytes(block) for block in audio.iter()]
+        thread.join()
+        self.assertEqual(received, blocks)
+        self.assertEqual(audio.num_overflowed, 0)
+
+    def test_vad_collector_source(self):
+        """ Verify that the VAD collector reads held blocks correctly. """
+        vad_audio = VADAudio(input_device=False, buffer_s=0.5)
+        vad_audio.vad = FlagVad()
+        block_bytes = MicAudio.BLOCK_SIZE_SAMPLES * MicAudio.SAMPLE_WIDTH
+        blocks = [block.ljust(block_bytes, b"\x00") for block in
+                  make_blocks("." * 40 + "|" * 30 + "." * 40 + "|" * 20)]
+
+        def produce():
+            for block in blocks:
+                while not vad_audio.callback(block):
+                    time.sleep(0.001)  # Wait for the consumer to catch up
+            vad_audio.destroy()
+
+        audio_iter = vad_audio.vad_collector()
+        thread = threading.Thread(target=produce)
+        thread.start()
+        received = [bytes(block) if block else block for block in audio_iter]
+        thread.join()
+        self.assertEqual(received, collect(blocks))
+
+
+class TestAudioStore(unittest.TestCase):
+
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+        self.audio = MicAudio(input_device=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.save_dir)
+
+    def read_rows(self):
+        with open(os.path.join(self.save_dir, "retain.tsv")) as f:
+            return [line.rstrip("\n").split("\t") for line in f]
+
+    def test_current_audio(self):
+        """ Verify that the current audio is buffered until finalized. """
+        store = AudioStore(self.audio)
+        store.add_block(b"\x01\x00" * 160)
+        view = store.current_audio_view
+        store.add_block(b"\x02\x00" * 160)
+        self.assertEqual(store.current_audio_data,
+                         b"\x01\x00" * 160 + b"\x02\x00" * 160)
+        self.assertEqual(store.current_audio_length_ms, 20)
+        self.assertEqual(bytes(view[:2]), b"\x01\x00")
+        store.cancel()
+        self.assertEqual(store.current_audio_data, b"")
+
+    def test_background_writes(self):
+        """ Verify that saved recognitions are written in the background. """
+        store = AudioStore(self.audio, maxlen=1, save_dir=self.save_dir,
+                           save_audio=True, save_metadata=True)
+        for i in range(3):
+            store.add_block(b"\x00\x00" * 1600)
+            store.finalize("phrase %d" % i, "grammar", "rule")
+        store.flush()
+        rows = self.read_rows()
+        self.assertEqual([row[4] for row in rows], ["phrase 0", "phrase 1"])
+        self.assertEqual(rows[0][1], "0.1")
+        for row in rows:
+            with wave.open(row[0], "rb") as wav_file:
+                self.assertEqual(wav_file.getnframes(), 1600)
+
+        # Closing writes the remaining recognition.
+        store.save_all()
+        store.close()
+        self.assertEqual(len(self.read_rows()), 3)
+
+    def test_bounded_queue(self):
+        """ Verify that saving does not block when the writer is behind. """
+        store = AudioStore(self.audio, maxlen=1, save_dir=self.save_dir,
+                           save_audio=True, save_metadata=True,
+                           max_queued_writes=1)
+        resume = threading.Event()
+        write_wav = self.audio.write_wav
+        def blocking_write_wav(filename, data):
+            resume.wait()
+            write_wav(filename, data)
+        self.audio.write_wav = blocking_write_wav
+
+        start = time.time()
+        for i in range(5):
+            store.add_block(b"\x00\x00" * 160)
+            store.finalize("phrase %d" % i, "grammar", "rule")
+        self.assertLess(time.time() - start, 1)
+        resume.set()
+        store.close()
+        rows = self.read_rows()
+        self.assertLess(len(rows), 4)
+        self.assertEqual(rows[0][4], "phrase 0")
+
+
+class TestWavVadBenchmark(unittest.TestCase):
+
+    # Length of the generated recording in seconds.
+    duration_s = 120
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.filename = os.path.join(self.tmp_dir, "long.wav")
+
+        # Write alternating seconds of a loud tone and silence.
+        rate = MicAudio.SAMPLE_RATE
+        tone = b"".join(struct.pack("<h", int(8000 * math.sin(
+            2 * math.pi * 440 * i / rate))) for i in range(rate))
+        silence = b"\x00\x00" * rate
+        wf = wave.open(self.filename, "wb")
+        wf.setnchannels(MicAudio.CHANNELS)
+        wf.setsampwidth(MicAudio.SAMPLE_WIDTH)
+        wf.setframerate(rate)
+        for _ in range(self.duration_s // 2):
+            wf.writeframes(tone + silence)
+        wf.close()
+
+    def read_phrases(self, audio_iter, name):
+        start = time.time()
+        phrases, phrase = [], []
+        for block in audio_iter:
+            if block is None:
+                phrases.append(b"".join(phrase))
+                phrase = []
+            else:
+                phrase.append(bytes(block))
+        print("%s: %d phrases from %ds of audio in %.3fs"
+              % (name, len(phrases), self.duration_s, time.time() - start))
+        return phrases
+
+    def test_read_file_with_vad(self):
+        """ Time the VAD collector over a long WAV file. """
+        phrases = self.read_phrases(
+            WavAudio.read_file_with_vad(self.filename), "VAD collector")
+        self.assertGreater(len(phrases), 0)
+        self.assertLess(sum(len(phrase) for phrase in phrases),
+                        os.path.getsize(self.filename))
+
+    def test_read_file_with_offline_vad(self):
+        """ Compare offline segmentation with the VAD collector. """
+        phrases = self.read_phrases(
+            WavAudio.read_file_with_offline_vad(self.filename),
+            "Offline VAD")
+        self.assertEqual(phrases, self.read_phrases(
+            WavAudio.read_file_with_vad(self.filename), "VAD collector"))
+
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
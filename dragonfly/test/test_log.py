@@ -119,6 +119,32 @@ class LogTestCase(unittest.TestCase):
                     "grammar.load (ERROR): test_filtering - error"]
         self.assertEqual(self._error.lines, expected)
 
+    @unittest.skipIf(log.QueueHandler is None,
+                     "queued logging requires Python 3.2+")
+    def test_queued_filtering(self):
+        """ Verify that queued log messages are filtered and written. """
+        log.setup_log(use_file=False, use_queue=True)
+        try:
+            for name in ("grammar", "grammar.begin", "grammar.load.child"):
+                logger = logging.getLogger(name)
+                logger.debug("test_queued_filtering - debug")
+                logger.info("test_queued_filtering - info")
+                logger.warning("test_queued_filtering - warning")
+        finally:
+            # Setting up logging again stops the writer thread after
+            #  writing any queued records.
+            log.setup_log(use_file=False)
+        expected = [
+            "grammar (WARNING): test_queued_filtering - warning",
+            "grammar.begin (INFO): test_queued_filtering - info",
+            "grammar.begin (WARNING): test_queued_filtering - warning",
+            # Records of child loggers are only filtered by logger level,
+            #  as with the default DispatchingHandler objects.
+            "grammar.load.child (INFO): test_queued_filtering - info",
+            "grammar.load.child (WARNING): test_queued_filtering - warning",
+        ]
+        self.assertEqual(self._error.lines, expected)
+
 #===========================================================================
 
 
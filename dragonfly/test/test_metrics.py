@@ -0,0 +1,111 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+
+"""
+Test cases for the latency metrics module
+============================================================================
+
+"""
+
+import json
+import unittest
+
+from dragonfly import (Grammar, MappingRule, Function, get_engine,
+                       LatencyMetricsObserver)
+from dragonfly.metrics import LatencyMetrics, get_latency_metrics
+
+
+#===========================================================================
+
+class LatencyMetricsTestCase(unittest.TestCase):
+    """ Test behavior of the latency metrics collector. """
+
+    def test_disabled(self):
+        """ Verify that nothing is recorded while disabled. """
+        metrics = LatencyMetrics()
+        metrics.begin_utterance()
+        metrics.mark("decoded")
+        metrics.end_utterance("grammar", "rule")
+        self.assertEqual(metrics.get_percentiles(), {})
+
+    def test_percentiles(self):
+        """ Verify percentile calculation and export formats. """
+        metrics = LatencyMetrics(window=10)
+        metrics.enabled = True
+        timings = []
+        metrics.add_listener(timings.append)
+        for _ in range(20):
+            metrics.begin_utterance()
+            metrics.mark("action", first=True)
+            metrics.mark("action", first=True)
+            metrics.end_utterance("grammar", "rule")
+        self.assertEqual(len(timings), 20)
+        self.assertEqual(timings[0].grammar, "grammar")
+        self.assertEqual(set(timings[0].stages), set(["action", "done"]))
+
+        summary = metrics.get_percentiles()[("grammar", "rule")]
+        self.assertEqual(set(summary), set(["action", "done"]))
+        self.assertEqual(summary["done"]["count"], 10)
+        done = summary["done"]
+        self.assertTrue(done["p50"] <= done["p95"] <= done["p99"])
+
+        data = json.loads(metrics.to_json())
+        entry = data["utterance_latency_seconds"][0]
+        self.assertEqual((entry["grammar"], entry["rule"]),
+                         ("grammar", "rule"))
+        text = metrics.to_prometheus()
+        self.assertIn('dragonfly_utterance_latency_seconds{grammar="grammar",'
+                      'rule="rule",stage="done",quantile="0.95"}', text)
+        self.assertIn('dragonfly_utterance_latency_seconds_count{'
+                      'grammar="grammar",rule="rule",stage="done"} 10',
+                      text)
+        self.assertRaises(ValueError, metrics.write, "unused", "xml")
+
+    def test_observer(self):
+        """ Verify that a mimicked recognition records every stage. """
+        engine = get_engine()
+        metrics = get_latency_metrics()
+        metrics.clear()
+        observer = LatencyMetricsObserver()
+        grammar = Grammar("latency_test")
+        grammar.add_rule(MappingRule(name="latency_rule", mapping={
+            "latency test": Function(lambda: None),
+        }))
+        observer.register()
+        grammar.load()
+        try:
+            engine.mimic("latency test")
+        finally:
+            grammar.unload()
+            observer.unregister()
+            metrics.enabled = False
+
+        summary = metrics.get_percentiles()[("latency_test",
+                                             "latency_rule")]
+        for stage in ("decoded", "processing", "action", "done"):
+            self.assertEqual(summary[stage]["count"], 1)
+
+#===========================================================================
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Test cases for the sampling profiler
+============================================================================
+
+"""
+
+import time
+import unittest
+
+from six import StringIO
+
+from dragonfly.profiler import SamplingProfiler
+
+
+#===========================================================================
+
+def busy_function(duration):
+    end_time = time.time() + duration
+    while time.time() < end_time:
+        pass
+
+
+class ProfilerTestCase(unittest.TestCase):
+    """ Test behavior of the sampling profiler. """
+
+    def test_collapsed_output(self):
+        """ Verify that samples are aggregated into collapsed stacks. """
+        with SamplingProfiler(rate=500) as profiler:
+            busy_function(0.2)
+        self.assertFalse(profiler.running)
+        self.assertTrue(profiler.sample_count > 0)
+
+        output = StringIO()
+        profiler.write_collapsed(output)
+        lines = output.getvalue().splitlines()
+        busy_lines = [line for line in lines if "busy_function (" in line]
+        self.assertTrue(busy_lines)
+        for line in busy_lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(int(count) > 0)
+
+            # Only frames from the dragonfly package are kept.
+            frames = stack.split(";")[1:]
+            for frame in frames:
+                self.assertIn("(dragonfly/", frame)
+
+    def test_paths(self):
+        """ Verify that stacks without matching frames are not counted. """
+        profiler = SamplingProfiler(paths=["/nonexistent"])
+        profiler.sample()
+        self.assertEqual(profiler.sample_count, 1)
+        self.assertEqual(len(profiler.stacks), 0)
+
+#===========================================================================
+
+
+if __name__ == "__main__":
+    unittest.main()
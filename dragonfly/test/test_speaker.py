@@ -0,0 +1,132 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Test cases for the stdin speaker worker thread
+============================================================================
+
+"""
+
+import sys
+import time
+import unittest
+
+from dragonfly.engines.base.speaker_stdin import StdinSpeakerBase
+
+
+#===========================================================================
+
+class SleepSpeaker(StdinSpeakerBase):
+    """
+    Speaker which "speaks" text by sleeping for the number of seconds
+    given in the text.  Spoken text is recorded.
+    """
+
+    _name = "sleep"
+    _read_stdin_command = [
+        sys.executable, "-c",
+        "import sys, time; time.sleep(float(sys.stdin.read()))"
+    ]
+
+    def __init__(self):
+        self.spoken = []
+
+    def _synthesize(self, text):
+        self.spoken.append(text)
+        super(SleepSpeaker, self)._synthesize(text)
+
+    def wait_for_process(self, timeout=10):
+        # Wait until a process has been started for the current text.
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            process = self._process
+            if process is not None:
+                return process
+            time.sleep(0.01)
+        raise AssertionError("speaker process was not started")
+
+
+class TestStdinSpeaker(unittest.TestCase):
+
+    def setUp(self):
+        self.speaker = SleepSpeaker()
+        self.addCleanup(self.speaker.interrupt)
+
+    def test_speak_async(self):
+        """ Verify that speak_async() does not wait for the text. """
+        self.speaker.speak_async("0.5")
+        self.speaker.speak_async("0.5")
+        self.assertFalse(self.speaker.wait(0.1))
+        self.assertTrue(self.speaker.wait(30))
+        self.assertEqual(self.speaker.spoken, ["0.5", "0.5"])
+
+    def test_asynchronous(self):
+        """ Verify that speak() does not wait if asynchronous is True. """
+        self.speaker.asynchronous = True
+        self.speaker.speak("0.5")
+        self.assertFalse(self.speaker.wait(0.1))
+        self.assertTrue(self.speaker.wait(30))
+        self.assertEqual(self.speaker.spoken, ["0.5"])
+
+    def test_synchronous(self):
+        """ Verify that speak() waits for queued text and its own text. """
+        self.speaker.speak_async("0.1")
+        self.speaker.speak("0.1")
+        self.assertTrue(self.speaker.wait(0))
+        self.assertEqual(self.speaker.spoken, ["0.1", "0.1"])
+
+    def test_synchronous_error(self):
+        """ Verify that speak() raises an error if the command fails. """
+        self.assertRaises(RuntimeError, self.speaker.speak, "invalid")
+        self.assertEqual(self.speaker.spoken, ["invalid"])
+
+    def test_interrupt(self):
+        """ Verify that interrupt() stops speaking and discards text. """
+        for text in ("60", "1", "1"):
+            self.speaker.speak_async(text)
+        process = self.speaker.wait_for_process()
+        self.speaker.interrupt()
+        self.assertTrue(self.speaker.wait(30))
+        self.assertNotEqual(process.poll(), None)
+        self.assertNotEqual(process.returncode, 0)
+        self.assertEqual(self.speaker.spoken, ["60"])
+
+    def test_flush(self):
+        """ Verify that flush() discards text which is not being spoken. """
+        for text in ("60", "1", "1"):
+            self.speaker.speak_async(text)
+        process = self.speaker.wait_for_process()
+        self.speaker.flush()
+
+        # The current text is still being spoken.
+        self.assertEqual(self.speaker._pending, 1)
+        self.assertFalse(self.speaker.wait(0.1))
+        self.assertEqual(process.poll(), None)
+
+        # Nothing else is spoken after it.
+        self.speaker.interrupt()
+        self.assertTrue(self.speaker.wait(30))
+        self.assertEqual(self.speaker.spoken, ["60"])
+
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,6 +23,10 @@ import unittest
 import time
 import logging
 from dragonfly.engines import get_engine
+from dragonfly.engines.base import (ThreadedTimerManager,
+                                    DelegateTimerManager,
+                                    DelegateTimerManagerInterface)
+from dragonfly.engines.base.timer import Timer
 
 
 #===========================================================================
@@ -90,6 +94,82 @@ class TestTimer(unittest.TestCase):
             # Stop the timer at the end regardless of the result.
             timer.stop()
 
+    def test_timer_ordering(self):
+        """ Test that due timers are called in deadline order. """
+
+        calls = []
+        manager = self.engine._timer_manager
+        timers = [
+            self.engine.create_timer(lambda: calls.append("b"), 0.02, False),
+            self.engine.create_timer(lambda: calls.append("a"), 0.01, False),
+            self.engine.create_timer(lambda: calls.append("c"), 10, False),
+        ]
+        try:
+            delay = manager.time_until_next_timer()
+            self.assertTrue(0 < delay <= 0.01)
+            time.sleep(0.03)
+            self.assertEqual(manager.time_until_next_timer(), 0)
+            manager.main_callback()
+            self.assertEqual(calls, ["a", "b"])
+            self.assertTrue(manager.time_until_next_timer() > 9)
+        finally:
+            for timer in timers:
+                timer.stop()
+        self.assertEqual(manager.time_until_next_timer(), None)
+
+    def test_repeating_timer_schedule(self):
+        """ Test that repeating timers keep to their schedule. """
+
+        timer = self.engine.create_timer(lambda: None, 0.05)
+        try:
+            first_deadline = timer.next_time
+            time.sleep(0.06)
+            timer.manager.main_callback()
+
+            # The next deadline is relative to the previous one, not to
+            # the time the timer was called.
+            self.assertAlmostEqual(timer.next_time, first_deadline + 0.05)
+        finally:
+            timer.stop()
+
+    def test_threaded_timer_manager(self):
+        """ Test that the threaded manager wakes up for new timers. """
+
+        manager = ThreadedTimerManager(10, None)
+        callback_called = [0]
+        def callback():
+            callback_called[0] += 1
+
+        # The long polling interval must not delay the timer.
+        timer = Timer(callback, 0.01, manager, False)
+        time.sleep(0.2)
+        try:
+            self.assertEqual(callback_called[0], 1)
+            self.assertFalse(timer.active)
+            self.assertFalse(manager._running)
+        finally:
+            timer.stop()
+
+    def test_delegate_timers_changed(self):
+        """ Test that delegate managers notify engines of timer changes. """
+
+        class Engine(DelegateTimerManagerInterface):
+            def __init__(self):
+                DelegateTimerManagerInterface.__init__(self)
+                self._timer_manager = DelegateTimerManager(0.02, self)
+                self.changes = 0
+
+            def timers_changed(self):
+                self.changes += 1
+
+        engine = Engine()
+        timer = Timer(lambda: None, 10, engine._timer_manager)
+        self.assertEqual(engine.changes, 1)
+        self.assertTrue(9 < engine.time_until_next_timer() <= 10)
+        timer.stop()
+        self.assertEqual(engine.changes, 2)
+        self.assertEqual(engine.time_until_next_timer(), None)
+
 #===========================================================================
 
 if __name__ == "__main__":
@@ -19,6 +19,7 @@
 #
 
 
+import os
 import unittest
 from six import PY2
 
@@ -44,6 +45,72 @@ class TestWindow(unittest.TestCase):
         self.assertRaises(TypeError, Window, ["string"])
         self.assertRaises(TypeError, Window, [3.4])
 
+    @unittest.skipUnless(os.name == "posix", "X11 only")
+    def test_process_executable(self):
+        """ Test executable lookup by process ID. """
+        from dragonfly.windows import x11_window
+        import psutil
+
+        # Verify that executables are cached per process.
+        executable = psutil.Process(os.getpid()).exe()
+        self.assertEqual(x11_window.get_process_executable(os.getpid()),
+                         executable)
+        keys = [key for key in x11_window._executable_cache
+                if key[0] == os.getpid()]
+        self.assertEqual(len(keys), 1)
+        self.assertEqual(x11_window.get_process_executable(os.getpid()),
+                         executable)
+
+        # Verify that missing processes are handled.
+        self.assertEqual(x11_window.get_process_executable(None), '')
+        self.assertEqual(x11_window.get_process_executable(2 ** 22 + 1),
+                         '')
+
+    @unittest.skipUnless(os.name == "posix", "X11 only")
+    def test_window_snapshot_scope(self):
+        """ Test that window snapshots are shared within a scope. """
+        from dragonfly.windows.x11_window import X11Window
+
+        class SnapshotWindow(X11Window):
+            _windows_by_id = {}
+            reads = 0
+
+            @classmethod
+            def _read_window_snapshot(cls, properties):
+                cls.reads += 1
+                pid = str(os.getpid())
+                return [
+                    (1, {'_NET_WM_PID': pid, '_NET_WM_NAME': 'one'}),
+                    (2, {'_NET_WM_PID': pid, '_NET_WM_NAME': 'two',
+                         '_NET_WM_STATE': '_NET_WM_STATE_HIDDEN'}),
+                ]
+
+        # Windows are read on each call outside of a scope.  Minimized
+        #  windows are left out.
+        windows = SnapshotWindow.get_all_windows()
+        self.assertEqual([window.id for window in windows], [1])
+        self.assertEqual(SnapshotWindow.get_matching_windows(title="two"),
+                         [])
+        self.assertEqual(SnapshotWindow.reads, 2)
+
+        # Windows are read once within a scope, unless the snapshot is
+        #  cleared.
+        SnapshotWindow.begin_snapshot_scope()
+        try:
+            SnapshotWindow.get_matching_windows(title="one")
+            SnapshotWindow.begin_snapshot_scope()
+            SnapshotWindow.get_all_windows()
+            SnapshotWindow.end_snapshot_scope()
+            SnapshotWindow.get_all_windows()
+            self.assertEqual(SnapshotWindow.reads, 3)
+            SnapshotWindow.clear_window_snapshot()
+            SnapshotWindow.get_all_windows()
+            self.assertEqual(SnapshotWindow.reads, 4)
+        finally:
+            SnapshotWindow.end_snapshot_scope()
+        SnapshotWindow.get_all_windows()
+        self.assertEqual(SnapshotWindow.reads, 5)
+
 #===========================================================================
 
 if __name__ == "__main__":
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+
+"""
+Test cases for the in-process X11 back-end
+============================================================================
+
+These tests start a private *Xvfb* server.
+
+"""
+
+import os
+import subprocess
+import time
+import unittest
+
+import Xlib.display
+from Xlib import X, Xatom
+
+from dragonfly.actions.keyboard._x11_xlib import XlibKeyboard
+from dragonfly.windows                    import x11_xlib
+from dragonfly.windows                    import x11_xlib_clipboard
+from dragonfly.windows.x11_xlib_clipboard import (SelectionConnection,
+                                                  XlibClipboard)
+from dragonfly.windows.x11_xlib_monitor   import XlibMonitor
+from dragonfly.windows.x11_selection      import SelectionMonitor
+from dragonfly.windows.x11_xlib_window    import XlibWindow
+
+
+#===========================================================================
+
+class XlibBackendTestCase(unittest.TestCase):
+    """ Test the in-process X11 back-end classes under Xvfb. """
+
+    display_name = ":97"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.xvfb = subprocess.Popen(["Xvfb", cls.display_name, "-screen",
+                                     "0", "800x600x24", "-nolisten", "tcp"],
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE)
+
+        # Wait for the server to accept connections.
+        display = None
+        for _ in range(50):
+            try:
+                display = Xlib.display.Display(cls.display_name)
+                break
+            except Exception:
+                time.sleep(0.1)
+        if display is None:
+            cls.xvfb.terminate()
+            cls.xvfb.wait()
+            raise unittest.SkipTest("Xvfb did not start")
+        cls.display = display
+        x11_xlib.set_display(Xlib.display.Display(cls.display_name))
+
+    @classmethod
+    def tearDownClass(cls):
+        x11_xlib.set_display(None)
+        cls.display.close()
+        cls.xvfb.terminate()
+        cls.xvfb.wait()
+
+    def create_window(self, title="test window"):
+        # Create and map a window with the usual client properties.
+        display = self.display
+        root = display.screen().root
+        window = root.create_window(10, 20, 300, 200, 0,
+                                    display.screen().root_depth,
+                                    event_mask=X.KeyPressMask)
+        window.set_wm_class("test_instance", "TestClass")
+        window.change_property(display.get_atom("_NET_WM_NAME"),
+                               display.get_atom("UTF8_STRING"), 8,
+                               title.encode("utf-8"))
+        window.change_property(display.get_atom("_NET_WM_PID"),
+                               Xatom.CARDINAL, 32, [os.getpid()])
+        window.change_property(display.get_atom("_NET_WM_STATE"),
+                               Xatom.ATOM, 32,
+                               [display.get_atom("_NET_WM_STATE_FOCUSED")])
+        window.map()
+        root.change_property(display.get_atom("_NET_ACTIVE_WINDOW"),
+                             Xatom.WINDOW, 32, [window.id])
+        root.change_property(display.get_atom("_NET_CLIENT_LIST"),
+                             Xatom.WINDOW, 32, [window.id])
+        display.sync()
+        XlibWindow.clear_window_snapshot()
+        self.addCleanup(window.destroy)
+        return window
+
+    def test_window_properties(self):
+        """ Verify that window properties are read directly. """
+        window = self.create_window(u"tést window")
+        foreground = XlibWindow.get_foreground()
+        self.assertEqual(foreground.id, window.id)
+        self.assertEqual(foreground.title, u"tést window")
+        self.assertEqual(foreground.cls_name, "test_instance")
+        self.assertEqual(foreground.cls, "TestClass")
+        self.assertEqual(foreground.pid, os.getpid())
+        self.assertEqual(foreground.state, ("_NET_WM_STATE_FOCUSED",))
+        self.assertTrue(foreground.is_focused)
+        self.assertEqual(XlibWindow.get_all_windows(), [foreground])
+        self.assertEqual(XlibWindow.get_matching_windows(title="TÉST"),
+                         [foreground])
+        self.assertEqual(XlibWindow.get_matching_windows(title="other"),
+                         [])
+        self.assertEqual(foreground.get_position().ltwh, (10, 20, 300, 200))
+
+    def test_monitors(self):
+        """ Verify that monitors are listed using RandR. """
+        monitors = XlibMonitor.get_all_monitors()
+        self.assertTrue(monitors)
+        self.assertEqual(monitors[0].rectangle.ltwh, (0, 0, 800, 600))
+
+    def test_keyboard(self):
+        """ Verify that key events are sent using XTest. """
+        window = self.create_window()
+        window.set_input_focus(X.RevertToParent, X.CurrentTime)
+        self.display.sync()
+
+        # Type a lower case letter, a shifted letter and a character that
+        #  is not in the keyboard mapping.
+        XlibKeyboard.send_keyboard_events([
+            ("a", True, 0), ("a", False, 0),
+            ("A", True, 0), ("A", False, 0),
+            (u"U20AC", True, 0), (u"U20AC", False, 0),
+        ])
+
+        keycodes = []
+        deadline = time.time() + 5
+        while len(keycodes) < 4 and time.time() < deadline:
+            if not self.display.pending_events():
+                time.sleep(0.01)
+                continue
+            event = self.display.next_event()
+            if event.type == X.KeyPress:
+                keycodes.append((event.detail, event.state))
+        self.assertEqual(len(keycodes), 4)
+        a_keycode = self.display.keysym_to_keycode(ord("a"))
+        self.assertEqual(keycodes[0], (a_keycode, 0))
+
+        # The shifted letter is typed with the Shift key held.
+        shift_keycode = self.display.keysym_to_keycode(0xffe1)
+        self.assertEqual(keycodes[1][0], shift_keycode)
+        self.assertEqual(keycodes[2], (a_keycode, X.ShiftMask))
+
+        # The temporary keycode binding is removed after typing.
+        euro_keycode = keycodes[3][0]
+        mapping = self.display.get_keyboard_mapping(euro_keycode, 1)
+        self.assertFalse(any(mapping[0]))
+
+    def test_clipboard(self):
+        """ Verify that selections are owned and read in-process. """
+        connection = SelectionConnection(self.display_name)
+        x11_xlib_clipboard.set_selection_connection(connection)
+        self.addCleanup(x11_xlib_clipboard.set_selection_connection, None)
+        XlibClipboard.set_system_text(u"clipboard tést")
+        XlibClipboard._set_x_selection(XlibClipboard.format_x_primary,
+                                       u"primary")
+        self.assertEqual(XlibClipboard.get_system_text(),
+                         u"clipboard tést")
+
+        # Read both selections from another client, including a selection
+        #  large enough to be transferred incrementally.
+        reader = SelectionConnection(self.display_name)
+        clipboard = reader.get_atom("CLIPBOARD")
+        primary = reader.get_atom("PRIMARY")
+        self.assertEqual(reader.read_selections([clipboard, primary]),
+                         {clipboard: u"clipboard tést", primary: u"primary"})
+        large_text = u"x" * (connection._chunk_size * 3 + 10)
+        XlibClipboard.set_system_text(large_text)
+        self.assertEqual(reader.read_selections([clipboard]),
+                         {clipboard: large_text})
+
+        # Read selections owned by another client.
+        reader.set_selection(clipboard, u"from reader")
+        contents = XlibClipboard(from_system=True)
+        self.assertEqual(contents.get_text(), u"from reader")
+        self.assertEqual(
+            contents.get_format(XlibClipboard.format_x_primary), u"primary")
+
+    def test_selection_monitor(self):
+        """ Verify that earlier selection changes are not counted later. """
+        environ = dict(os.environ)
+        self.addCleanup(os.environ.update, environ)
+        os.environ["DISPLAY"] = self.display_name
+        monitor = SelectionMonitor()
+        if not monitor.event_driven:
+            raise unittest.SkipTest("XFixes is not available")
+        self.addCleanup(monitor._display.close)
+        before = monitor.get_sequence_number()
+
+        # Take ownership of the clipboard and check the sequence number
+        #  immediately.  The change must be counted, and waiting must not
+        #  report it again.
+        window = self.create_window()
+        window.set_selection_owner(self.display.get_atom("CLIPBOARD"),
+                                   X.CurrentTime)
+        self.display.sync()
+        after = monitor.get_sequence_number()
+        self.assertNotEqual(after, before)
+        self.assertEqual(monitor.wait(after, 0.2), after)
+
+#===========================================================================
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -39,6 +39,9 @@ from six import PY2, text_type, binary_type, integer_types
 if PY2:
     from dragonfly.error import TimeoutError
 
+# Use a monotonic clock if one is available.
+monotonic = getattr(time, "monotonic", time.time)
+
 
 #===========================================================================
 
@@ -108,35 +111,36 @@ class BaseClipboard(object):
         return result
 
     @classmethod
-    def wait_for_change(cls, timeout, step=0.001, formats=None,
-                        initial_clipboard=None):
+    def get_sequence_number(cls):
         """
-            Wait (poll) for the system clipboard to change.
-
-            This is a blocking method which returns whether or not the
-            system clipboard changed within a specified timeout period.
+            Get the system clipboard's sequence number.
 
-            Arguments:
-             - *timeout* (float) -- timeout in seconds.
-             - *step* (float, default: 0.001) -- number of seconds between
-               each check.
-             - *formats* (iterable, default: None) -- if not None, only
-               changes to the given content formats will register.  If None,
-               all formats will be observed.
-             - *initial_clipboard* (Clipboard, default: None) -- if a
-               clipboard is given, the method will wait until the system
-               clipboard differs from the instance's contents.
+            The sequence number changes whenever the system clipboard
+            changes.  *None* is returned if the platform does not support
+            clipboard change notification, in which case the
+            :meth:`wait_for_change` method compares clipboard contents
+            instead.
 
         """
-        # By default, this method retrieves the system clipboard every
-        #  *step* seconds until the contents change.  This method should be
-        #  overridden by the sub-class if there is a more efficient way for
-        #  the platform.
-        if not initial_clipboard:
-            initial_clipboard = cls(from_system=True)
-        clipboard2 = cls()
-        timeout = time.time() + float(timeout)
-        step = float(step)
+        return None
+
+    @classmethod
+    def _wait_for_sequence_change(cls, seq_no, timeout, step):
+        # Wait until the sequence number differs from *seq_no* or until
+        #  *timeout* seconds have elapsed and return the current sequence
+        #  number.  By default, the sequence number is checked every *step*
+        #  seconds.  This method should be overridden by the sub-class if
+        #  the platform can notify of changes.
+        timeout = monotonic() + timeout
+        while True:
+            current = cls.get_sequence_number()
+            remaining = timeout - monotonic()
+            if current != seq_no or remaining <= 0:
+                return current
+            time.sleep(min(step, remaining))
+
+    @classmethod
+    def _check_formats(cls, formats):
         if isinstance(formats, integer_types):
             formats = (formats,)
         elif formats:
@@ -144,8 +148,19 @@ class BaseClipboard(object):
                 if not isinstance(format, integer_types):
                     raise TypeError("Invalid clipboard format: %r"
                                     % format)
+        return formats
+
+    @classmethod
+    def _poll_for_change(cls, timeout, step, formats, initial_clipboard):
+        # Retrieve the system clipboard every *step* seconds until the
+        #  contents change.  This is used if the platform does not support
+        #  clipboard change notification.
+        if not initial_clipboard:
+            initial_clipboard = cls(from_system=True)
+        clipboard2 = cls()
+        timeout = monotonic() + float(timeout)
         result = False
-        while time.time() < timeout:
+        while monotonic() < timeout:
             # Check if the content of any relevant format has changed.
             clipboard2.copy_from_system()
             formats_to_compare = formats if formats else "all"
@@ -160,6 +175,78 @@ class BaseClipboard(object):
             time.sleep(step)
         return result
 
+    @classmethod
+    def _wait_for_change(cls, timeout, step, formats, initial_clipboard,
+                         seq_no):
+        # This method determines if the system clipboard has changed by
+        #  waiting for the sequence number to change.  Contents are only
+        #  retrieved and compared after it has changed and only if specific
+        #  clipboard formats or an initial clipboard are given.
+        formats = cls._check_formats(formats)
+        step = float(step)
+        if seq_no is None:
+            return cls._poll_for_change(timeout, step, formats,
+                                        initial_clipboard)
+
+        timeout = monotonic() + float(timeout)
+        clipboard2 = cls() if initial_clipboard else None
+        while True:
+            remaining = timeout - monotonic()
+            if remaining <= 0:
+                return False
+            new_seq_no = cls._wait_for_sequence_change(seq_no, remaining,
+                                                       step)
+            if new_seq_no == seq_no:
+                return False
+            if not initial_clipboard:
+                return True
+
+            # Check if the content of any relevant format has changed.
+            clipboard2.copy_from_system()
+            formats_to_compare = formats if formats else "all"
+            if cls._clipboard_formats_changed(formats_to_compare,
+                                              initial_clipboard,
+                                              clipboard2):
+                return True
+
+            # The clipboard change is not related.  Wait for the next one.
+            seq_no = new_seq_no
+
+    @classmethod
+    def wait_for_change(cls, timeout, step=0.001, formats=None,
+                        initial_clipboard=None):
+        """
+            Wait for the system clipboard to change.
+
+            This is a blocking method which returns whether or not the
+            system clipboard changed within a specified timeout period.
+
+            If the platform supports clipboard change notification (see
+            :meth:`get_sequence_number`), this method waits to be notified
+            and only retrieves the clipboard contents when necessary.
+            Otherwise, the system clipboard is polled.
+
+            Arguments:
+             - *timeout* (float) -- timeout in seconds.
+             - *step* (float, default: 0.001) -- number of seconds between
+               each check, if polling.
+             - *formats* (iterable, default: None) -- if not None, only
+               changes to the given content formats will register.  If None,
+               all formats will be observed.
+             - *initial_clipboard* (Clipboard, default: None) -- if a
+               clipboard is given, the method will wait until the system
+               clipboard differs from the instance's contents.
+
+        """
+        # Save the current clipboard sequence number and clipboard contents,
+        #  as necessary.  The latter is not required unless formats are
+        #  specified.
+        seq_no = cls.get_sequence_number()
+        if formats and not initial_clipboard:
+            initial_clipboard = cls(from_system=True)
+        return cls._wait_for_change(timeout, step, formats,
+                                    initial_clipboard, seq_no)
+
     @classmethod
     @contextlib.contextmanager
     def synchronized_changes(cls, timeout, step=0.001, formats=None,
@@ -173,7 +260,7 @@ class BaseClipboard(object):
             Arguments:
              - *timeout* (float) -- timeout in seconds.
              - *step* (float, default: 0.001) -- number of seconds between
-               each check.
+               each check, if polling.
              - *formats* (iterable, default: None) -- if not None, only
                changes to the given content formats will register.  If None,
                all formats will be observed.
@@ -195,8 +282,10 @@ class BaseClipboard(object):
                text = Clipboard.get_system_text()
 
         """
-        # Save the current clipboard contents, if necessary.
-        if initial_clipboard:
+        # Save the current clipboard sequence number and clipboard
+        #  contents, as necessary.
+        seq_no = cls.get_sequence_number()
+        if not initial_clipboard and (formats or seq_no is None):
             initial_clipboard = cls(from_system=True)
         try:
             # Yield for clipboard operations.
@@ -204,8 +293,8 @@ class BaseClipboard(object):
         finally:
             # Wait for the system clipboard to change, raising an error on
             #  failure.
-            changed = cls.wait_for_change(timeout, step, formats,
-                                          initial_clipboard)
+            changed = cls._wait_for_change(timeout, step, formats,
+                                           initial_clipboard, seq_no)
             if not changed:
                 message = "Timed out waiting for clipboard to change"
                 raise TimeoutError(message)
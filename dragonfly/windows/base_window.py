@@ -29,6 +29,7 @@ Base Window class
 # public methods.
 
 from locale                          import getpreferredencoding
+import threading
 
 from six                             import (string_types, integer_types,
                                              binary_type)
@@ -52,6 +53,9 @@ class BaseWindow(object):
     _windows_by_name = {}
     _windows_by_id = {}
 
+    # Window snapshot scope of the current thread.
+    _snapshot_local = threading.local()
+
     #-----------------------------------------------------------------------
     # Class methods to create new Window objects.
 
@@ -115,6 +119,60 @@ class BaseWindow(object):
         """ Get a list of all windows. """
         raise NotImplementedError()
 
+    #-----------------------------------------------------------------------
+    # Class methods for sharing window snapshots.
+
+    @classmethod
+    def begin_snapshot_scope(cls):
+        """
+        Begin a window snapshot scope in the current thread.
+
+        Window classes which read all windows and their properties at
+        once, such as the X11 classes, reuse the first snapshot read by
+        :meth:`get_all_windows` or :meth:`get_matching_windows` within the
+        scope.  Outside of a scope, windows are read again on each call.
+        Scopes may be nested; the snapshot is discarded when the outermost
+        scope ends.
+
+        :class:`ActionSeries` objects begin a scope for consecutive
+        window-matching actions, such as :class:`FocusWindow` and
+        :class:`BringApp`.
+        """
+        local = cls._snapshot_local
+        local.depth = getattr(local, "depth", 0) + 1
+
+    @classmethod
+    def end_snapshot_scope(cls):
+        """ End a scope begun with :meth:`begin_snapshot_scope`. """
+        local = cls._snapshot_local
+        local.depth = max(getattr(local, "depth", 0) - 1, 0)
+        if not local.depth:
+            local.snapshot = None
+
+    @classmethod
+    def clear_window_snapshot(cls):
+        """
+        Discard the window snapshot of the current scope, if any, so that
+        windows are read again by the next :meth:`get_all_windows` or
+        :meth:`get_matching_windows` call.
+        """
+        cls._snapshot_local.snapshot = None
+
+    @classmethod
+    def _get_scoped_snapshot(cls):
+        # Return the snapshot of the current scope, or None.
+        local = cls._snapshot_local
+        if not getattr(local, "depth", 0):
+            return None
+        return getattr(local, "snapshot", None)
+
+    @classmethod
+    def _set_scoped_snapshot(cls, snapshot):
+        # Keep a snapshot until the current scope ends, if there is one.
+        local = cls._snapshot_local
+        if getattr(local, "depth", 0):
+            local.snapshot = snapshot
+
     #-----------------------------------------------------------------------
     # Methods for initialization and introspection.
 
@@ -25,7 +25,7 @@ This module initializes the clipboard interface for the current platform.
 import os
 import sys
 
-from dragonfly._platform_checks                 import IS_X11
+from dragonfly._platform_checks                 import IS_X11, X11_BACKEND
 from dragonfly.windows.base_clipboard           import BaseClipboard
 
 
@@ -38,6 +38,10 @@ elif sys.platform == "darwin":
     from dragonfly.windows.pyperclip_clipboard  import \
         PyperclipClipboard as Clipboard
 
+elif IS_X11 and X11_BACKEND == "xlib":
+    from dragonfly.windows.x11_xlib_clipboard   import \
+        XlibClipboard as Clipboard
+
 elif IS_X11:
     from dragonfly.windows.x11_clipboard        import \
         XselClipboard as Clipboard
@@ -0,0 +1,391 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Foreground window watcher
+============================================================================
+
+The :class:`ForegroundWatcher` class keeps a cached snapshot of the
+foreground window and notifies listeners when the foreground window or its
+title changes.  Engines, contexts and the :class:`WaitWindow` action use
+the shared instance returned by :func:`get_foreground_watcher` instead of
+polling the foreground window themselves.
+
+On X11, the watcher is notified of changes by the X server through
+*PropertyNotify* events for the root window's ``_NET_ACTIVE_WINDOW``
+property and the active window's title properties.  This requires the
+*python-xlib* package.  On other platforms, or if this is not possible, the
+foreground window is polled from a background thread.  The polling
+interval is increased while nothing changes and reset when something does
+or when a caller is waiting for a change.
+
+Example usage::
+
+    from dragonfly import get_engine
+    from dragonfly.windows.foreground import get_foreground_watcher
+
+    # Update grammar contexts whenever the foreground window changes.
+    get_engine().watch_foreground()
+
+    # Be notified of changes.
+    def on_change(window):
+        print("Foreground window changed: %r" % window.title)
+
+    get_foreground_watcher().add_listener(on_change)
+
+
+Classes and functions
+----------------------------------------------------------------------------
+
+"""
+
+import logging
+import select
+import threading
+import time
+
+from dragonfly._platform_checks import IS_X11
+from dragonfly.windows.window   import Window
+
+
+# Use a monotonic clock if one is available.
+monotonic = getattr(time, "monotonic", time.time)
+
+
+#---------------------------------------------------------------------------
+
+class _X11EventSource(object):
+    """
+    Source of X11 foreground window change events.
+
+    This uses its own X connection so that it may block waiting for
+    events.
+    """
+
+    _title_properties = ("_NET_WM_NAME", "WM_NAME")
+
+    def __init__(self):
+        # Import python-xlib here, since it is optional.
+        import Xlib.display
+        from Xlib import X
+        self._X = X
+        self._display = Xlib.display.Display()
+        self._root = self._display.screen().root
+        self._active_atom = self._display.get_atom("_NET_ACTIVE_WINDOW")
+        self._title_atoms = set(self._display.get_atom(name)
+                                for name in self._title_properties)
+        self._active_window = None
+        self._root.change_attributes(event_mask=X.PropertyChangeMask)
+        self._select_active_window()
+
+    def _select_active_window(self):
+        # Select title change events for the active window.
+        X = self._X
+        prop = self._root.get_full_property(self._active_atom,
+                                            X.AnyPropertyType)
+        window_id = prop.value[0] if prop and len(prop.value) else 0
+        if self._active_window is not None:
+            try:
+                self._active_window.change_attributes(event_mask=0)
+            except Exception:
+                pass
+        self._active_window = None
+        if window_id:
+            window = self._display.create_resource_object("window",
+                                                          window_id)
+            try:
+                window.change_attributes(event_mask=X.PropertyChangeMask)
+                self._active_window = window
+            except Exception:
+                pass
+        self._display.sync()
+
+    def wait(self, timeout):
+        """
+        Wait for a foreground change event.  Return whether one was
+        received.
+        """
+        display = self._display
+        if not display.pending_events():
+            readable, _, _ = select.select([display.fileno()], [], [],
+                                           timeout)
+            if not readable:
+                return False
+
+        changed = False
+        while display.pending_events():
+            event = display.next_event()
+            if event.type != self._X.PropertyNotify:
+                continue
+            if event.atom == self._active_atom:
+                self._select_active_window()
+                changed = True
+            elif event.atom in self._title_atoms:
+                changed = True
+        return changed
+
+    def close(self):
+        self._display.close()
+
+
+#---------------------------------------------------------------------------
+
+class ForegroundWatcher(object):
+    """
+        Foreground window watcher.
+
+        Constructor arguments:
+         - *min_interval* (*float*) -- shortest polling interval in seconds
+           (default: 0.05).
+         - *max_interval* (*float*) -- longest polling interval in seconds
+           (default: 1).
+         - *use_events* (*bool*) -- whether to use platform change events
+           instead of polling, if possible (default: ``True``).
+
+    """
+
+    _log = logging.getLogger("foreground")
+
+    def __init__(self, min_interval=0.05, max_interval=1.0,
+                 use_events=True):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.use_events = use_events
+        self._listeners = []
+        self._condition = threading.Condition()
+        self._window = None
+        self._title = None
+        self._update_time = 0
+        self._event_driven = False
+        self._waiters = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    #-----------------------------------------------------------------------
+    # Methods for starting and stopping the watcher.
+
+    @property
+    def running(self):
+        """ Whether the watcher thread is running. """
+        return self._thread is not None
+
+    def start(self):
+        """ Start watching the foreground window from a daemon thread. """
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._update()
+        self._thread = threading.Thread(target=self._run,
+                                        name="dragonfly-foreground")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop watching the foreground window. """
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        thread.join()
+
+    def _create_event_source(self):
+        if not (self.use_events and IS_X11):
+            return None
+        try:
+            return _X11EventSource()
+        except Exception as e:
+            self._log.debug("Polling the foreground window, X11 change "
+                            "events are unavailable: %s", e)
+            return None
+
+    def _run(self):
+        source = self._create_event_source()
+        self._event_driven = source is not None
+        interval = self.min_interval
+        try:
+            while not self._stop_event.is_set():
+                if source is not None:
+                    # Wake up periodically to check whether to stop.
+                    if source.wait(self.max_interval):
+                        self._update()
+                    continue
+
+                # Poll, backing off while nothing changes.  Poll quickly
+                #  while callers are waiting for a change.
+                if self._update() or self._waiters:
+                    interval = self.min_interval
+                else:
+                    interval = min(interval * 2, self.max_interval)
+                self._stop_event.wait(interval)
+        except Exception as e:
+            self._log.exception("Foreground watcher failed: %s", e)
+        finally:
+            self._event_driven = False
+            if source is not None:
+                source.close()
+
+    #-----------------------------------------------------------------------
+    # Methods for getting the foreground window.
+
+    def _update(self):
+        # Get the foreground window and notify listeners and waiters if it
+        #  or its title changed.  Return whether it changed.
+        window = Window.get_foreground()
+        title = window.title
+        with self._condition:
+            changed = (self._window is None or
+                       window.handle != self._window.handle or
+                       title != self._title)
+            self._window, self._title = window, title
+            self._update_time = monotonic()
+            if changed:
+                self._condition.notify_all()
+            listeners = tuple(self._listeners) if changed else ()
+
+        for listener in listeners:
+            try:
+                listener(window)
+            except Exception as e:
+                self._log.exception("Exception during foreground change "
+                                    "listener %r: %s", listener, e)
+        return changed
+
+    def get_foreground(self, max_age=0.1):
+        """
+        Get the foreground window.
+
+        The cached window is returned if the watcher is running and is
+        either notified of changes by the platform or has checked the
+        foreground window within the last *max_age* seconds.  Otherwise,
+        the foreground window is retrieved again.
+
+        :rtype: Window
+        """
+        with self._condition:
+            window = self._window
+            fresh = (self._thread is not None and window is not None and
+                     (self._event_driven or
+                      monotonic() - self._update_time <= max_age))
+        if fresh:
+            return window
+        self._update()
+        return self._window
+
+    def invalidate(self):
+        """
+        Discard the cached foreground window.
+
+        This should be called after changing the foreground window, e.g.
+        by the :class:`FocusWindow` action.
+        """
+        with self._condition:
+            self._window = None
+            self._title = None
+
+    def wait_for(self, predicate, timeout=None):
+        """
+        Wait until the foreground window matches a condition.
+
+        The watcher is started if it is not running.
+
+        :param predicate: function called with the foreground window,
+            returning whether it matches.
+        :param timeout: maximum number of seconds to wait, or ``None`` to
+            wait indefinitely.
+        :returns: the matching window, or ``None`` on timeout.
+        :rtype: Window | None
+        """
+        self.start()
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._condition:
+            self._waiters += 1
+        try:
+            window = self.get_foreground(max_age=0)
+            title = self._title
+            while True:
+                if predicate(window):
+                    return window
+                if deadline is None:
+                    remaining = self.max_interval
+                else:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        return None
+
+                # Wait for a change, unless one happened since the window
+                #  was retrieved.
+                with self._condition:
+                    if (self._window is not None and
+                            self._window.handle == window.handle and
+                            self._title == title):
+                        self._condition.wait(min(remaining,
+                                                 self.max_interval))
+                window = self.get_foreground()
+                title = self._title
+        finally:
+            with self._condition:
+                self._waiters -= 1
+
+    #-----------------------------------------------------------------------
+    # Methods for adding and removing listeners.
+
+    def add_listener(self, listener):
+        """
+        Add a function to be called with the new foreground window when it
+        or its title changes.  The watcher is started if it is not running.
+
+        Listeners are called from the watcher's thread.
+        """
+        with self._condition:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+        self.start()
+
+    def remove_listener(self, listener):
+        """ Remove a function added with :meth:`add_listener`. """
+        with self._condition:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+
+#---------------------------------------------------------------------------
+
+_foreground_watcher = ForegroundWatcher()
+
+
+def get_foreground_watcher():
+    """
+    Get the shared :class:`ForegroundWatcher` instance.
+
+    :rtype: ForegroundWatcher
+    """
+    return _foreground_watcher
+
+
+def get_foreground():
+    """
+    Get the foreground window, using the shared watcher's cached snapshot
+    if it is current.
+
+    :rtype: Window
+    """
+    return _foreground_watcher.get_foreground()
@@ -25,7 +25,7 @@ This module initializes the monitor interface for the current platform.
 import os
 import sys
 
-from dragonfly._platform_checks import IS_X11
+from dragonfly._platform_checks import IS_X11, X11_BACKEND
 
 
 # Import the Monitor class for the current platform.
@@ -35,6 +35,9 @@ if sys.platform == "win32":
 elif sys.platform == "darwin":
     from dragonfly.windows.darwin_monitor  import DarwinMonitor as Monitor
 
+elif IS_X11 and X11_BACKEND == "xlib":
+    from dragonfly.windows.x11_xlib_monitor import XlibMonitor as Monitor
+
 elif IS_X11:
     from dragonfly.windows.x11_monitor     import X11Monitor as Monitor
 
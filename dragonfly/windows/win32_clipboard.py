@@ -28,13 +28,12 @@ This file implements an interface to the Windows system clipboard.
 # pylint: disable=W0622
 # Suppress warnings about redefining the built-in 'format' function.
 
-import contextlib
 import logging
 import sys
 import threading
 import time
 
-from six                              import PY2, integer_types, reraise
+from six                              import integer_types, reraise
 
 import pywintypes
 import win32clipboard
@@ -42,10 +41,6 @@ import win32con
 
 from dragonfly.windows.base_clipboard import BaseClipboard
 
-# Import our TimeoutError substitute for Python 2, needed below.
-if PY2:
-    from dragonfly.error import TimeoutError
-
 
 #===========================================================================
 
@@ -166,77 +161,8 @@ class Win32Clipboard(BaseClipboard):
             win32clipboard.EmptyClipboard()
 
     @classmethod
-    def _wait_for_change(cls, timeout, step, formats, initial_clipboard,
-                         seq_no):
-        # This method determines if the system clipboard has changed by
-        #  repeatedly checking the current sequence number.  Contents are
-        #  compared if specific clipboard formats are given.
-        timeout = time.time() + float(timeout)
-        step = float(step)
-        if isinstance(formats, integer_types):
-            formats = (formats,)
-        elif formats:
-            for format in formats:
-                if not isinstance(format, integer_types):
-                    raise TypeError("Invalid clipboard format: %r"
-                                    % format)
-        clipboard2 = cls() if formats or initial_clipboard else None
-        result = False
-        while time.time() < timeout:
-            seq_no_change = (win32clipboard.GetClipboardSequenceNumber()
-                             != seq_no)
-            if seq_no_change and initial_clipboard:
-                # Check if the content of any relevant format has changed.
-                clipboard2.copy_from_system()
-                formats_to_compare = formats if formats else "all"
-                result = cls._clipboard_formats_changed(formats_to_compare,
-                                                        initial_clipboard,
-                                                        clipboard2)
-
-                # Reset the sequence number if the clipboard change is not
-                #  related.
-                if not result:
-                    seq_no = win32clipboard.GetClipboardSequenceNumber()
-            elif seq_no_change:
-                result = True
-
-            if result:
-                break
-
-            # Failure. Try again after *step* seconds.
-            time.sleep(step)
-        return result
-
-    @classmethod
-    def wait_for_change(cls, timeout, step=0.001, formats=None,
-                        initial_clipboard=None):
-        # Save the current clipboard sequence number and clipboard contents,
-        #  as necessary. The latter is not required unless formats are
-        #  specified.
-        seq_no = win32clipboard.GetClipboardSequenceNumber()
-        if formats and not initial_clipboard:
-            initial_clipboard = cls(from_system=True)
-        return cls._wait_for_change(timeout, step, formats,
-                                    initial_clipboard, seq_no)
-
-    @classmethod
-    @contextlib.contextmanager
-    def synchronized_changes(cls, timeout, step=0.001, formats=None,
-                             initial_clipboard=None):
-        seq_no = win32clipboard.GetClipboardSequenceNumber()
-        if formats and not initial_clipboard:
-            initial_clipboard = cls(from_system=True)
-        try:
-            # Yield for clipboard operations.
-            yield
-        finally:
-            # Wait for the system clipboard to change, raising an error on
-            #  failure.
-            changed = cls._wait_for_change(timeout, step, formats,
-                                           initial_clipboard, seq_no)
-            if not changed:
-                message = "Timed out waiting for clipboard to change"
-                raise TimeoutError(message)
+    def get_sequence_number(cls):
+        return win32clipboard.GetClipboardSequenceNumber()
 
     #-----------------------------------------------------------------------
 
@@ -26,7 +26,7 @@ for the current platform.
 import os
 import sys
 
-from dragonfly._platform_checks import IS_X11
+from dragonfly._platform_checks import IS_X11, X11_BACKEND
 
 
 # Import the Window class for the current platform.
@@ -36,6 +36,9 @@ if sys.platform == "win32":
 elif sys.platform == "darwin":
     from dragonfly.windows.darwin_window import DarwinWindow as Window
 
+elif IS_X11 and X11_BACKEND == "xlib":
+    from dragonfly.windows.x11_xlib_window import XlibWindow as Window
+
 elif IS_X11:
     from dragonfly.windows.x11_window    import X11Window as Window
 
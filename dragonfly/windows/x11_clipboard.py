@@ -38,6 +38,7 @@ import sys
 from six                              import integer_types, binary_type
 
 from dragonfly.windows.base_clipboard import BaseClipboard
+from dragonfly.windows.x11_selection  import get_selection_monitor
 
 
 #===========================================================================
@@ -62,6 +63,11 @@ class BaseX11Clipboard(BaseClipboard):
     #: Format for the clipboard X selection (alias of format_unicode).
     format_x_clipboard = 13
 
+    #: Whether to wait for X selection owner changes using a
+    #: :class:`dragonfly.windows.x11_selection.SelectionMonitor` instead of
+    #: polling the selection contents.  This requires *python-xlib*.
+    use_selection_monitor = True
+
     format_names = {
         format_text:        "text",
         format_unicode:     "unicode",
@@ -80,6 +86,39 @@ class BaseX11Clipboard(BaseClipboard):
     def _set_x_selection(cls, format, content):
         raise NotImplementedError()
 
+    @classmethod
+    def _get_x_selections(cls, formats):
+        # Get the text of multiple X selections as a dictionary, with None
+        #  for unavailable selections.  Sub-classes may override this
+        #  method to read them together.
+        result = {}
+        for format in formats:
+            try:
+                result[format] = cls._get_x_selection(format)
+            except TypeError:
+                result[format] = None
+        return result
+
+    #-----------------------------------------------------------------------
+
+    @classmethod
+    def _get_selection_monitor(cls):
+        if not cls.use_selection_monitor:
+            return None
+        return get_selection_monitor()
+
+    @classmethod
+    def get_sequence_number(cls):
+        # Use the selection monitor's sequence number, if possible.
+        monitor = cls._get_selection_monitor()
+        if monitor is None:
+            return None
+        return monitor.get_sequence_number()
+
+    @classmethod
+    def _wait_for_sequence_change(cls, seq_no, timeout, step):
+        return cls._get_selection_monitor().wait(seq_no, timeout)
+
     #-----------------------------------------------------------------------
 
     @classmethod
@@ -126,11 +165,14 @@ class BaseX11Clipboard(BaseClipboard):
                 raise TypeError("Invalid clipboard format: %r"
                                 % format)
 
-        # Retrieve the system clipboard content.
-        try:
-            clipboard_text = self._get_x_selection(self.format_x_clipboard)
-        except TypeError:
-            clipboard_text = u""
+        # Retrieve the system clipboard content and the content of other
+        #  required X selections.
+        selections = [self.format_x_clipboard]
+        selections.extend(format for format in (self.format_x_primary,
+                                                self.format_x_secondary)
+                          if format in formats)
+        selection_texts = self._get_x_selections(selections)
+        clipboard_text = selection_texts[self.format_x_clipboard] or u""
         contents = {}
 
         # Populate the clipboard contents dictionary and raise errors for
@@ -141,7 +183,9 @@ class BaseX11Clipboard(BaseClipboard):
                 # Retrieve and use other X selections as text, if required.
                 if format in (self.format_x_primary,
                               self.format_x_secondary):
-                    text = self._get_x_selection(format)
+                    text = selection_texts[format]
+                    if text is None:
+                        raise TypeError()
                 else:
                     text = clipboard_text
 
@@ -0,0 +1,307 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+X selection change monitor
+============================================================================
+
+The :class:`SelectionMonitor` class keeps a sequence number which is
+increased whenever the owner of one of the monitored X selections changes,
+similar to the clipboard sequence number on Windows.  X11 clipboard
+classes use it to wait for clipboard changes without retrieving the
+clipboard contents repeatedly.
+
+The X server notifies the monitor of selection owner changes through the
+*XFixes* extension, if it is available.  Otherwise, the selection owners
+and the times at which they acquired the selections are polled, which
+only needs one X connection and does not transfer the selection contents.
+Either way, the *python-xlib* package is required.
+
+"""
+
+import logging
+import select
+import threading
+import time
+
+
+# Use a monotonic clock if one is available.
+monotonic = getattr(time, "monotonic", time.time)
+
+
+#---------------------------------------------------------------------------
+
+class SelectionMonitor(object):
+    """
+        X selection change monitor.
+
+        This class uses its own X connection, which is opened using the
+        *DISPLAY* environment variable.  An error is raised if this is not
+        possible or if *python-xlib* is not installed.
+
+        Constructor arguments:
+         - *selections* (*sequence*) -- names of the X selections to
+           monitor (default: ``CLIPBOARD``, ``PRIMARY`` and
+           ``SECONDARY``).
+         - *use_events* (*bool*) -- whether to use *XFixes* change events
+           instead of polling, if possible (default: ``True``).
+         - *min_interval* (*float*) -- shortest polling interval in
+           seconds (default: 0.005).
+         - *max_interval* (*float*) -- longest polling interval in seconds
+           (default: 0.2).
+         - *query_timeout* (*float*) -- seconds to wait for a selection
+           owner to report its timestamp while polling (default: 0.1).
+
+    """
+
+    _log = logging.getLogger("clipboard")
+
+    def __init__(self, selections=("CLIPBOARD", "PRIMARY", "SECONDARY"),
+                 use_events=True, min_interval=0.005, max_interval=0.2,
+                 query_timeout=0.1):
+        # Import python-xlib here, since it is optional.
+        import Xlib.display
+        from Xlib import X, Xatom
+        self._X = X
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.query_timeout = query_timeout
+        self._display = display = Xlib.display.Display()
+        self._root = display.screen().root
+        self._selections = [display.get_atom(name) for name in selections]
+        self._timestamp_atom = display.get_atom("TIMESTAMP")
+        self._property_atom = display.get_atom("DRAGONFLY_TIMESTAMP")
+        self._integer_atom = Xatom.INTEGER
+        self._sequence = 0
+        self._state = None
+        self._condition = threading.Condition()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Create a window for receiving selection timestamps.
+        self._window = self._root.create_window(0, 0, 1, 1, 0,
+                                                X.CopyFromParent)
+
+        # Use XFixes events if possible.  Otherwise, save the initial
+        #  selection state for polling.
+        self._event_base = None
+        if use_events and self._select_events():
+            self._thread = threading.Thread(target=self._run,
+                                            name="dragonfly-selection")
+            self._thread.daemon = True
+            self._thread.start()
+        else:
+            self._state = self._query_state()
+
+    @property
+    def event_driven(self):
+        """ Whether the monitor is notified of changes by the X server. """
+        return self._thread is not None
+
+    #-----------------------------------------------------------------------
+    # Methods for XFixes events.
+
+    def _select_events(self):
+        display = self._display
+        if not display.has_extension("XFIXES"):
+            self._log.debug("Polling X selections, the XFixes extension "
+                            "is unavailable")
+            return False
+
+        from Xlib.ext import xfixes
+        display.xfixes_query_version()
+        mask = (xfixes.XFixesSetSelectionOwnerNotifyMask |
+                xfixes.XFixesSelectionWindowDestroyNotifyMask |
+                xfixes.XFixesSelectionClientCloseNotifyMask)
+        for selection in self._selections:
+            display.xfixes_select_selection_input(self._root, selection,
+                                                  mask)
+        display.flush()
+        self._event_base = (display.query_extension("XFIXES").first_event
+                            + xfixes.XFixesSelectionNotify)
+        return True
+
+    def _handle_events(self):
+        # Handle any events which have been received and increase the
+        #  sequence number if a selection changed.
+        display = self._display
+        changed = False
+        with self._lock:
+            while display.pending_events():
+                event = display.next_event()
+                if (event.type == self._event_base and
+                        event.selection in self._selections):
+                    changed = True
+        if changed:
+            with self._condition:
+                self._sequence += 1
+                self._condition.notify_all()
+
+    def _sync(self):
+        # Make a round trip to the X server, so that notifications of
+        #  earlier selection changes, e.g. by this process, are received,
+        #  and handle them.  They would otherwise be counted as later
+        #  changes.
+        try:
+            self._display.sync()
+            self._handle_events()
+        except Exception as e:
+            self._log.debug("Failed to synchronize X selection monitor: "
+                            "%s", e)
+
+    def _run(self):
+        display = self._display
+        try:
+            while True:
+                if not display.pending_events():
+                    select.select([display.fileno()], [], [])
+                self._handle_events()
+        except Exception as e:
+            # The connection was probably closed.
+            self._log.debug("X selection monitor stopped: %s", e)
+
+    #-----------------------------------------------------------------------
+    # Methods for polling.
+
+    def _query_timestamp(self, selection):
+        # Ask the selection owner for the time it acquired the selection.
+        #  Return None if it does not answer in time.
+        X = self._X
+        display = self._display
+        self._window.convert_selection(selection, self._timestamp_atom,
+                                       self._property_atom, X.CurrentTime)
+        display.flush()
+        deadline = monotonic() + self.query_timeout
+        while True:
+            while display.pending_events():
+                event = display.next_event()
+                if (event.type == X.SelectionNotify and
+                        event.selection == selection):
+                    if event.property == X.NONE:
+                        return None
+                    prop = self._window.get_full_property(
+                        self._property_atom, X.AnyPropertyType)
+                    self._window.delete_property(self._property_atom)
+                    if prop is None or not len(prop.value):
+                        return None
+                    return int(prop.value[0])
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return None
+            select.select([display.fileno()], [], [], remaining)
+
+    def _query_state(self):
+        # Get the owner of each selection and the time it was acquired.
+        state = []
+        for selection in self._selections:
+            owner = self._display.get_selection_owner(selection)
+            owner_id = getattr(owner, "id", owner)
+            timestamp = None
+            if owner_id:
+                timestamp = self._query_timestamp(selection)
+            state.append((owner_id, timestamp))
+        return state
+
+    def _poll(self):
+        with self._lock:
+            state = self._query_state()
+            if state != self._state:
+                self._state = state
+                self._sequence += 1
+            return self._sequence
+
+    #-----------------------------------------------------------------------
+    # Public methods.
+
+    def get_sequence_number(self):
+        """
+        Get the current sequence number.
+
+        Changes made before this method is called, e.g. by setting the
+        clipboard, are always counted in the returned number.
+
+        :rtype: int
+        """
+        if self._thread is None:
+            return self._poll()
+        self._sync()
+        with self._condition:
+            return self._sequence
+
+    def wait(self, sequence_number, timeout):
+        """
+        Wait until the sequence number differs from *sequence_number* or
+        until *timeout* seconds have elapsed, then return the current
+        sequence number.
+
+        While polling, the polling interval is doubled each time nothing
+        changed, from *min_interval* up to *max_interval*.
+
+        :rtype: int
+        """
+        deadline = monotonic() + timeout
+        if self._thread is not None:
+            self._sync()
+            with self._condition:
+                while self._sequence == sequence_number:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                return self._sequence
+
+        interval = self.min_interval
+        while True:
+            current = self._poll()
+            remaining = deadline - monotonic()
+            if current != sequence_number or remaining <= 0:
+                return current
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.max_interval)
+
+
+#---------------------------------------------------------------------------
+
+_monitor = None
+_monitor_lock = threading.Lock()
+_monitor_failed = False
+
+
+def get_selection_monitor():
+    """
+    Get the shared :class:`SelectionMonitor` instance, creating it if
+    necessary.
+
+    ``None`` is returned if the monitor cannot be created, e.g. because
+    *python-xlib* is not installed.
+
+    :rtype: SelectionMonitor | None
+    """
+    global _monitor, _monitor_failed
+    with _monitor_lock:
+        if _monitor is None and not _monitor_failed:
+            try:
+                _monitor = SelectionMonitor()
+            except Exception as e:
+                _monitor_failed = True
+                SelectionMonitor._log.debug("X selection changes cannot be "
+                                            "monitored: %s", e)
+        return _monitor
@@ -28,17 +28,77 @@ Window class for X11
 
 from __future__                    import print_function
 
+import collections
 import locale
 import logging
 import os
 from subprocess                    import Popen, PIPE
 import sys
+import threading
 
 import psutil
 from six                           import binary_type
 
 from dragonfly.windows.base_window import BaseWindow
 from dragonfly.windows.rectangle   import Rectangle
+from dragonfly.windows.x11_xdotool import (get_xdotool_session,
+                                          XdotoolSessionError)
+
+
+#---------------------------------------------------------------------------
+# Process-wide cache of executables, keyed on process ID and creation time
+#  so that reused process IDs are handled.
+
+_executable_cache = collections.OrderedDict()
+_executable_cache_lock = threading.Lock()
+
+#: Maximum number of entries in the executable cache.
+EXECUTABLE_CACHE_SIZE = 256
+
+
+def get_process_executable(pid):
+    """
+    Get the executable path of a process, or its name if the path cannot
+    be read.
+
+    The process is looked up directly by ID.  Results are cached per
+    process.  An empty string is returned if the process does not exist.
+
+    :param pid: process ID
+    :type pid: int
+    :rtype: str
+    """
+    if not pid:
+        return ''
+    try:
+        process = psutil.Process(pid)
+        key = (pid, process.create_time())
+    except (psutil.Error, ValueError):
+        return ''
+
+    with _executable_cache_lock:
+        executable = _executable_cache.get(key)
+        if executable is not None:
+            # Mark the entry as recently used.
+            del _executable_cache[key]
+            _executable_cache[key] = executable
+            return executable
+
+    try:
+        executable = process.exe()
+    except psutil.Error:
+        executable = ''
+    if not executable:
+        try:
+            executable = process.name()
+        except psutil.Error:
+            return ''
+
+    with _executable_cache_lock:
+        _executable_cache[key] = executable
+        while len(_executable_cache) > EXECUTABLE_CACHE_SIZE:
+            _executable_cache.popitem(last=False)
+    return executable
 
 
 class X11Window(BaseWindow):
@@ -67,6 +127,14 @@ class X11Window(BaseWindow):
     xdotool = "xdotool"
     xprop = "xprop"
 
+    # Whether to run simple xdotool queries through a persistent xdotool
+    #  session instead of running xdotool each time.
+    use_xdotool_session = True
+
+    # Properties read for each window in a snapshot.
+    _snapshot_properties = ('_NET_WM_PID', '_NET_WM_STATE', 'WM_CLASS',
+                            '_NET_WM_NAME', 'WM_NAME')
+
     @classmethod
     def _run_command(cls, command, arguments):
         """
@@ -122,6 +190,10 @@ class X11Window(BaseWindow):
         if stdout: print(stdout)
         return return_code == 0
 
+    @classmethod
+    def _run_wmctrl_command(cls, arguments):
+        return cls._run_command(cls.wmctrl, arguments)
+
     @classmethod
     def _run_wmctrl_command_simple(cls, arguments):
         return cls._run_command_simple(cls.wmctrl, arguments)
@@ -130,6 +202,22 @@ class X11Window(BaseWindow):
     def _run_xdotool_command(cls, arguments):
         return cls._run_command(cls.xdotool, arguments)
 
+    @classmethod
+    def _run_xdotool_query(cls, arguments):
+        # Run an xdotool command that prints one line of output using the
+        #  shared xdotool session, if possible.  Fall back on running
+        #  xdotool if there is no output, so that errors are reported.
+        #  Queries are safe to run again if the session failed.
+        if cls.use_xdotool_session:
+            session = get_xdotool_session(cls.xdotool)
+            try:
+                stdout = session.run(arguments)
+            except XdotoolSessionError:
+                stdout = None
+            if stdout:
+                return stdout.rstrip(), 0
+        return cls._run_xdotool_command(arguments)
+
     @classmethod
     def _run_xdotool_command_simple(cls, arguments):
         return cls._run_command_simple(cls.xdotool, arguments)
@@ -143,7 +231,7 @@ class X11Window(BaseWindow):
 
     @classmethod
     def get_foreground(cls):
-        window_id, return_code = cls._run_xdotool_command([
+        window_id, return_code = cls._run_xdotool_query([
             "getactivewindow"
         ])
         if return_code == 0:
@@ -152,28 +240,88 @@ class X11Window(BaseWindow):
             return cls.get_window(0)  # return an invalid window
 
     @classmethod
-    def get_all_windows(cls):
-        # Get all window IDs using 'xdotool search'.
-        stdout, return_code = cls._run_xdotool_command([
-            'search', '--onlyvisible', '--name', ''
-        ])
-        if return_code == 0:
-            lines = [line for line in stdout.split('\n') if line]
-            windows = [cls.get_window(int(line)) for line in lines]
-        else:
-            # Return any windows found previously.
-            if stdout: print(stdout)
-            return list(cls._windows_by_id.values())
+    def _read_window_snapshot(cls, properties):
+        # Read the properties of all client windows, in-process if
+        #  python-xlib is available.
+        try:
+            from dragonfly.windows.x11_xlib import (get_window_properties,
+                                                    get_client_window_ids)
+            return [(window_id, get_window_properties(window_id,
+                                                      properties))
+                    for window_id in get_client_window_ids()]
+        except Exception as e:
+            cls._log.debug("Could not read window properties "
+                           "in-process: %s", e)
+
+        # Otherwise, list the client windows with their process IDs and
+        #  titles using one wmctrl process.  Leave out windows which are
+        #  not visible, as listed by one xdotool process.  Window states
+        #  are not read.
+        try:
+            stdout, return_code = cls._run_wmctrl_command(['-lp'])
+        except OSError:
+            return None
+        if return_code > 0:
+            return None
+        result = []
+        for line in stdout.split('\n'):
+            parts = line.split(None, 4)
+            if len(parts) < 4:
+                continue
+            try:
+                window_id = int(parts[0], 16)
+            except ValueError:
+                continue
+            props = {'_NET_WM_NAME': parts[4] if len(parts) > 4 else ''}
+            if parts[2] != '0':
+                props['_NET_WM_PID'] = parts[2]
+            result.append((window_id, props))
+        try:
+            stdout, _ = cls._run_xdotool_command([
+                'search', '--onlyvisible', '--name', ''
+            ])
+        except OSError:
+            return result
+        visible = set(int(line) for line in stdout.split('\n')
+                      if line.strip().isdigit())
+        return [(window_id, props) for window_id, props in result
+                if window_id in visible]
+
+    @classmethod
+    def _get_window_snapshot(cls):
+        # Return a list of (window, properties) pairs for all client
+        #  windows, reusing the snapshot of the current snapshot scope, if
+        #  there is one.  Properties are None for windows that could not be
+        #  read.  Minimized windows are left out.
+        snapshot = cls._get_scoped_snapshot()
+        if snapshot is not None:
+            return snapshot
+
+        items = cls._read_window_snapshot(cls._snapshot_properties)
+        if items is None:
+            # Use windows found previously.  Their properties are unknown.
+            return [(window, None) for window
+                    in list(cls._windows_by_id.values())]
+
+        snapshot = []
+        for window_id, props in items:
+            if cls._is_minimized(props.get('_NET_WM_STATE')):
+                continue
+            window = cls.get_window(window_id)
+            pid = props.get('_NET_WM_PID')
+            window._pid = int(pid) if pid else None
+            snapshot.append((window, props))
+        cls._set_scoped_snapshot(snapshot)
+        return snapshot
 
-        # Exclude window IDs that have no associated process ID.
+    @classmethod
+    def get_all_windows(cls):
+        # Exclude windows that have no associated process ID.
         result = []
-        for window in windows:
-            props = cls._get_properties_from_xprop(window, '_NET_WM_PID',
-                                                   '_NET_WM_STATE')
-            if '_NET_WM_PID' not in props:
+        for window, props in cls._get_window_snapshot():
+            if props is not None and '_NET_WM_PID' not in props:
                 continue
-            has_state = '_NET_WM_STATE' not in props
-            result.append((window, has_state))
+            result.append((window, '_NET_WM_STATE' not in (props or {})))
 
         # Sort the list so that windows without _NET_WM_STATE are
         # last.
@@ -188,37 +336,27 @@ class X11Window(BaseWindow):
         if title:
             title = title.lower()
 
-        # Get matching window IDs using 'xdotool search'.
-        args = ['search', '--onlyvisible', '--name']
-        if title:
-            args.append(title)
-        else:
-            args.append('')
-        stdout, return_code = cls._run_xdotool_command(args)
-        if return_code == 0:
-            lines = [line for line in stdout.split('\n') if line]
-            windows = [cls.get_window(int(line)) for line in lines]
-        else:
-            # Use windows found previously.
-            if stdout: print(stdout)
-            windows = list(cls._windows_by_id.values())
-
         matching = []
-        for window in windows:
+        for window, props in cls._get_window_snapshot():
+            if title:
+                if props is None:
+                    window_title = window.title
+                else:
+                    window_title = props.get('_NET_WM_NAME',
+                                             props.get('WM_NAME', ''))
+                if window_title.lower().find(title) == -1:
+                    continue
             if executable:
                 if window.executable.lower().find(executable) == -1:
                     continue
-            if title:
-                if window.title.lower().find(title) == -1:
-                    continue
 
             # Match found.
-            matching.append(window)
+            matching.append((window, '_NET_WM_STATE' not in (props or {})))
 
         # Sort the window list so that windows without _NET_WM_STATE are
         # last.
-        matching.sort(key=lambda w: w.state is None)
-        return matching
+        matching.sort(key=lambda pair: pair[1])
+        return [w for (w, _) in matching]
 
     #-----------------------------------------------------------------------
     # Methods for initialization and introspection.
@@ -235,14 +373,9 @@ class X11Window(BaseWindow):
     #-----------------------------------------------------------------------
     # Methods and properties for window attributes.
 
-    def _get_properties_from_xprop(self, *properties):
-        # This method retrieves windows properties by shelling out to xprop.
+    @classmethod
+    def _parse_xprop_output(cls, stdout):
         result = {}
-        args = ['-id', self.id] + list(properties)
-        stdout, return_code = self._run_xprop_command(args)
-        if return_code > 0:
-            return {}
-
         for line in stdout.split('\n'):
             line = line.split(' =', 1)
             if len(line) != 2:
@@ -267,13 +400,21 @@ class X11Window(BaseWindow):
             result['cls_name'] = window_class_name
             result['cls'] = window_class
 
-        # Return the requested properties.
+        # Return the parsed properties.
         return result
 
+    def _get_properties_from_xprop(self, *properties):
+        # This method retrieves windows properties by shelling out to xprop.
+        args = ['-id', self.id] + list(properties)
+        stdout, return_code = self._run_xprop_command(args)
+        if return_code > 0:
+            return {}
+        return self._parse_xprop_output(stdout)
+
     def _get_window_text(self):
         # Get the title text.
         args = ['getwindowname', self.id]
-        stdout, return_code = self._run_xdotool_command(args)
+        stdout, return_code = self._run_xdotool_query(args)
         if return_code == 0:
             return stdout
         else:
@@ -354,18 +495,12 @@ class X11Window(BaseWindow):
         return self.state is None
 
     def _get_window_module(self):
-        # Get the executable using the process ID and psutil.
+        # Get the executable using the process ID.
         pid = self.pid
         if pid == -1:
             self._executable = ''
         elif self._executable == -1:
-            for p in psutil.process_iter(attrs=['pid', 'exe', 'name']):
-                if p.info['pid'] == pid:
-                    self._executable = p.info['exe'] or p.info['name']
-                    return self._executable
-
-            # Set to '' if it wasn't found.
-            self._executable = ''
+            self._executable = get_process_executable(pid)
 
         return self._executable
 
@@ -481,6 +616,7 @@ class X11Window(BaseWindow):
     def close(self):
         # Use wmctrl to gracefully close the window.  If this fails,
         # fallback on xdotool.
+        self.clear_window_snapshot()
         try:
             result = self._run_wmctrl_command_simple(['-ic', self.id])
         except OSError:
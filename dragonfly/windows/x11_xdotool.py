@@ -0,0 +1,302 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Persistent xdotool session for X11
+============================================================================
+
+Starting a new *xdotool* process for every keyboard action and foreground
+window query is slow.  This module implements a long-lived *xdotool*
+co-process driven over stdin (``xdotool -``), which is shared by the X11
+keyboard and window classes.
+
+Each request is written as one script line, followed by a
+``getdisplaygeometry --shell`` command.  The output of the latter marks
+the end of the request's output.  The session is checked with a handshake
+when it is started.  If *xdotool* does not execute script lines as they
+are read, or if its output cannot be line-buffered, the session is
+disabled and callers fall back on running a new *xdotool* process for
+each command.  If the co-process exits, e.g. because a command failed, it
+is restarted for the next request.  A request which was written to the
+co-process may have been executed partly or fully, so it is not run
+again; :class:`XdotoolSessionError` is raised instead.
+
+"""
+
+from __future__ import print_function
+
+import logging
+import os
+from subprocess import Popen, PIPE
+import sys
+import threading
+import time
+
+from six.moves import queue
+
+try:
+    from shutil import which
+except ImportError:
+    # Python 2.
+    from distutils.spawn import find_executable as which
+
+
+#---------------------------------------------------------------------------
+
+class XdotoolSessionError(Exception):
+    """
+    Raised if an *xdotool* session request fails after it was written to
+    the co-process.  The request may have been executed.
+    """
+
+
+class XdotoolSession(object):
+    """
+        Long-lived *xdotool* co-process.
+
+        Constructor arguments:
+         - *xdotool* (*str*) -- the *xdotool* executable.
+         - *timeout* (*float*) -- seconds to wait for a response, in
+           addition to any ``sleep`` commands in the request (default: 5).
+         - *handshake_timeout* (*float*) -- seconds to wait for the
+           co-process to respond when it is started (default: 0.5).  The
+           session is disabled if it does not respond in time.
+
+    """
+
+    _log = logging.getLogger("xdotool")
+
+    # Sentinel command and the output line that ends its response.
+    _sentinel_command = "getdisplaygeometry --shell"
+    _sentinel_prefix = "SCREEN="
+
+    # Seconds to wait for the co-process to exit when it is stopped.
+    _stop_timeout = 0.5
+
+    def __init__(self, xdotool="xdotool", timeout=5, handshake_timeout=0.5):
+        self.xdotool = xdotool
+        self.timeout = timeout
+        self.handshake_timeout = handshake_timeout
+        self.available = True
+        self._process = None
+        self._stdout_queue = None
+        self._lock = threading.Lock()
+
+    #-----------------------------------------------------------------------
+    # Process management methods.
+
+    def _start(self):
+        # Line-buffer xdotool's output using stdbuf, if it is available.
+        #  The session cannot work without it.
+        stdbuf = which("stdbuf")
+        if not stdbuf:
+            self._log.debug("stdbuf is not available, not using an "
+                            "xdotool session")
+            self.available = False
+            return False
+
+        kwargs = dict(stdin=PIPE, stdout=PIPE, stderr=PIPE, bufsize=0)
+        if os.name == 'posix':
+            kwargs.update(dict(preexec_fn=os.setsid))
+        try:
+            process = Popen([stdbuf, "-oL", self.xdotool, "-"], **kwargs)
+        except OSError as e:
+            self._log.debug("Failed to start xdotool session: %s", e)
+            self.available = False
+            return False
+
+        # Read stdout and stderr from daemon threads.
+        stdout_queue = queue.Queue()
+        for target, args in ((self._read_stdout, (process, stdout_queue)),
+                             (self._read_stderr, (process,))):
+            thread = threading.Thread(target=target, args=args,
+                                      name="xdotool-session")
+            thread.daemon = True
+            thread.start()
+        self._process = process
+        self._stdout_queue = stdout_queue
+
+        # Check that script lines are executed as they are read.  Some
+        #  versions of xdotool only execute scripts at EOF, so don't wait
+        #  long for a response.
+        try:
+            responded = self._request("", 0,
+                                      self.handshake_timeout) is not None
+        except XdotoolSessionError:
+            responded = False
+        if not responded:
+            self._log.debug("xdotool session did not respond, not using "
+                            "it")
+            self.stop()
+            self.available = False
+            return False
+        self._log.debug("Started xdotool session (pid %d)", process.pid)
+        return True
+
+    @staticmethod
+    def _read_stdout(process, stdout_queue):
+        for line in iter(process.stdout.readline, b""):
+            stdout_queue.put(line)
+        stdout_queue.put(None)
+
+    @staticmethod
+    def _read_stderr(process):
+        # Print error messages to stderr. Filter BadWindow messages.
+        for line in iter(process.stderr.readline, b""):
+            line = line.decode("utf-8", "replace").rstrip()
+            if line and "BadWindow" not in line:
+                print(line, file=sys.stderr)
+
+    def stop(self):
+        """ Stop the co-process, if it is running. """
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except (IOError, OSError):
+            pass
+
+        # Wait a short time for the co-process to exit, then terminate or
+        #  kill it.  It may be hung.
+        for method in (None, process.terminate, process.kill):
+            if method is not None:
+                try:
+                    method()
+                except OSError:
+                    pass
+            if self._wait_for_exit(process, self._stop_timeout):
+                return
+        self._log.warning("xdotool session process (pid %d) did not exit",
+                          process.pid)
+
+    @staticmethod
+    def _wait_for_exit(process, timeout):
+        # Popen.wait() has no timeout argument on Python 2.
+        end_time = time.time() + timeout
+        while process.poll() is None:
+            if time.time() >= end_time:
+                return False
+            time.sleep(0.01)
+        return True
+
+    #-----------------------------------------------------------------------
+    # Request methods.
+
+    def _request(self, line, sleep_time, timeout=None):
+        # Write the request line, if any, and the sentinel command.  Return
+        #  None if it could not be written.
+        data = line + "\n" if line else ""
+        data += self._sentinel_command + "\n"
+        try:
+            self._process.stdin.write(data.encode("utf-8"))
+            self._process.stdin.flush()
+        except (IOError, OSError):
+            return None
+
+        # Read output lines until the end of the sentinel output.
+        if timeout is None:
+            timeout = self.timeout
+        lines = []
+        while True:
+            try:
+                output = self._stdout_queue.get(timeout=timeout
+                                                + sleep_time)
+            except queue.Empty:
+                raise XdotoolSessionError("xdotool session did not respond")
+            if output is None:
+                raise XdotoolSessionError("xdotool session exited")
+            output = output.decode("utf-8", "replace").rstrip("\r\n")
+            lines.append(output)
+            if output.startswith(self._sentinel_prefix):
+                break
+
+        # Remove the three lines of sentinel output.
+        return "\n".join(lines[:-3])
+
+    def run(self, arguments):
+        """
+        Run an *xdotool* command in the session.
+
+        Arguments containing whitespace cannot be passed to the session.
+        ``None`` is returned in that case, if the session is not available,
+        or if the command could not be written to the session.  Callers
+        should then fall back on running the command in a new process.
+
+        If the command was written, but the session exited or stopped
+        responding, :class:`XdotoolSessionError` is raised and the session
+        is restarted for the next request.  The command may have been
+        executed, so callers should only run it again if that is safe.
+
+        :param arguments: command arguments
+        :type arguments: list
+        :returns: output of the command, or ``None``
+        :rtype: str
+        :raises: XdotoolSessionError
+        """
+        if not self.available:
+            return None
+        arguments = [str(arg) for arg in arguments]
+        sleep_time = 0
+        for i, argument in enumerate(arguments):
+            if not argument or argument.split() != [argument]:
+                return None
+            if i > 0 and arguments[i-1] == "sleep":
+                sleep_time += float(argument)
+
+        with self._lock:
+            # (Re)start the co-process, if necessary.
+            process = self._process
+            if process is None or process.poll() is not None:
+                self.stop()
+                if not self._start():
+                    return None
+
+            try:
+                output = self._request(" ".join(arguments), sleep_time)
+            except XdotoolSessionError as e:
+                # The co-process exited or stopped responding.  Restart it
+                #  for the next request.
+                self._log.debug("xdotool session command failed: %s: %s",
+                                " ".join(arguments), e)
+                self.stop()
+                raise
+            if output is None:
+                self.stop()
+            return output
+
+
+#---------------------------------------------------------------------------
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_xdotool_session(xdotool="xdotool"):
+    """
+    Get the shared :class:`XdotoolSession` for an *xdotool* executable.
+
+    :rtype: XdotoolSession
+    """
+    with _sessions_lock:
+        session = _sessions.get(xdotool)
+        if session is None:
+            session = _sessions[xdotool] = XdotoolSession(xdotool)
+        return session
@@ -0,0 +1,183 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Shared X11 connection for the in-process X11 back-end
+============================================================================
+
+The in-process X11 back-end talks to the X server directly using the
+*python-xlib* package instead of running *xdotool*, *xprop*, *wmctrl* and
+*xrandr*.  It is used if the *DRAGONFLY_X11_BACKEND* environment variable
+is set to ``"xlib"``.
+
+All back-end classes share one persistent X connection, which is returned
+by :func:`get_display`.
+
+"""
+
+import threading
+
+# Enable python-xlib's thread-safe mode before opening any connections.
+import Xlib.threaded  # pylint: disable=unused-import
+import Xlib.display
+import Xlib.error
+from Xlib import X
+
+from six import binary_type, text_type
+
+
+#---------------------------------------------------------------------------
+
+_display = None
+_display_lock = threading.Lock()
+
+
+def get_display():
+    """
+    Get the shared X display connection, opening it if necessary.
+
+    The connection is opened using the *DISPLAY* environment variable.
+
+    :rtype: Xlib.display.Display
+    """
+    global _display
+    with _display_lock:
+        if _display is None:
+            _display = Xlib.display.Display()
+        return _display
+
+
+def set_display(display):
+    """
+    Set the shared X display connection.
+
+    This is useful for using a connection to a specific X server, e.g.
+    one started with *Xvfb* for testing.  Pass ``None`` to open a new
+    connection the next time :func:`get_display` is called.
+
+    :param display: display connection or ``None``
+    :type display: Xlib.display.Display
+    """
+    global _display
+    with _display_lock:
+        _display = display
+
+
+#---------------------------------------------------------------------------
+# Helper functions for reading window properties.
+
+def get_property(window, name, property_type=X.AnyPropertyType):
+    """
+    Get the value of a window property.
+
+    ``None`` is returned if the property is not set or if the window does
+    not exist.
+    """
+    display = get_display()
+    try:
+        prop = window.get_full_property(display.get_atom(name),
+                                        property_type)
+    except Xlib.error.XError:
+        return None
+    if prop is None:
+        return None
+    return prop.value
+
+
+def get_property_string(window, name):
+    """
+    Get the value of a string window property as text.
+
+    ``None`` is returned if the property is not set.
+    """
+    value = get_property(window, name)
+    if value is None:
+        return None
+    if isinstance(value, binary_type):
+        value = value.decode("utf-8", "replace")
+    return value
+
+
+def get_atom_names(atoms):
+    """ Get the names of a sequence of atoms. """
+    display = get_display()
+    names = []
+    for atom in atoms:
+        try:
+            names.append(display.get_atom_name(atom))
+        except Xlib.error.XError:
+            pass
+    return names
+
+
+# Atom list properties which xprop prints as comma-separated names.
+_atom_list_properties = ("_NET_WM_STATE", "_NET_WM_WINDOW_TYPE")
+
+
+def get_window_properties(window_id, names):
+    """
+    Get window properties in the same form as parsed *xprop* output.
+
+    String properties are returned as text, atom lists as comma-separated
+    atom names and other lists as comma-separated numbers.  The
+    ``WM_CLASS`` property is split into ``cls_name`` and ``cls`` values.
+    Properties which are not set are omitted.
+
+    :param window_id: window ID
+    :type window_id: int
+    :param names: property names
+    :type names: sequence
+    :rtype: dict
+    """
+    result = {}
+    window = get_display().create_resource_object("window", window_id)
+    for name in names:
+        if name == "WM_CLASS":
+            try:
+                wm_class = window.get_wm_class()
+            except Xlib.error.XError:
+                wm_class = None
+            if wm_class:
+                result['cls_name'], result['cls'] = wm_class
+            continue
+
+        value = get_property(window, name)
+        if value is None:
+            continue
+        if name in _atom_list_properties:
+            value = ", ".join(get_atom_names(value))
+        elif isinstance(value, binary_type):
+            value = value.decode("utf-8", "replace")
+        elif not isinstance(value, text_type):
+            value = ", ".join(str(item) for item in value)
+        result[name] = value
+    return result
+
+
+def get_client_window_ids():
+    """
+    Get the IDs of windows managed by the window manager, as listed in the
+    root window's ``_NET_CLIENT_LIST`` property.
+
+    :rtype: list
+    """
+    root = get_display().screen().root
+    value = get_property(root, "_NET_CLIENT_LIST")
+    return [int(window_id) for window_id in value or ()]
@@ -0,0 +1,531 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+In-process X11 clipboard class
+============================================================================
+
+The :class:`XlibClipboard` class reads and sets the X selections through
+one persistent X connection instead of running *xsel* for each operation.
+Selections are set by acquiring ownership of them and serving the
+conversion requests of other clients from a background thread, as *xsel*
+does.  Large selections are transferred incrementally using the ICCCM
+*INCR* mechanism in both directions.
+
+Since Dragonfly owns the selections it sets, their contents are only
+available while the Python process is running.
+
+This module requires the *python-xlib* package.  The clipboard class is
+used if the *DRAGONFLY_X11_BACKEND* environment variable is set to
+``"xlib"``.  If the X connection cannot be opened, or if a selection owner
+does not answer in time, the :class:`XselClipboard` implementation is used
+instead.
+
+"""
+
+# pylint: disable=W0622
+# Suppress warnings about redefining the built-in 'format' function.
+
+import logging
+import threading
+import time
+
+# Enable python-xlib's thread-safe mode before opening any connections.
+import Xlib.threaded  # pylint: disable=unused-import
+import Xlib.display
+import Xlib.error
+from Xlib import X, Xatom
+from Xlib.protocol import event
+
+from dragonfly.windows.x11_clipboard import XselClipboard
+
+
+# Use a monotonic clock if one is available.
+monotonic = getattr(time, "monotonic", time.time)
+
+
+#===========================================================================
+
+class _Timeout(object):
+    """ Result of a selection conversion that was not answered in time. """
+
+
+TIMEOUT = _Timeout()
+
+
+class SelectionConnection(object):
+    """
+        X connection for reading and owning X selections.
+
+        Events are processed by a daemon thread, which serves the
+        conversion requests of other clients for selections owned by this
+        connection.
+
+        Constructor arguments:
+         - *display_name* (*str*) -- X display to connect to (default: the
+           *DISPLAY* environment variable).
+         - *timeout* (*float*) -- seconds to wait for a selection owner to
+           answer, per transfer step (default: 1).
+
+    """
+
+    _log = logging.getLogger("clipboard")
+
+    #: Text targets served for owned selections, with their encodings.
+    text_targets = (
+        ("UTF8_STRING", "utf-8"),
+        ("text/plain;charset=utf-8", "utf-8"),
+        ("STRING", "latin-1"),
+        ("TEXT", "latin-1"),
+        ("text/plain", "latin-1"),
+    )
+
+    def __init__(self, display_name=None, timeout=1.0):
+        self.timeout = timeout
+        self._display = display = Xlib.display.Display(display_name)
+        root = display.screen().root
+        self._window = root.create_window(0, 0, 1, 1, 0, X.CopyFromParent,
+                                          event_mask=X.PropertyChangeMask)
+        self._atoms = {}
+        for name in ("UTF8_STRING", "TARGETS", "TIMESTAMP", "INCR",
+                     "DRAGONFLY_TIME"):
+            self._atoms[name] = display.get_atom(name)
+        self._text_targets = dict((display.get_atom(name), encoding)
+                                  for name, encoding in self.text_targets)
+
+        # Use chunks smaller than the maximum request length for
+        #  incremental transfers.
+        max_request_bytes = display.display.info.max_request_length * 4
+        self._chunk_size = min(max_request_bytes - 1024, 0x40000)
+
+        self._condition = threading.Condition()
+        self._read_lock = threading.Lock()
+        self._notifications = {}   # selection atom -> SelectionNotify
+        self._new_values = {}      # property atom -> count
+        self._timestamp = None
+        self._owned = {}           # selection atom -> (text, time)
+        self._transfers = {}       # (window ID, property) -> transfer
+
+        thread = threading.Thread(target=self._run,
+                                  name="dragonfly-clipboard")
+        thread.daemon = True
+        thread.start()
+
+    def get_atom(self, name):
+        """ Get the atom for a name, e.g. a selection name. """
+        return self._display.get_atom(name)
+
+    def _get_property_atom(self, selection):
+        return self.get_atom("DRAGONFLY_%d" % selection)
+
+    #-----------------------------------------------------------------------
+    # Event handling methods.
+
+    def _run(self):
+        handlers = {
+            X.SelectionNotify: self._handle_selection_notify,
+            X.SelectionRequest: self._handle_selection_request,
+            X.SelectionClear: self._handle_selection_clear,
+            X.PropertyNotify: self._handle_property_notify,
+        }
+        while True:
+            try:
+                ev = self._display.next_event()
+            except Exception as e:
+                # The connection was probably closed.
+                self._log.debug("X selection connection closed: %s", e)
+                return
+            handler = handlers.get(ev.type)
+            if handler is None:
+                continue
+            try:
+                handler(ev)
+            except Exception as e:
+                self._log.exception("Error handling X selection event: %s",
+                                    e)
+
+    def _handle_selection_notify(self, ev):
+        with self._condition:
+            self._notifications[ev.selection] = ev
+            self._condition.notify_all()
+
+    def _handle_selection_clear(self, ev):
+        # Another client now owns the selection.
+        with self._condition:
+            owned = self._owned.get(ev.selection)
+            if owned and ev.time >= owned[1]:
+                del self._owned[ev.selection]
+
+    def _handle_property_notify(self, ev):
+        if ev.window.id == self._window.id:
+            # Count new values for incremental reads and save the time of
+            #  the timestamp property change.
+            if ev.state != X.PropertyNewValue:
+                return
+            with self._condition:
+                if ev.atom == self._atoms["DRAGONFLY_TIME"]:
+                    self._timestamp = ev.time
+                else:
+                    count = self._new_values.get(ev.atom, 0)
+                    self._new_values[ev.atom] = count + 1
+                self._condition.notify_all()
+
+        # Send the next chunk of an incremental transfer to a requestor
+        #  once it has deleted the previous one.
+        elif ev.state == X.PropertyDelete:
+            key = (ev.window.id, ev.atom)
+            transfer = self._transfers.get(key)
+            if transfer is not None:
+                self._send_chunk(key, transfer)
+
+    def _send_chunk(self, key, transfer):
+        requestor, property_type, data, offset = transfer
+        chunk = data[offset:offset + self._chunk_size]
+        if chunk:
+            transfer[3] = offset + len(chunk)
+        else:
+            # The zero-length chunk ends the transfer.
+            del self._transfers[key]
+        requestor.change_property(key[1], property_type, 8, chunk)
+        self._display.flush()
+
+    def _handle_selection_request(self, ev):
+        # Serve a conversion request.  Obsolete clients may not specify a
+        #  property.
+        property = ev.property or ev.target
+        with self._condition:
+            owned = self._owned.get(ev.selection)
+        converted = False
+        if owned is not None:
+            try:
+                converted = self._convert(ev.requestor, ev.target, property,
+                                          owned)
+            except Xlib.error.XError:
+                converted = False
+        reply = event.SelectionNotify(
+            time=ev.time, requestor=ev.requestor, selection=ev.selection,
+            target=ev.target, property=property if converted else X.NONE)
+        try:
+            ev.requestor.send_event(reply, event_mask=0)
+        except Xlib.error.XError:
+            pass
+        self._display.flush()
+
+    def _convert(self, requestor, target, property, owned):
+        text, timestamp = owned
+        if target == self._atoms["TARGETS"]:
+            targets = [self._atoms["TARGETS"], self._atoms["TIMESTAMP"]]
+            targets.extend(self._text_targets)
+            requestor.change_property(property, Xatom.ATOM, 32, targets)
+            return True
+        elif target == self._atoms["TIMESTAMP"]:
+            requestor.change_property(property, Xatom.INTEGER, 32,
+                                      [timestamp])
+            return True
+
+        encoding = self._text_targets.get(target)
+        if encoding is None:
+            return False
+        data = text.encode(encoding, "replace")
+        property_type = (self._atoms["UTF8_STRING"] if encoding == "utf-8"
+                         else Xatom.STRING)
+
+        # Use an incremental transfer for large data.
+        if len(data) > self._chunk_size:
+            requestor.change_attributes(event_mask=X.PropertyChangeMask)
+            self._transfers[(requestor.id, property)] = [
+                requestor, property_type, data, 0]
+            requestor.change_property(property, self._atoms["INCR"], 32,
+                                      [len(data)])
+        else:
+            requestor.change_property(property, property_type, 8, data)
+        return True
+
+    #-----------------------------------------------------------------------
+    # Methods for owning selections.
+
+    def _get_timestamp(self):
+        # Get the current server time by changing a property and waiting
+        #  for the PropertyNotify event.  The ICCCM says that CurrentTime
+        #  should not be used for acquiring selections.
+        with self._condition:
+            self._timestamp = None
+        self._window.change_property(self._atoms["DRAGONFLY_TIME"],
+                                     Xatom.STRING, 8, b"",
+                                     mode=X.PropModeAppend)
+        self._display.flush()
+        deadline = monotonic() + self.timeout
+        with self._condition:
+            while self._timestamp is None:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return X.CurrentTime
+                self._condition.wait(remaining)
+            return self._timestamp
+
+    def set_selection(self, selection, text):
+        """
+        Acquire ownership of a selection and serve *text* for it.
+
+        :param selection: selection atom
+        :param text: selection text
+        :returns: whether ownership was acquired
+        :rtype: bool
+        """
+        timestamp = self._get_timestamp()
+        with self._condition:
+            self._owned[selection] = (text, timestamp)
+        self._window.set_selection_owner(selection, timestamp)
+        owner = self._display.get_selection_owner(selection)
+        if getattr(owner, "id", owner) != self._window.id:
+            with self._condition:
+                self._owned.pop(selection, None)
+            return False
+        return True
+
+    #-----------------------------------------------------------------------
+    # Methods for reading selections.
+
+    def _convert_all(self, selections, target, deadline):
+        # Request conversions of all selections at once and wait for the
+        #  owners to answer.
+        with self._condition:
+            for selection in selections:
+                self._notifications.pop(selection, None)
+        for selection in selections:
+            self._window.convert_selection(
+                selection, target, self._get_property_atom(selection),
+                X.CurrentTime)
+        self._display.flush()
+        with self._condition:
+            while not all(selection in self._notifications
+                          for selection in selections):
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return dict((selection, self._notifications.pop(selection,
+                                                             None))
+                        for selection in selections)
+
+    def _read_property(self, property):
+        # Read and delete a property on the connection's window, following
+        #  incremental transfers.  Return bytes, None or TIMEOUT.
+        with self._condition:
+            seen = self._new_values.get(property, 0)
+        prop = self._window.get_full_property(property, X.AnyPropertyType)
+        self._window.delete_property(property)
+        self._display.flush()
+        if prop is None:
+            return None
+        if prop.property_type != self._atoms["INCR"]:
+            return bytes(prop.value)
+
+        chunks = []
+        while True:
+            deadline = monotonic() + self.timeout
+            with self._condition:
+                while self._new_values.get(property, 0) == seen:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        return TIMEOUT
+                    self._condition.wait(remaining)
+                seen = self._new_values[property]
+            prop = self._window.get_full_property(property,
+                                                  X.AnyPropertyType)
+            self._window.delete_property(property)
+            self._display.flush()
+            if prop is None or not len(prop.value):
+                return b"".join(chunks)
+            chunks.append(bytes(prop.value))
+
+    def read_selections(self, selections):
+        """
+        Read the text of multiple selections.
+
+        The conversion requests for all selections are sent together, so
+        that reading them takes one round trip.  Selections owned by this
+        connection are read locally.
+
+        :param selections: selection atoms
+        :returns: dictionary of selection text, with ``None`` for empty
+            selections or selections that could not be converted and
+            :data:`TIMEOUT` for selections whose owner did not answer in
+            time.
+        :rtype: dict
+        """
+        result = {}
+        with self._condition:
+            for selection in selections:
+                if selection in self._owned:
+                    result[selection] = self._owned[selection][0]
+        pending = [selection for selection in selections
+                   if selection not in result]
+
+        with self._read_lock:
+            # Try UTF8_STRING first, then STRING for owners which do not
+            #  support it.
+            for target, encoding in ((self._atoms["UTF8_STRING"], "utf-8"),
+                                     (Xatom.STRING, "latin-1")):
+                if not pending:
+                    break
+                deadline = monotonic() + self.timeout
+                notifications = self._convert_all(pending, target, deadline)
+                retry = []
+                for selection in pending:
+                    notification = notifications[selection]
+                    if notification is None:
+                        result[selection] = TIMEOUT
+                        continue
+                    if notification.property == X.NONE:
+                        retry.append(selection)
+                        continue
+                    data = self._read_property(notification.property)
+                    if isinstance(data, bytes):
+                        data = data.decode(encoding, "replace")
+                    result[selection] = data
+                pending = retry
+        for selection in pending:
+            result[selection] = None
+        return result
+
+
+#---------------------------------------------------------------------------
+
+_connection = None
+_connection_lock = threading.Lock()
+_connection_failed = False
+
+
+def get_selection_connection():
+    """
+    Get the shared :class:`SelectionConnection` instance, creating it if
+    necessary.
+
+    ``None`` is returned if the X connection cannot be opened.
+
+    :rtype: SelectionConnection | None
+    """
+    global _connection, _connection_failed
+    with _connection_lock:
+        if _connection is None and not _connection_failed:
+            try:
+                _connection = SelectionConnection()
+            except Exception as e:
+                _connection_failed = True
+                SelectionConnection._log.warning(
+                    "Failed to open X connection for the clipboard, using "
+                    "xsel instead: %s", e)
+        return _connection
+
+
+def set_selection_connection(connection):
+    """
+    Set the shared :class:`SelectionConnection` instance.
+
+    This is useful for using a connection to a specific X server, e.g. one
+    started with *Xvfb* for testing.  Pass ``None`` to open a new
+    connection the next time :func:`get_selection_connection` is called.
+    """
+    global _connection, _connection_failed
+    with _connection_lock:
+        _connection = connection
+        _connection_failed = False
+
+
+#===========================================================================
+
+class XlibClipboard(XselClipboard):
+    """
+    Class for interacting with X selections (clipboards) through one
+    persistent X connection.
+
+    The *xsel* program is used if the X connection cannot be opened or if
+    a selection owner does not answer in time.
+
+    """
+
+    _selection_names = {
+        XselClipboard.format_x_clipboard: "CLIPBOARD",
+        XselClipboard.format_x_primary: "PRIMARY",
+        XselClipboard.format_x_secondary: "SECONDARY",
+    }
+
+    @classmethod
+    def _get_selection_atom(cls, connection, format):
+        name = cls._selection_names.get(format)
+        if name is None:
+            raise ValueError("Invalid X selection: %r" % format)
+        return connection.get_atom(name)
+
+    @classmethod
+    def _get_xsel_selection(cls, format):
+        # Read a selection using xsel.
+        try:
+            return super(XlibClipboard, cls)._get_x_selection(format)
+        except TypeError:
+            return None
+
+    @classmethod
+    def _get_x_selections(cls, formats):
+        connection = get_selection_connection()
+        if connection is None:
+            return dict((format, cls._get_xsel_selection(format))
+                        for format in formats)
+
+        atoms = dict((format, cls._get_selection_atom(connection, format))
+                     for format in formats)
+        texts = connection.read_selections(list(atoms.values()))
+        result = {}
+        for format, atom in atoms.items():
+            text = texts[atom]
+            if text is TIMEOUT:
+                # Fall back on xsel if the owner did not answer in time.
+                cls._log.debug("X selection owner did not answer, using "
+                               "xsel instead")
+                text = cls._get_xsel_selection(format)
+            result[format] = text or None
+        return result
+
+    @classmethod
+    def _get_x_selection(cls, format):
+        text = cls._get_x_selections((format,))[format]
+        if text is None:
+            format_repr = cls.format_names.get(format, format)
+            message = ("Specified X selection %r is not available."
+                       % format_repr)
+            raise TypeError(message)
+        return text
+
+    @classmethod
+    def _set_x_selection(cls, format, content):
+        connection = get_selection_connection()
+        if connection is None:
+            super(XlibClipboard, cls)._set_x_selection(format, content)
+            return
+
+        atom = cls._get_selection_atom(connection, format)
+        content = cls.convert_format_content(cls.format_unicode, content)
+        if not connection.set_selection(atom, content):
+            format_repr = cls.format_names.get(format, format)
+            message = ("Specified X selection %r could not be set."
+                       % format_repr)
+            raise TypeError(message)
@@ -0,0 +1,74 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+import Xlib.error
+
+from dragonfly.windows.rectangle    import Rectangle
+from dragonfly.windows.x11_monitor  import X11Monitor
+from dragonfly.windows.x11_xlib     import get_display
+
+
+#===========================================================================
+# Monitor class for storing info about a single display monitor.
+
+class XlibMonitor(X11Monitor):
+    """
+    The monitor class used on X11 (Linux) by the in-process X11 back-end.
+
+    This implementation gets monitor information using the RandR
+    extension.  It falls back on parsing output from ``xrandr`` if the X
+    server does not support RandR 1.5.
+    """
+
+    #-----------------------------------------------------------------------
+    # Class methods to create new Monitor objects.
+
+    @classmethod
+    def get_all_monitors(cls):
+        display = get_display()
+        try:
+            if not display.has_extension("RANDR"):
+                raise NotImplementedError("RandR is not supported")
+            root = display.screen().root
+            reply = root.xrandr_get_monitors(is_active=True)
+        except (Xlib.error.XError, AttributeError,
+                NotImplementedError) as e:
+            cls._log.debug("Failed to get monitors using RandR: %s", e)
+            return super(XlibMonitor, cls).get_all_monitors()
+
+        monitors = []
+        for info in reply.monitors:
+            name = display.get_atom_name(info.name)
+            rectangle = Rectangle(info.x, info.y, info.width_in_pixels,
+                                  info.height_in_pixels)
+
+            # Get a new or updated monitor object and add it to the list.
+            monitor = cls.get_monitor(name, rectangle)
+            monitor.is_primary = bool(info.primary)
+
+            # Ensure that the top_left monitor is the first in the list.
+            if info.x == 0:
+                monitors.insert(0, monitor)
+            else:
+                monitors.append(monitor)
+
+        # Return the list of monitors.
+        return monitors
@@ -0,0 +1,198 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+In-process Window class for X11
+============================================================================
+
+"""
+
+# pylint: disable=W0622
+# Suppress warnings about redefining the built-in 'id' function.
+
+import Xlib.error
+from Xlib import X, Xutil
+from Xlib.protocol import event
+
+from dragonfly.windows.rectangle   import Rectangle
+from dragonfly.windows.x11_window  import X11Window
+from dragonfly.windows.x11_xlib    import (get_display, get_property,
+                                           get_property_string,
+                                           get_window_properties,
+                                           get_client_window_ids)
+
+
+class XlibWindow(X11Window):
+    """
+        Window class for X11 that uses one persistent X connection instead
+        of external programs.
+
+        Window properties are read directly from the X server and windows
+        are controlled by sending EWMH client messages to the root window.
+        This class requires the *python-xlib* package.  It is used if the
+        *DRAGONFLY_X11_BACKEND* environment variable is set to ``"xlib"``.
+
+    """
+
+    #-----------------------------------------------------------------------
+    # Helper methods.
+
+    @classmethod
+    def _get_root(cls):
+        return get_display().screen().root
+
+    def _get_x_window(self):
+        return get_display().create_resource_object("window", self.id)
+
+    def _send_client_message(self, name, data):
+        # Send an EWMH client message about this window to the root
+        #  window.
+        display = get_display()
+        root = self._get_root()
+        data = (list(data) + [0] * 5)[:5]
+        message = event.ClientMessage(window=self._get_x_window(),
+                                      client_type=display.get_atom(name),
+                                      data=(32, data))
+        mask = X.SubstructureRedirectMask | X.SubstructureNotifyMask
+        try:
+            root.send_event(message, event_mask=mask)
+            display.flush()
+        except Xlib.error.XError:
+            return False
+        return True
+
+    #-----------------------------------------------------------------------
+    # Class methods to create new Window objects.
+
+    @classmethod
+    def get_foreground(cls):
+        value = get_property(cls._get_root(), "_NET_ACTIVE_WINDOW")
+        window_id = value[0] if value else 0
+        return cls.get_window(int(window_id))
+
+    @classmethod
+    def _read_window_snapshot(cls, properties):
+        # Read the properties of all client windows in-process.
+        return [(window_id, get_window_properties(window_id, properties))
+                for window_id in get_client_window_ids()]
+
+    #-----------------------------------------------------------------------
+    # Methods and properties for window attributes.
+
+    def _get_properties_from_xprop(self, *properties):
+        # Read window properties directly and return them in the same form
+        #  as the xprop-based implementation.
+        return get_window_properties(self.id, properties)
+
+    def _get_window_text(self):
+        # Prefer the UTF-8 _NET_WM_NAME property over WM_NAME.
+        window = self._get_x_window()
+        for name in ("_NET_WM_NAME", "WM_NAME"):
+            value = get_property_string(window, name)
+            if value is not None:
+                return value
+        return ""
+
+    #-----------------------------------------------------------------------
+    # Methods related to window geometry.
+
+    def get_position(self):
+        window = self._get_x_window()
+        try:
+            geometry = window.get_geometry()
+            origin = self._get_root().translate_coords(window, 0, 0)
+        except Xlib.error.XError:
+            return Rectangle(0, 0, 0, 0)
+        return Rectangle(origin.x, origin.y, geometry.width,
+                         geometry.height)
+
+    def set_position(self, rectangle):
+        l, t, w, h = rectangle.ltwh
+        try:
+            self._get_x_window().configure(x=int(l), y=int(t),
+                                           width=int(w), height=int(h))
+            get_display().flush()
+        except Xlib.error.XError:
+            return False
+        return True
+
+    #-----------------------------------------------------------------------
+    # Methods for miscellaneous window control.
+
+    def minimize(self):
+        return self._send_client_message("WM_CHANGE_STATE",
+                                         [Xutil.IconicState])
+
+    def _toggle_maximize(self, is_maximized):
+        # Add or remove the maximized window properties from the window's
+        #  _NET_WM_STATE set.
+        display = get_display()
+        action = 0 if is_maximized else 1  # _NET_WM_STATE_REMOVE/ADD
+        return self._send_client_message("_NET_WM_STATE", [
+            action,
+            display.get_atom("_NET_WM_STATE_MAXIMIZED_VERT"),
+            display.get_atom("_NET_WM_STATE_MAXIMIZED_HORZ"),
+            2,  # source indication: pager
+        ])
+
+    def _activate(self):
+        # Source indication 2 (pager) is used so that window managers
+        #  honour the request.
+        return self._send_client_message("_NET_ACTIVE_WINDOW",
+                                         [2, X.CurrentTime])
+
+    def restore(self):
+        state = self.state
+        if self._is_minimized(state):
+            return self._activate()
+        elif self._is_maximized(state):
+            return self._toggle_maximize(True)
+        else:
+            # True if already restored or False if no _NET_WM_STATE.
+            return state is not None
+
+    def close(self):
+        self.clear_window_snapshot()
+        return self._send_client_message("_NET_CLOSE_WINDOW",
+                                         [X.CurrentTime, 2])
+
+    def set_foreground(self):
+        # Restore if minimized.
+        if self.is_minimized and not self.restore():
+            return False  # restore() failed
+        if not self.is_focused:
+            return self._activate() and self.set_focus()
+
+        return True
+
+    def set_focus(self):
+        """
+        Set the input focus to this window.
+
+        This method will set the input focus, but will not necessarily bring
+        the window to the front.
+        """
+        try:
+            self._get_x_window().set_input_focus(X.RevertToParent,
+                                                 X.CurrentTime)
+            get_display().sync()
+        except Xlib.error.XError:
+            return False
+        return True
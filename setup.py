@@ -164,6 +164,7 @@ setup(
           "kaldi": [
                     # NOTE: Remember to also update engine.py to the same version!
                     "kaldi-active-grammar ~= 3.2.0",
+                    "numpy",
                     "sounddevice == 0.3.*",
                     "webrtcvad-wheels == 2.0.*",
                    ],